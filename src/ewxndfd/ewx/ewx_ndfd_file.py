@@ -3,8 +3,11 @@ from datetime import timezone, datetime, date, timedelta
 from zoneinfo import ZoneInfo
 import os
 import csv
+import gzip
+import io
 
 from ewxndfd.datetime_utils import is_utc,ensure_datetime_has_tz
+from ewxndfd import instrumentation
 from . import DEFAULT_TIME_ZONE    
 
 DAILY_NDFD_VARIABLE_TYPES = {
@@ -25,6 +28,97 @@ HOURLY_NDFD_VARIABLE_TYPES = {
     "wspd"  # hourly wind speed
 }
 
+NDFD_VARIABLE_TYPES = DAILY_NDFD_VARIABLE_TYPES | HOURLY_NDFD_VARIABLE_TYPES
+
+# utc hours of the NDFD forecast cycles
+NDFD_CYCLE_HOURS = (0, 6, 12, 18)
+
+# value in NDFD_Auto files for forecast periods that ended before the cycle
+NDFD_MISSING_VALUE = -9999.0
+
+# archived cycle files can be compressed, the reader looks for these after the plain csv
+COMPRESSED_EXTENSIONS = ('.gz', '.zst')
+
+
+def find_ndfd_file(ndfd_file_path:str)->str:
+    """the path of an NDFD file as given, or of its compressed copy (.csv.gz or .csv.zst)
+
+    Args:
+        ndfd_file_path (str): path of the plain csv file
+
+    Returns:
+        str: path that exists, or None
+    """
+    if os.path.exists(ndfd_file_path):
+        return ndfd_file_path
+    for extension in COMPRESSED_EXTENSIONS:
+        if os.path.exists(ndfd_file_path + extension):
+            return ndfd_file_path + extension
+    return None
+
+
+def open_ndfd_file(ndfd_file_path:str):
+    """open an NDFD file for reading text, decompressing .gz and .zst files as they
+    are read rather than all at once.  zstd requires the zstandard package
+
+    Args:
+        ndfd_file_path (str): path to a .csv, .csv.gz or .csv.zst file
+
+    Returns:
+        text file object
+    """
+    if ndfd_file_path.endswith('.gz'):
+        return gzip.open(ndfd_file_path, 'rt')
+    if ndfd_file_path.endswith('.zst'):
+        try:
+            import zstandard
+        except ImportError as e:
+            raise ImportError("reading .zst NDFD files requires zstandard, install with pip install 'ewxndfd[zstd]'") from e
+        reader = zstandard.ZstdDecompressor().stream_reader(open(ndfd_file_path, 'rb'), closefd=True)
+        return io.TextIOWrapper(reader, encoding='utf-8')
+    return open(ndfd_file_path, 'r')
+
+
+def parse_column_header(column:str)->tuple[datetime, datetime]:
+    """utc valid times of an NDFD file column header, either a window like 
+    '2025111900-2025111913' in daily files or a single hour like '2025111901' in 
+    hourly files
+
+    Args:
+        column (str): column header, surrounding whitespace is ignored
+
+    Returns:
+        tuple[datetime, datetime]: (start, end) utc datetimes, the same for hourly columns
+    """
+    parts = column.strip().split('-')
+    start = _parse_hour_stamp(parts[0])
+    if len(parts) == 1:
+        return (start, start)
+    end = _parse_hour_stamp(parts[1])
+    return (start, end)
+
+
+def _parse_hour_stamp(stamp:str)->datetime:
+    """utc datetime of a YYYYMMDDHH stamp, without strptime which is slow for the
+    168 columns of hourly files"""
+    if len(stamp) != 10 or not stamp.isdigit():
+        raise ValueError(f"time data {stamp!r} does not match format '%Y%m%d%H'")
+    return datetime(int(stamp[0:4]), int(stamp[4:6]), int(stamp[6:8]), int(stamp[8:10]), tzinfo=timezone.utc)
+
+
+def cycle_datetime_from_file_name(ndfd_file_path:str)->datetime:
+    """utc datetime of the forecast cycle from an NDFD file name like mint_20251119t06.csv
+
+    Args:
+        ndfd_file_path (str): file name or path
+
+    Returns:
+        datetime: utc cycle datetime
+    """
+    base_name = os.path.basename(ndfd_file_path).split('.')[0]
+    cycle = base_name.split('_')[-1]
+    return datetime.strptime(cycle, "%Y%m%dt%H").replace(tzinfo=timezone.utc)
+
 
     
 class NDFD():
@@ -32,7 +126,8 @@ class NDFD():
     forecast csv data files
     """
     
-    def __init__(self, ndfd_dir:str, variable_type:str, unit_str:str, unit_abbr:str, tz:str=DEFAULT_TIME_ZONE):
+    def __init__(self, ndfd_dir:str, variable_type:str, unit_str:str=None, unit_abbr:str=None, tz:str=DEFAULT_TIME_ZONE,
+                 stations=None):
         """initialize NDFDFile object for a specific weather variable
 
         Args:
@@ -41,6 +136,7 @@ class NDFD():
             unit_str (str): full unit string for variable
             unit_abbr (str): abbreviated unit string for variable
             tz (str): timezone string for local time zone
+            stations (StationRegistry, optional): station coordinates, needed to select rows by coordinates
 
         Raises:
             ValueError: must be a valid variable type
@@ -52,7 +148,7 @@ class NDFD():
         self.ndfd_dir = ndfd_dir
 
         # set variable type if it's valid to read-only value
-        if variable_type not in DAILY_NDFD_VARIABLE_TYPES:
+        if variable_type not in NDFD_VARIABLE_TYPES:
             raise ValueError(f"Invalid variable type: {variable_type}")
         else:
             self._variable_type = variable_type
@@ -61,6 +157,7 @@ class NDFD():
         self.unit_abbr = unit_abbr
                 
         self.tz = tz
+        self.stations = stations
         
         self.ndfd_data_cache = []
         self.ndfd_file_path_cache = ""
@@ -155,51 +252,116 @@ class NDFD():
         forecast_file = self.forecast_file_for_utc_datetime(utc_datetime)
         return(forecast_file)
     
-    def get_forecast(self, local_datetime:datetime=None, station_list:list=[])->list[dict]:
+    def get_forecast(self, local_datetime:datetime=None, station_list:list=[], near:tuple=None, 
+                     radius_km:float=None, valid_start:datetime=None, valid_end:datetime=None,
+                     lead_hours=None, columns:list=None, format:str="dicts"):
         """read NDFD forecast data for the given local datetime.  If no datetime is provided,
         use the current local datetime
 
         Args:
             local_datetime (datetime, optional): local datetime value. Defaults to None.    
+            station_list (list, optional): only include these station codes. Defaults to [].
+            near (tuple, optional): (lat, lon) to select rows by coordinates, the nearest 
+                station or if radius_km is given, all stations within radius_km. Requires stations.
+                With station_list, only the stations of station_list that are near.
+            radius_km (float, optional): radius for near, in km. Defaults to None.
+            valid_start, valid_end, lead_hours, columns (optional): only read some of the 
+                forecast columns, see _read
+            format (str, optional): 'dicts', 'array' for an NDFDCycleArray with QC flags, or 
+                'pandas', 'arrow', 'polars' or 'xarray', see ewxndfd.output_formats. Defaults to "dicts".
         Returns:
-            list: list of dicts representing NDFD data,suitable for importing into Pandas
+            list: list of dicts representing NDFD data,suitable for importing into Pandas, 
+                or the data in the requested format.  Empty (in the requested format) when 
+                no station matches
+        Raises:
+            FileNotFoundError: no forecast file for the datetime
+            ValueError: invalid format, or a row of the file is too short for the columns read
         """
+        if format not in ("dicts", "array", "pandas", "arrow", "polars", "xarray"):
+            raise ValueError(f"Invalid format: {format}")
+        
         if local_datetime is None:
             local_datetime = datetime.now(tz=ZoneInfo(self.tz))
         
         ndfd_filename = self.forecast_file_for_local_datetime(local_datetime)
-        ndfd_file_path = os.path.join(self.ndfd_dir, ndfd_filename)
+        ndfd_file_path = find_ndfd_file(os.path.join(self.ndfd_dir, ndfd_filename))
         
-        if not os.path.exists(ndfd_file_path):
-            raise FileNotFoundError(f"NDFD forecast file not found: {ndfd_file_path}")
+        if ndfd_file_path is None:
+            raise FileNotFoundError(f"NDFD forecast file not found: {os.path.join(self.ndfd_dir, ndfd_filename)}")
         
+        # the other formats are built from the columns of the file, without a dict per row
+        read = self._read if format == "dicts" else self._read_table
         try:
-            ndfd_data = self._read(ndfd_file_path)
+            ndfd_data = read(ndfd_file_path, valid_start=valid_start, valid_end=valid_end,
+                             lead_hours=lead_hours, columns=columns)
+        except (FileNotFoundError, ValueError):
+            # missing files and malformed rows keep their own message, with the file and line
+            raise
         except Exception as e:
-            raise RuntimeError(f"NDFD forecast file not found: {ndfd_file_path}") from e
+            raise RuntimeError(f"NDFD forecast file could not be read: {ndfd_file_path}") from e
         
-        if station_list:
-            ndfd_data = self.filter_stations(station_list)
- 
-        # ndfd_data = self._wide_to_long(ndfd_data)
-            
-        return(ndfd_data)
+        # None for all stations, otherwise the station codes to keep, which may be none
+        selected_stations = [s.strip() for s in station_list] if station_list else None
+        if near is not None:
+            near_stations = self.stations_near(near[0], near[1], radius_km)
+            if selected_stations is None:
+                selected_stations = near_stations
+            else:
+                near_stations = set(near_stations)
+                selected_stations = [s for s in selected_stations if s in near_stations]
+        
+        if format == "dicts":
+            if selected_stations is not None:
+                ndfd_data = self.filter_stations(selected_stations, ndfd_data)
+            return(ndfd_data)
+        
+        from .ndfd_array import cycle_array_from_table, select_stations
+        cycle_array = cycle_array_from_table(self.variable_type, cycle_datetime_from_file_name(ndfd_file_path),
+                                             *ndfd_data)
+        if selected_stations is not None:
+            cycle_array = select_stations(cycle_array, selected_stations)
+        if format == "array":
+            return cycle_array
+        from ..output_formats import cycle_array_to_format
+        return cycle_array_to_format(cycle_array, format)
     
     
-    def _read(self, ndfd_file_path:str)->list[dict]:
-        """ read NDFD file into list of dicts   
+    def _read(self, ndfd_file_path:str, valid_start:datetime=None, valid_end:datetime=None,
+              lead_hours=None, columns:list=None)->list[dict]:
+        """ read NDFD file into list of dicts, optionally only some forecast columns.
+        
+        When any column option is given, the header is parsed first to find the
+        indices of the columns needed, and each row is only split as far as the 
+        last needed column.  Column options combine, a column must match all of them.
+        
         Args:
-            ndfd_file_path (str): full path to NDFD file
+            ndfd_file_path (str): full path to NDFD file, or to the plain csv name of a 
+                compressed .csv.gz or .csv.zst file
+            valid_start (datetime, optional): only columns whose valid time starts at or after this.
+                Naive datetimes are in the local timezone of this object
+            valid_end (datetime, optional): only columns whose valid time starts before this
+            lead_hours (int or tuple, optional): only columns starting within this many hours 
+                of the forecast cycle, or a (min, max) window of hours after the cycle
+            columns (list, optional): only these column headers e.g. ['2025111900-2025111913']
         Returns:
             list: list of dicts representing NDFD data,suitable for importing into Pandas DataFrame
         """
 
-        if not os.path.exists(ndfd_file_path):
+        found_path = find_ndfd_file(ndfd_file_path)
+        if found_path is None:
             raise FileNotFoundError(f"NDFD file not found: {ndfd_file_path}")  
+        ndfd_file_path = found_path
+        
+        pruned = any(option is not None for option in (valid_start, valid_end, lead_hours, columns))
         
-        with open(ndfd_file_path, 'r') as file:
-            reader = csv.DictReader(file)   
-            ndfd_data = [row for row in reader]
+        with instrumentation.span("ndfd_read"):
+            with open_ndfd_file(ndfd_file_path) as file:
+                if pruned:
+                    ndfd_data = self._read_columns(file, ndfd_file_path, valid_start, valid_end, lead_hours, columns)
+                else:
+                    reader = csv.DictReader(file)   
+                    ndfd_data = [row for row in reader]
+        instrumentation.count("rows_parsed", len(ndfd_data))
         
         # reduce IO, cache the last read file and data
         # not sure if we will use this
@@ -208,43 +370,209 @@ class NDFD():
         
         return ndfd_data
     
+    def _read_table(self, ndfd_file_path:str, valid_start:datetime=None, valid_end:datetime=None,
+                    lead_hours=None, columns:list=None)->tuple[list[str], list[str], list[list[str]]]:
+        """read NDFD file as columns of cells rather than a dict per row, for conversion 
+        to arrays.  Takes the same column options as _read
+
+        Returns:
+            tuple: (column headers, station codes, rows of cell strings in column header order)
+        """
+        found_path = find_ndfd_file(ndfd_file_path)
+        if found_path is None:
+            raise FileNotFoundError(f"NDFD file not found: {ndfd_file_path}")  
         
-    def _wide_to_long(self,ndfd_data:list[dict])->list:
-        """ convert NDFD format with one data per column for use with ETL processes"""
+        with instrumentation.span("ndfd_read"):
+            with open_ndfd_file(found_path) as file:
+                table = self._parse_table(file, found_path, valid_start, valid_end, lead_hours, columns)
+        instrumentation.count("rows_parsed", len(table[1]))
+        return table
+    
+    def select_columns(self, header:list[str], ndfd_file_path:str, valid_start:datetime=None, 
+                       valid_end:datetime=None, lead_hours=None, columns:list=None)->list[int]:
+        """indices of the forecast columns in a header row that match the column options 
+        of _read, in file order.  Index 0 (station) is never included
+        """
+        if valid_start is not None:
+            valid_start = ensure_datetime_has_tz(valid_start, self.tz)
+        if valid_end is not None:
+            valid_end = ensure_datetime_has_tz(valid_end, self.tz)
         
-        long_data = []
+        if lead_hours is not None:
+            if isinstance(lead_hours, (int, float)):
+                lead_hours = (0, lead_hours)
+            cycle = cycle_datetime_from_file_name(ndfd_file_path)
+            lead_start = cycle + timedelta(hours=lead_hours[0])
+            lead_end = cycle + timedelta(hours=lead_hours[1])
         
-        for row in ndfd_data:
-            station = row['station']
-            for column, value in row.items():
-                # loop through columns keys and convert to rows
-                # skip station key, we already have that
-                if column == 'station':
+        wanted_columns = None if columns is None else {c.strip() for c in columns}
+        
+        selected = []
+        for i, column in enumerate(header[1:], start=1):
+            if wanted_columns is not None and column.strip() not in wanted_columns:
+                continue
+            if valid_start is not None or valid_end is not None or lead_hours is not None:
+                start, _ = parse_column_header(column)
+                if valid_start is not None and start < valid_start:
+                    continue
+                if valid_end is not None and start >= valid_end:
                     continue
+                if lead_hours is not None and not (lead_start <= start < lead_end):
+                    continue
+            selected.append(i)
+        return selected
+    
+    def _read_columns(self, file, ndfd_file_path:str, valid_start:datetime=None, valid_end:datetime=None,
+                      lead_hours=None, columns:list=None)->list[dict]:
+        """read only the selected columns from an open NDFD file, same row format as csv.DictReader"""
+        station_key, (names, stations, cells) = self._parse_table(
+            file, ndfd_file_path, valid_start, valid_end, lead_hours, columns, station_key=True)
+        return [{station_key: station, **dict(zip(names, row))} for station, row in zip(stations, cells)]
+    
+    def _parse_table(self, file, ndfd_file_path:str, valid_start:datetime=None, valid_end:datetime=None,
+                     lead_hours=None, columns:list=None, station_key:bool=False)->tuple:
+        """split the rows of an open NDFD file into station codes and the cells of the 
+        selected columns, see _read_table.  With station_key, returns (header of the 
+        station column, table)
+        
+        Raises:
+            ValueError: a row is too short to have all of the selected columns, e.g. a truncated file
+        """
+        header = file.readline().rstrip('\r\n').split(',')
+        selected = self.select_columns(header, ndfd_file_path, valid_start, valid_end, lead_hours, columns)
+        
+        # no need to split past the last column needed
+        max_split = (selected[-1] + 1) if selected else 1
+        n_fields = selected[-1] + 1 if selected else 1
+        
+        stations = []
+        cells = []
+        # line numbers of the file, the header is line 1
+        for line_number, line in enumerate(file, start=2):
+            fields = line.rstrip('\r\n').split(',', max_split)
+            if fields == ['']:
+                continue
+            if len(fields) < n_fields:
+                raise ValueError(f"NDFD file {ndfd_file_path} line {line_number} has {len(fields)} fields, "
+                                 f"expected at least {n_fields}")
+            stations.append(fields[0])
+            cells.append([fields[i] for i in selected])
+        
+        table = ([header[i] for i in selected], stations, cells)
+        if station_key:
+            return (header[0], table)
+        return table
+    
+        
+    def _wide_to_long(self,ndfd_data:list[dict], skip_missing:bool=False)->list:
+        """ convert NDFD format with one data per column for use with ETL processes.
+        For range checks and QC flags use get_forecast_array
+        
+        Args:
+            ndfd_data (list[dict]): rows as from get_forecast
+            skip_missing (bool, optional): leave out blank cells and the missing value. 
+                Defaults to False, a row for every cell with None for blank cells (hours 
+                without a forecast in hourly files) and the missing value as in the file.
+        Returns:
+            list: list of dicts with station, forecast_date and the value
+        """
+        
+        long_data = []
+        
+        with instrumentation.span("ndfd_wide_to_long"):
+            for row in ndfd_data:
+                station = row['station']
+                for column, value in row.items():
+                    # loop through columns keys and convert to rows
+                    # skip station key, we already have that
+                    if column == 'station':
+                        continue
                 
-                # extract the date from date range
-                fcst_dt = column.strip()                                                 
-                d1 = fcst_dt.split('-')[0]
-                forecast_date = date.fromisoformat(d1)
+                    # hourly files have blank cells for hours without a forecast
+                    if not value.strip():
+                        if skip_missing:
+                            continue
+                        forecast_value = None
+                    else:
+                        forecast_value = float(value)
+                        # periods that ended before the cycle
+                        if skip_missing and forecast_value == NDFD_MISSING_VALUE:
+                            continue
                 
-                forecast_value = float(value)
-                long_row = {
-                    'station': station,
-                    'forecast_date': forecast_date,
-                    self.variable_type: forecast_value
-                }
+                    # extract the date from date range
+                    fcst_dt = column.strip()                                                 
+                    d1 = fcst_dt.split('-')[0]
+                    forecast_date = date.fromisoformat(d1)
+                    
+                    long_row = {
+                        'station': station,
+                        'forecast_date': forecast_date,
+                        self.variable_type: forecast_value
+                    }
                 
-                long_data.append(long_row)
+                    long_data.append(long_row)
         
         return long_data
     
     
-    def filter_stations(self, station_list)->list:
-        """ filter NDFD data to only include stations in station_list """
+    def get_forecast_array(self, local_datetime:datetime=None, qc_mask:int=None):
+        """read the NDFD forecast file for the given local datetime as arrays with 
+        quality control flags, see ndfd_array.read_cycle_array and ndfd_qc
 
-        station_list = [s.strip() for s in station_list]
+        Args:
+            local_datetime (datetime, optional): local datetime value. Defaults to None, now.
+            qc_mask (int, optional): QC flags to set to NaN. Defaults to None, ndfd_qc.QC_DEFAULT_MASK.
+
+        Returns:
+            NDFDCycleArray: stations, valid times, values and QC flags
+        """
+        from .ndfd_array import read_cycle_array
+        from .ndfd_qc import QC_DEFAULT_MASK
+        
+        if local_datetime is None:
+            local_datetime = datetime.now(tz=ZoneInfo(self.tz))
+        
+        ndfd_filename = self.forecast_file_for_local_datetime(local_datetime)
+        ndfd_file_path = find_ndfd_file(os.path.join(self.ndfd_dir, ndfd_filename))
+        if ndfd_file_path is None:
+            raise FileNotFoundError(f"NDFD forecast file not found: {os.path.join(self.ndfd_dir, ndfd_filename)}")
+        
+        return read_cycle_array(ndfd_file_path, qc_mask=QC_DEFAULT_MASK if qc_mask is None else qc_mask)
+    
+    
+    def stations_near(self, lat:float, lon:float, radius_km:float=None)->list[str]:
+        """station codes near a coordinate: the nearest station, or all stations within radius_km
+
+        Args:
+            lat (float): latitude in decimal degrees
+            lon (float): longitude in decimal degrees
+            radius_km (float, optional): search radius. Defaults to None, nearest station only.
+
+        Raises:
+            ValueError: no station registry for this object
+
+        Returns:
+            list[str]: station codes, closest first
+        """
+        if self.stations is None:
+            raise ValueError("a StationRegistry is needed to select stations by coordinates")
+        
+        if radius_km is None:
+            found = self.stations.nearest(lat, lon)
+        else:
+            found = self.stations.within_radius(lat, lon, radius_km)
+        return [station.station for station, _ in found]
+    
+    def filter_stations(self, station_list, ndfd_data:list[dict]=None)->list:
+        """ filter NDFD data to only include stations in station_list, from ndfd_data
+        or if not given, the most recently read data """
+
+        if ndfd_data is None:
+            ndfd_data = self.ndfd_data_cache
+        
+        station_list = {s.strip() for s in station_list}
         
-        filtered_data = [d for d in self.ndfd_data if d['station'] in station_list]
+        filtered_data = [d for d in ndfd_data if d['station'] in station_list]
         # optional self.ndfd_data = filtered_data
         return(filtered_data)
 
@@ -0,0 +1,257 @@
+"""threshold alerts for every station from each forecast cycle, e.g. frost when
+mint <= -2 C in the next 72 hours or heavy rain when qpf6 totals >= 25 in 24 hours
+
+Rules are (variable, comparator, threshold, lead window).  For each cycle the
+running minimum, maximum and sum over the columns of each variable are computed
+once per station, in lead time order.  A rule with a window starting at the cycle
+is then one column of a running array, so all rules are evaluated together with
+array indexing and comparisons.  The engine keeps the alert state of each station
+and rule and reports only the alerts that started or ended since the previous cycle.
+
+example usage:
+
+    from ewxndfd.ewx.ndfd_alerts import AlertEngine, AlertRule
+
+    engine = AlertEngine([
+        AlertRule("frost", "mint", "<=", -2.0, lead_hours=72),
+        AlertRule("heavy_rain", "qpf6", ">=", 25.0, lead_hours=24, aggregate="sum"),
+    ])
+    for change in engine.update_from_dir("/data/ndfd", cycle):
+        print(change.rule, change.station, change.active, change.value)
+"""
+
+from datetime import datetime
+from typing import NamedTuple
+import operator
+import os
+
+import numpy as np
+
+from .ndfd_array import read_cycle_bundle
+
+ALERT_COMPARATORS = {
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+}
+ALERT_AGGREGATES = ("min", "max", "sum")
+
+
+class AlertRule(NamedTuple):
+    name: str
+    variable: str           # NDFD variable type
+    comparator: str         # one of ALERT_COMPARATORS
+    threshold: float
+    lead_hours: object = 72 # window end in hours after the cycle, or (start, end) hours
+    aggregate: str = None   # min, max or sum over the window, defaults to min for < and <=, otherwise max
+
+
+class AlertChange(NamedTuple):
+    rule: str
+    station: str
+    active: bool            # True when the alert starts, False when it ends
+    value: float            # aggregate of the window, NaN if the station has no values in it
+    cycle: datetime
+
+
+def rule_aggregate(rule:AlertRule)->str:
+    """the aggregate of a rule, from the comparator if not given"""
+    if rule.aggregate is not None:
+        return rule.aggregate
+    return "min" if rule.comparator.startswith("<") else "max"
+
+
+def validate_rule(rule:AlertRule):
+    """raise ValueError for a rule that can't be evaluated"""
+    if rule.comparator not in ALERT_COMPARATORS:
+        raise ValueError(f"Invalid comparator in rule {rule.name}: {rule.comparator}, use one of {', '.join(ALERT_COMPARATORS)}")
+    if rule_aggregate(rule) not in ALERT_AGGREGATES:
+        raise ValueError(f"Invalid aggregate in rule {rule.name}: {rule.aggregate}, use one of {', '.join(ALERT_AGGREGATES)}")
+    start, end = _lead_window(rule)
+    if end <= start:
+        raise ValueError(f"Invalid lead window in rule {rule.name}: {rule.lead_hours}")
+
+
+def _lead_window(rule:AlertRule)->tuple[float, float]:
+    if isinstance(rule.lead_hours, (tuple, list)):
+        return (float(rule.lead_hours[0]), float(rule.lead_hours[1]))
+    return (0.0, float(rule.lead_hours))
+
+
+class CycleExtremes():
+    """running aggregates of one variable of a cycle, over columns in lead time order
+
+    Attributes:
+        stations (np.ndarray): station codes
+        lead_end (np.ndarray): hours from the cycle to the end of each column, columns
+            ending after the cycle only
+        running_min, running_max, running_sum (np.ndarray): (stations, columns) aggregate of
+            the first columns up to and including each column, ignoring NaN
+        running_count (np.ndarray): (stations, columns) number of values that are not NaN
+    """
+
+    def __init__(self, cycle_array):
+        cycle = np.datetime64(cycle_array.cycle.replace(tzinfo=None), 's')
+        lead_end = (cycle_array.valid_end - cycle) / np.timedelta64(1, 'h')
+        # columns that ended at or before the cycle (the -9999 periods) are never in a window
+        order = np.argsort(lead_end, kind='stable')
+        order = order[lead_end[order] > 0]
+        self.values = cycle_array.values[:, order]
+        self.stations = cycle_array.stations
+        self.lead_end = lead_end[order]
+
+        # fmin and fmax ignore NaN unless both are NaN
+        self.running_min = np.fmin.accumulate(self.values, axis=1)
+        self.running_max = np.fmax.accumulate(self.values, axis=1)
+        self.running_sum = np.nancumsum(self.values, axis=1)
+        self.running_count = np.cumsum(~np.isnan(self.values), axis=1)
+
+    def window_values(self, aggregate:str, start:float, end:float)->np.ndarray:
+        """aggregate of each station over the columns ending between start (exclusive) and
+        end hours after the cycle, NaN where a station has no values in the window"""
+        first = int(np.searchsorted(self.lead_end, start, side='right'))
+        last = int(np.searchsorted(self.lead_end, end, side='right')) - 1
+        if last < first:
+            return np.full(len(self.stations), np.nan)
+
+        count = self.running_count[:, last] - (self.running_count[:, first - 1] if first > 0 else 0)
+        if aggregate == "sum":
+            total = self.running_sum[:, last] - (self.running_sum[:, first - 1] if first > 0 else 0.0)
+            return np.where(count > 0, total, np.nan)
+        if first == 0:
+            running = self.running_min if aggregate == "min" else self.running_max
+            return running[:, last]
+        # a window not starting with the first column is reduced directly
+        window = self.values[:, first:last + 1]
+        with np.errstate(invalid='ignore'):
+            reduced = np.fmin.reduce(window, axis=1) if aggregate == "min" else np.fmax.reduce(window, axis=1)
+        return np.where(count > 0, reduced, np.nan)
+
+
+class AlertEngine():
+    """evaluate alert rules for every station, cycle after cycle, and report state changes"""
+
+    def __init__(self, rules:list[AlertRule]):
+        """
+        Args:
+            rules (list[AlertRule]): rules with unique names
+
+        Raises:
+            ValueError: no rules, duplicate rule names or a rule that can't be evaluated
+        """
+        if not rules:
+            raise ValueError("an alert engine needs at least one rule")
+        names = [rule.name for rule in rules]
+        if len(set(names)) != len(names):
+            raise ValueError("alert rule names must be unique")
+        for rule in rules:
+            validate_rule(rule)
+        self.rules = list(rules)
+        self.variables = sorted({rule.variable for rule in rules})
+        self._thresholds = np.array([rule.threshold for rule in rules], dtype=float)
+
+        # alert state of the previous cycle: station -> bool array, one per rule
+        self.states = {}
+        self.last_cycle = None
+
+    def evaluate(self, cycle_arrays:dict)->tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """evaluate every rule for every station of one cycle
+
+        Args:
+            cycle_arrays (dict): variable type -> NDFDCycleArray of one cycle, e.g. from
+                ndfd_array.read_cycle_bundle
+
+        Returns:
+            tuple: (stations, values, active) with values and active as (stations, rules) arrays.
+                Stations are those of the first rule variable.  A station without values in a
+                rule's window is not active for that rule.
+
+        Raises:
+            ValueError: a rule variable is not in cycle_arrays
+        """
+        missing = set(self.variables) - set(cycle_arrays)
+        if missing:
+            raise ValueError(f"cycle has no arrays for {', '.join(sorted(missing))}")
+
+        # the running arrays are computed once per variable, for all of its rules
+        extremes = {variable: CycleExtremes(cycle_arrays[variable]) for variable in self.variables}
+        stations = extremes[self.rules[0].variable].stations
+        station_index = {str(s): i for i, s in enumerate(stations)}
+
+        values = np.full((len(stations), len(self.rules)), np.nan)
+        for r, rule in enumerate(self.rules):
+            variable_extremes = extremes[rule.variable]
+            window = variable_extremes.window_values(rule_aggregate(rule), *_lead_window(rule))
+            if variable_extremes.stations is stations:
+                values[:, r] = window
+            else:
+                rows = np.array([station_index.get(str(s), -1) for s in variable_extremes.stations], dtype=int)
+                values[rows[rows >= 0], r] = window[rows >= 0]
+
+        active = np.zeros(values.shape, dtype=bool)
+        with np.errstate(invalid='ignore'):
+            for comparator, compare in ALERT_COMPARATORS.items():
+                columns = np.array([rule.comparator == comparator for rule in self.rules])
+                if columns.any():
+                    active[:, columns] = compare(values[:, columns], self._thresholds[columns])
+        return (stations, values, active)
+
+    def update(self, cycle_arrays:dict, cycle:datetime=None)->list[AlertChange]:
+        """evaluate a cycle and return the alerts that started or ended since the previous
+        cycle.  On the first cycle every active alert is returned.  Active alerts of stations 
+        that are not in the cycle end, with a NaN value, and the stations' state is removed
+
+        Args:
+            cycle_arrays (dict): variable type -> NDFDCycleArray of one cycle
+            cycle (datetime, optional): cycle time for the changes. Defaults to the cycle of the arrays.
+
+        Returns:
+            list[AlertChange]: changes, by rule then station, with stations not in the cycle last
+        """
+        stations, values, active = self.evaluate(cycle_arrays)
+        if cycle is None:
+            cycle = cycle_arrays[self.rules[0].variable].cycle
+
+        no_alerts = np.zeros(len(self.rules), dtype=bool)
+        previous = np.array([self.states.get(str(s), no_alerts) for s in stations]).reshape(active.shape)
+        changed_rows, changed_rules = np.nonzero(active != previous)
+
+        # stations of the previous cycle that are not in this one
+        current = {str(s) for s in stations}
+        dropped = [station for station in self.states if station not in current]
+        changed = [(r, s, str(stations[s]), bool(active[s, r]), float(values[s, r]))
+                   for r, s in zip(changed_rules, changed_rows)]
+        changed += [(r, len(stations) + d, station, False, np.nan)
+                    for d, station in enumerate(dropped) for r in np.flatnonzero(self.states[station])]
+
+        changes = [
+            AlertChange(rule=self.rules[r].name, station=station, active=state, value=value, cycle=cycle)
+            for r, _, station, state, value in sorted(changed, key=lambda change: change[:2])
+        ]
+        for station in dropped:
+            del self.states[station]
+        self.states.update({str(station): active[s] for s, station in enumerate(stations)})
+        self.last_cycle = cycle
+        return changes
+
+    def update_from_dir(self, ndfd_dir:str, cycle:datetime)->list[AlertChange]:
+        """read the rule variables of a cycle from a directory of NDFD_Auto files and update
+
+        Args:
+            ndfd_dir (str): directory of NDFD_Auto files
+            cycle (datetime): utc cycle time
+
+        Returns:
+            list[AlertChange]: changes since the previous cycle
+        """
+        if not os.path.isdir(ndfd_dir):
+            raise ValueError(f"NDFD directory does not exist: {ndfd_dir}")
+        return self.update(read_cycle_bundle(ndfd_dir, cycle, variables=self.variables), cycle)
+
+    def active_alerts(self)->dict:
+        """rule name -> stations with the alert active after the latest cycle"""
+        return {
+            rule.name: sorted(station for station, state in self.states.items() if state[r])
+            for r, rule in enumerate(self.rules)
+        }
@@ -0,0 +1,131 @@
+"""one NDFD_Auto cycle file as numpy arrays: station codes, the valid time window
+of each column and a stations x columns matrix of values, for vectorized work on
+whole files instead of the list of dicts from NDFD.get_forecast
+"""
+
+from datetime import datetime
+from typing import NamedTuple
+import os
+
+import numpy as np
+
+from .ewx_ndfd_file import (
+    NDFD,
+    NDFD_VARIABLE_TYPES,
+    cycle_datetime_from_file_name,
+    find_ndfd_file,
+    parse_column_header,
+)
+from .ndfd_qc import QC_DEFAULT_MASK, qc_cycle_bundle, qc_values
+
+
+class NDFDCycleArray(NamedTuple):
+    variable_type: str
+    cycle: datetime           # utc cycle time
+    stations: np.ndarray      # station codes, str
+    valid_start: np.ndarray   # utc start of each column, datetime64[s]
+    valid_end: np.ndarray     # utc end of each column, same as start for hourly files
+    values: np.ndarray        # float (stations, columns), NaN for blank, missing and masked values
+    flags: np.ndarray = None  # uint8 QC flags for each value, see ndfd_qc
+
+
+def column_valid_times(columns:list[str])->tuple[np.ndarray, np.ndarray]:
+    """utc valid start and end times of NDFD column headers as datetime64[s] arrays"""
+    times = [parse_column_header(column) for column in columns]
+    valid_start = np.array([start.replace(tzinfo=None) for start, _ in times], dtype='datetime64[s]')
+    valid_end = np.array([end.replace(tzinfo=None) for _, end in times], dtype='datetime64[s]')
+    return (valid_start, valid_end)
+
+
+def read_cycle_array(ndfd_file_path:str, qc_mask:int=QC_DEFAULT_MASK)->NDFDCycleArray:
+    """read an NDFD_Auto cycle file into arrays, with quality control flags from
+    ndfd_qc.qc_values.  Files written by ndfd_binary.write_binary_cycle are loaded 
+    from the binary format
+
+    Args:
+        ndfd_file_path (str): path to a csv (or binary) cycle file, named like mint_20251119t06.csv
+        qc_mask (int, optional): QC flags to set to NaN. Defaults to QC_DEFAULT_MASK.
+
+    Returns:
+        NDFDCycleArray: arrays for the file
+    """
+    if ndfd_file_path.endswith(".ndfdb"):
+        from .ndfd_binary import load_binary_cycle
+        with load_binary_cycle(ndfd_file_path) as binary_cycle:
+            return binary_cycle.to_array(qc_mask=qc_mask)
+
+    variable_type = os.path.basename(ndfd_file_path).split('_')[0]
+    ndfd = NDFD(os.path.dirname(ndfd_file_path) or '.', variable_type)
+    columns, stations, cells = ndfd._read_table(ndfd_file_path)
+
+    return cycle_array_from_table(variable_type, cycle_datetime_from_file_name(ndfd_file_path),
+                                  columns, stations, cells, qc_mask=qc_mask)
+
+
+def cycle_array_from_table(variable_type:str, cycle:datetime, columns:list[str], stations:list[str],
+                           cells:list[list[str]], qc_mask:int=QC_DEFAULT_MASK)->NDFDCycleArray:
+    """arrays from the columns of an NDFD file as read by NDFD._read_table
+
+    Args:
+        variable_type (str): NDFD variable type
+        cycle (datetime): utc cycle time
+        columns (list[str]): column headers
+        stations (list[str]): station code of each row
+        cells (list[list[str]]): cell strings of each row, in column order
+        qc_mask (int, optional): QC flags to set to NaN. Defaults to QC_DEFAULT_MASK.
+
+    Returns:
+        NDFDCycleArray: arrays for the table
+    """
+    valid_start, valid_end = column_valid_times(columns)
+    stations = np.char.strip(np.array(stations, dtype=str))
+
+    # float() per cell is several times faster than numpy's string to float conversion
+    raw_values = np.array([[float(cell) if cell.strip() else np.nan for cell in row] for row in cells],
+                          dtype=float).reshape(len(stations), len(columns))
+    values, flags = qc_values(variable_type, raw_values, mask=qc_mask)
+
+    return NDFDCycleArray(
+        variable_type=variable_type,
+        cycle=cycle,
+        stations=stations,
+        valid_start=valid_start,
+        valid_end=valid_end,
+        values=values,
+        flags=flags,
+    )
+
+
+def select_stations(cycle_array:NDFDCycleArray, station_list:list[str])->NDFDCycleArray:
+    """rows of a cycle array for the stations in station_list, in file order.  All
+    columns are kept, so the result has the same columns even if no station matches"""
+    keep = np.isin(cycle_array.stations, [s.strip() for s in station_list])
+    return cycle_array._replace(
+        stations=cycle_array.stations[keep],
+        values=cycle_array.values[keep],
+        flags=None if cycle_array.flags is None else cycle_array.flags[keep],
+    )
+
+
+def read_cycle_bundle(ndfd_dir:str, cycle:datetime, variables:list[str]=None,
+                      qc_mask:int=QC_DEFAULT_MASK)->dict:
+    """read the files of several variables for one cycle and check them together,
+    see ndfd_qc.qc_cycle_bundle.  Variables without a file for the cycle are left out
+
+    Args:
+        ndfd_dir (str): directory of NDFD_Auto files
+        cycle (datetime): utc cycle time
+        variables (list[str], optional): variable types. Defaults to all.
+        qc_mask (int, optional): QC flags to set to NaN. Defaults to QC_DEFAULT_MASK.
+
+    Returns:
+        dict: variable type -> NDFDCycleArray
+    """
+    if variables is None:
+        variables = sorted(NDFD_VARIABLE_TYPES)
+    bundle = {}
+    for variable_type in variables:
+        path = find_ndfd_file(os.path.join(ndfd_dir, f"{variable_type}_{cycle.strftime('%Y%m%dt%H')}.csv"))
+        if path is not None:
+            bundle[variable_type] = read_cycle_array(path, qc_mask=qc_mask)
+    return qc_cycle_bundle(bundle, qc_mask=qc_mask)
@@ -0,0 +1,390 @@
+"""rebuild derived tables from a range of historical NDFD_Auto forecast cycles
+
+Cycle files for a date range and set of variables are read and converted to long
+rows (variable, cycle, station, valid_start, valid_end, value) in a pool of worker
+processes, a chunk of files per work unit.  Results are written to a CSV, Parquet
+or SQLite sink in cycle order as they complete, and each written chunk is recorded
+in a checkpoint so an interrupted backfill can be resumed without repeating rows.
+
+example usage:
+
+    ndfd_backfill /data/ndfd --start 2025-05-01 --end 2025-09-30 --sink season.parquet \\
+        --checkpoint season.checkpoint
+"""
+
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+import argparse
+import csv
+import itertools
+import os
+import sqlite3
+
+import numpy as np
+
+from .ewx_ndfd_file import (
+    NDFD_CYCLE_HOURS,
+    NDFD_MISSING_VALUE,
+    NDFD_VARIABLE_TYPES,
+    cycle_datetime_from_file_name,
+    find_ndfd_file,
+)
+from .ndfd_array import read_cycle_array
+from .ndfd_qc import QC_BLANK, QC_MISSING
+
+BACKFILL_COLUMNS = ['variable', 'cycle', 'station', 'valid_start', 'valid_end', 'value']
+
+
+def enumerate_cycle_files(ndfd_dir:str, start_date:date, end_date:date, variables:list[str]=None)->list[str]:
+    """paths of the cycle files that exist for a range of cycle dates, in order of
+    cycle then variable.  Compressed files are found too, see find_ndfd_file
+
+    Args:
+        ndfd_dir (str): directory of NDFD_Auto csv files
+        start_date (date): first utc cycle date
+        end_date (date): last utc cycle date, inclusive
+        variables (list[str], optional): variable types. Defaults to all.
+
+    Returns:
+        list[str]: file paths
+    """
+    if variables is None:
+        variables = sorted(NDFD_VARIABLE_TYPES)
+    for variable_type in variables:
+        if variable_type not in NDFD_VARIABLE_TYPES:
+            raise ValueError(f"Invalid variable type: {variable_type}")
+
+    paths = []
+    cycle_date = start_date
+    while cycle_date <= end_date:
+        for hour in NDFD_CYCLE_HOURS:
+            for variable_type in variables:
+                path = find_ndfd_file(
+                    os.path.join(ndfd_dir, f"{variable_type}_{cycle_date.strftime('%Y%m%d')}t{hour:02d}.csv"))
+                if path is not None:
+                    paths.append(path)
+        cycle_date += timedelta(days=1)
+    return paths
+
+
+def cycle_file_rows(ndfd_file_path:str, skip_missing:bool=True)->list[tuple]:
+    """read one cycle file into long rows of BACKFILL_COLUMNS, with utc ISO times.
+    Values are as in the file, without range checks
+
+    Args:
+        ndfd_file_path (str): path to an NDFD_Auto csv file
+        skip_missing (bool, optional): leave out blank cells and the missing value. Defaults to True.
+
+    Returns:
+        list[tuple]: one row per station and column, None for blank cells
+    """
+    variable_type = os.path.basename(ndfd_file_path).split('_')[0]
+    cycle = cycle_datetime_from_file_name(ndfd_file_path).isoformat()
+
+    # no QC mask, the values are NaN for blank and missing cells only
+    cycle_array = read_cycle_array(ndfd_file_path, qc_mask=0)
+    missing = (cycle_array.flags & QC_MISSING) != 0
+    if skip_missing:
+        keep = (cycle_array.flags & (QC_BLANK | QC_MISSING)) == 0
+    else:
+        keep = np.ones(cycle_array.values.shape, dtype=bool)
+    # rows in file order, by station then column
+    station_index, column_index = np.nonzero(keep)
+
+    values = np.where(missing, NDFD_MISSING_VALUE, cycle_array.values)[keep].tolist()
+    if not skip_missing:
+        # blank cells are the only NaN left
+        values = [None if value != value else value for value in values]
+    valid_start = np.char.add(np.datetime_as_string(cycle_array.valid_start, unit='s'), '+00:00')
+    valid_end = np.char.add(np.datetime_as_string(cycle_array.valid_end, unit='s'), '+00:00')
+
+    return list(zip(
+        itertools.repeat(variable_type),
+        itertools.repeat(cycle),
+        cycle_array.stations[station_index].tolist(),
+        valid_start[column_index].tolist(),
+        valid_end[column_index].tolist(),
+        values,
+    ))
+
+
+def chunk_part_name(ndfd_file_path:str, variables:list[str]=None)->str:
+    """name of the sink part for a chunk starting with a file, e.g. 20251119t06_01_mint, 
+    so parts sort by cycle and then in the order of variables
+
+    Args:
+        ndfd_file_path (str): first file of the chunk
+        variables (list[str], optional): variable types of the backfill. Defaults to all.
+
+    Returns:
+        str: part name
+    """
+    if variables is None:
+        variables = sorted(NDFD_VARIABLE_TYPES)
+    variable_type = os.path.basename(ndfd_file_path).split('_')[0]
+    position = variables.index(variable_type) if variable_type in variables else len(variables)
+    cycle = cycle_datetime_from_file_name(ndfd_file_path)
+    return f"{cycle.strftime('%Y%m%dt%H')}_{position:02d}_{variable_type}"
+
+
+def _process_chunk(chunk:list[str], skip_missing:bool=True)->list[tuple]:
+    """work unit for a worker process: rows of all files in a chunk"""
+    rows = []
+    for path in chunk:
+        rows.extend(cycle_file_rows(path, skip_missing=skip_missing))
+    return rows
+
+
+class CSVSink():
+    """append backfill rows to a csv file, writing the header if the file is new.
+    The file size after each chunk is kept in the checkpoint, and rows written after
+    the last checkpointed chunk are truncated when a backfill resumes"""
+
+    def __init__(self, path:str):
+        self.path = path
+        new_file = not os.path.exists(path) or os.path.getsize(path) == 0
+        self._file = open(path, 'a', newline='')
+        self._writer = csv.writer(self._file)
+        if new_file:
+            self._writer.writerow(BACKFILL_COLUMNS)
+
+    def write(self, rows:list[tuple], chunk_name:str):
+        self._writer.writerows(rows)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def position(self)->int:
+        """size of the file, with everything written so far"""
+        self._file.flush()
+        return os.fstat(self._file.fileno()).st_size
+
+    def truncate(self, position:int):
+        """drop rows written after position, a size from position()"""
+        self._file.flush()
+        self._file.truncate(position)
+        os.fsync(self._file.fileno())
+
+    def close(self):
+        self._file.close()
+
+
+class SQLiteSink():
+    """insert backfill rows into a table of a SQLite database.  Completed files are
+    recorded in a {table}_checkpoint table in the same transaction as their rows"""
+
+    def __init__(self, path:str, table:str="ndfd_forecast"):
+        self.table = table
+        self._connection = sqlite3.connect(path)
+        self._connection.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} (variable TEXT, cycle TEXT, station TEXT, "
+            "valid_start TEXT, valid_end TEXT, value REAL)"
+        )
+        self._connection.execute(f"CREATE TABLE IF NOT EXISTS {table}_checkpoint (file TEXT PRIMARY KEY)")
+        self._connection.commit()
+
+    def write(self, rows:list[tuple], chunk_name:str, files:list[str]=None):
+        with self._connection:
+            self._connection.executemany(f"INSERT INTO {self.table} VALUES (?, ?, ?, ?, ?, ?)", rows)
+            if files:
+                self._connection.executemany(f"INSERT OR IGNORE INTO {self.table}_checkpoint VALUES (?)",
+                                             [(f,) for f in files])
+
+    def completed_files(self)->set:
+        """names of the files recorded with write"""
+        return {row[0] for row in self._connection.execute(f"SELECT file FROM {self.table}_checkpoint")}
+
+    def close(self):
+        self._connection.close()
+
+
+class ParquetSink():
+    """write backfill rows to a directory of Parquet files, one per chunk named by
+    chunk_part_name, which can be read in cycle order as one dataset e.g.
+    pd.read_parquet(path).  Requires pyarrow"""
+
+    def __init__(self, path:str):
+        import pyarrow  # noqa: F401, fail early if not installed
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+
+    def write(self, rows:list[tuple], chunk_name:str):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        columns = list(zip(*rows)) if rows else [[] for _ in BACKFILL_COLUMNS]
+        schema = pa.schema([(c, pa.string()) for c in BACKFILL_COLUMNS[:-1]] + [('value', pa.float64())])
+        table = pa.table({c: list(values) for c, values in zip(BACKFILL_COLUMNS, columns)}, schema=schema)
+        tmp_path = os.path.join(self.path, f".{chunk_name}.parquet.tmp")
+        pq.write_table(table, tmp_path)
+        os.replace(tmp_path, os.path.join(self.path, f"{chunk_name}.parquet"))
+
+    def close(self):
+        pass
+
+
+SINKS = {
+    'csv': CSVSink,
+    'sqlite': SQLiteSink,
+    'parquet': ParquetSink,
+}
+
+
+def sink_for_path(path:str, sink_format:str=None):
+    """open a sink for path, with the format from the extension if not given"""
+    if sink_format is None:
+        extension = os.path.splitext(path)[1].lower()
+        sink_format = {'.csv': 'csv', '.sqlite': 'sqlite', '.db': 'sqlite', '.parquet': 'parquet'}.get(extension)
+        if sink_format is None:
+            raise ValueError(f"can't tell the sink format from {path}, give the format")
+    if sink_format not in SINKS:
+        raise ValueError(f"Invalid sink format: {sink_format}")
+    return SINKS[sink_format](path)
+
+
+def _parse_checkpoint(checkpoint_path:str)->tuple[set, int]:
+    """(completed file names, last sink position) of a checkpoint file.  A chunk is a
+    line per file name followed, for sinks with a position, by an @position line; the
+    names of a chunk without its position line were not completely recorded"""
+    completed = set()
+    position = None
+    if checkpoint_path is None or not os.path.exists(checkpoint_path):
+        return completed, position
+    with open(checkpoint_path, 'r') as f:
+        lines = f.read().split('\n')
+    # the last line is empty, or was cut off in a crash
+    pending = []
+    for line in lines[:-1]:
+        line = line.strip()
+        if line.startswith('@'):
+            position = int(line[1:])
+            completed.update(pending)
+            pending = []
+        elif line:
+            pending.append(line)
+    if position is None:
+        completed.update(pending)
+    return completed, position
+
+
+def read_checkpoint(checkpoint_path:str)->set:
+    """names of the files completed in previous runs"""
+    return _parse_checkpoint(checkpoint_path)[0]
+
+
+def backfill(ndfd_dir:str, start_date:date, end_date:date, sink, variables:list[str]=None,
+             checkpoint_path:str=None, max_workers:int=None, chunk_size:int=8, skip_missing:bool=True)->int:
+    """read all cycle files for a date range in parallel and write rows to a sink in order
+
+    Files already listed in the checkpoint are skipped.  Chunks are written in cycle
+    order and a chunk's files are added to the checkpoint after the sink has written
+    them.  Sinks with completed_files() (SQLite) record the files with their rows, and
+    for sinks with position() (CSV) the checkpoint keeps the position after each chunk
+    and rows past it are truncated on resume, so no rows are repeated.
+
+    Args:
+        ndfd_dir (str): directory of NDFD_Auto csv files
+        start_date (date): first utc cycle date
+        end_date (date): last utc cycle date, inclusive
+        sink: object with write(rows, chunk_name), e.g. from sink_for_path
+        variables (list[str], optional): variable types. Defaults to all.
+        checkpoint_path (str, optional): file recording completed files. Defaults to None.
+        max_workers (int, optional): worker processes. Defaults to None, one per cpu.
+        chunk_size (int, optional): files per work unit. Defaults to 8.
+        skip_missing (bool, optional): leave out blank and missing values. Defaults to True.
+
+    Returns:
+        int: number of files processed in this run
+    """
+    completed, position = _parse_checkpoint(checkpoint_path)
+    sink_checkpoint = checkpoint_path is not None and hasattr(sink, 'completed_files')
+    sink_position = checkpoint_path is not None and hasattr(sink, 'position')
+    if sink_checkpoint:
+        completed |= sink.completed_files()
+    if sink_position:
+        if position is None:
+            # where the first chunk starts, to truncate back to if it is not finished
+            position = sink.position()
+            with open(checkpoint_path, 'a') as f:
+                f.write(f"@{position}\n")
+                f.flush()
+                os.fsync(f.fileno())
+        else:
+            # drop rows written after the last chunk in the checkpoint
+            sink.truncate(position)
+
+    paths = [p for p in enumerate_cycle_files(ndfd_dir, start_date, end_date, variables)
+             if os.path.basename(p) not in completed]
+    chunks = [paths[i:i + chunk_size] for i in range(0, len(paths), chunk_size)]
+    if not chunks:
+        return 0
+
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    # keep a bounded window of chunks in flight and write them in order
+    window = 2 * max_workers
+
+    checkpoint = open(checkpoint_path, 'a') if checkpoint_path is not None else None
+    try:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            pending = deque()
+            next_chunk = 0
+            while next_chunk < len(chunks) or pending:
+                while next_chunk < len(chunks) and len(pending) < window:
+                    chunk = chunks[next_chunk]
+                    pending.append((chunk, executor.submit(_process_chunk, chunk, skip_missing)))
+                    next_chunk += 1
+
+                chunk, future = pending.popleft()
+                names = [os.path.basename(p) for p in chunk]
+                if sink_checkpoint:
+                    sink.write(future.result(), chunk_part_name(chunk[0], variables), files=names)
+                else:
+                    sink.write(future.result(), chunk_part_name(chunk[0], variables))
+                if checkpoint is not None:
+                    record = ''.join(f"{name}\n" for name in names)
+                    if sink_position:
+                        record += f"@{sink.position()}\n"
+                    checkpoint.write(record)
+                    checkpoint.flush()
+                    os.fsync(checkpoint.fileno())
+    finally:
+        if checkpoint is not None:
+            checkpoint.close()
+
+    return len(paths)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        prog="ndfd_backfill",
+        description="""Convert a date range of NDFD_Auto forecast cycles to long rows in a
+        csv, parquet or sqlite file using all cpus.  For example:
+        ndfd_backfill /data/ndfd --start 2025-05-01 --end 2025-09-30 --sink season.sqlite --checkpoint season.txt"""
+    )
+    parser.add_argument("ndfd_dir", help="directory of NDFD csv files")
+    parser.add_argument("--start", type=date.fromisoformat, required=True, help="first cycle date YYYY-MM-DD (utc)")
+    parser.add_argument("--end", type=date.fromisoformat, required=True, help="last cycle date YYYY-MM-DD (utc)")
+    parser.add_argument("--variables", nargs="+", default=None, help="variable types, defaults to all")
+    parser.add_argument("--sink", required=True, help="output .csv, .parquet (directory) or .sqlite path")
+    parser.add_argument("--format", dest="sink_format", choices=sorted(SINKS), default=None,
+                        help="output format, defaults to the format for the sink extension")
+    parser.add_argument("--checkpoint", default=None, help="checkpoint file to resume an interrupted backfill")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes, defaults to one per cpu")
+    parser.add_argument("--chunk-size", dest="chunk_size", type=int, default=8, help="files per work unit")
+    parser.add_argument("--keep-missing", dest="keep_missing", action="store_true",
+                        help="include blank and -9999 cells")
+    args = parser.parse_args()
+
+    sink = sink_for_path(args.sink, args.sink_format)
+    try:
+        n_files = backfill(args.ndfd_dir, args.start, args.end, sink, variables=args.variables,
+                           checkpoint_path=args.checkpoint, max_workers=args.workers,
+                           chunk_size=args.chunk_size, skip_missing=not args.keep_missing)
+    finally:
+        sink.close()
+    print(f"processed {n_files} files to {args.sink}")
+
+
+if __name__ == "__main__":
+    main()
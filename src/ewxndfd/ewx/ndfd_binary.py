@@ -0,0 +1,268 @@
+"""compact binary format for NDFD_Auto cycle files, loaded with mmap as numpy
+views without parsing or copying
+
+NDFD values are fixed point, so they are stored as int16 scaled by 10 (tenths) or by
+100 for the precipitation amounts which have two decimals.  Values are stored as read,
+before QC masking, so any QC mask can be applied when the file is loaded.  The missing
+value (-9999) is stored as BINARY_MISSING and blank cells as BINARY_BLANK.  A file is 
+laid out as
+
+    header       struct BINARY_HEADER (magic, version, variable, cycle, sizes, scale)
+    stations     n_stations fixed width ascii codes
+    times        n_columns int64 valid start, then n_columns int64 valid end, utc epoch seconds
+    values       n_stations x n_columns int16, row (station) major
+
+with each section starting on an 8 byte boundary.  Processes that load the same
+file share its pages in the OS page cache.
+"""
+
+from datetime import datetime, timezone
+import argparse
+import glob
+import mmap
+import os
+import struct
+
+import numpy as np
+
+from .ewx_ndfd_file import NDFD_MISSING_VALUE
+from .ndfd_array import NDFDCycleArray, read_cycle_array
+from .ndfd_qc import QC_BLANK, QC_DEFAULT_MASK, QC_MISSING, qc_values
+
+BINARY_MAGIC = b"NDFDBIN1"
+# version 2 stores values before QC masking and blank cells separately from the missing value
+BINARY_VERSION = 2
+BINARY_EXTENSION = ".ndfdb"
+BINARY_MISSING = np.iinfo(np.int16).min
+BINARY_BLANK = BINARY_MISSING + 1
+
+# magic, version, scale, station code width, variable, cycle epoch seconds, n stations, n columns
+BINARY_HEADER = struct.Struct("<8sHHH6sqII")
+
+# variables with two decimals
+_HUNDREDTHS_VARIABLES = {"qpfd", "qpf6"}
+
+
+def binary_scale(variable_type:str)->int:
+    """multiplier from NDFD values to the stored int16"""
+    return 100 if variable_type in _HUNDREDTHS_VARIABLES else 10
+
+
+def _aligned(offset:int)->int:
+    return (offset + 7) // 8 * 8
+
+
+def _section_offsets(n_stations:int, n_columns:int, code_width:int)->tuple[int, int, int, int]:
+    stations_offset = _aligned(BINARY_HEADER.size)
+    times_offset = _aligned(stations_offset + n_stations * code_width)
+    values_offset = _aligned(times_offset + 2 * n_columns * 8)
+    end = values_offset + n_stations * n_columns * 2
+    return (stations_offset, times_offset, values_offset, end)
+
+
+def write_binary_cycle(cycle_array:NDFDCycleArray, out_path:str)->str:
+    """write a cycle to the binary format
+
+    Args:
+        cycle_array (NDFDCycleArray): cycle from ndfd_array.read_cycle_array with qc_mask=0,
+            so values outside the QC ranges are kept.  Without flags, NaN values are stored blank
+        out_path (str): file to write, written to a temporary file and renamed
+
+    Raises:
+        ValueError: a value does not fit in int16 at the scale for the variable, or values 
+            were masked by QC and can't be stored
+
+    Returns:
+        str: out_path
+    """
+    scale = binary_scale(cycle_array.variable_type)
+    n_stations, n_columns = cycle_array.values.shape if cycle_array.values.ndim == 2 else (0, 0)
+    codes = np.char.encode(cycle_array.stations.astype(str), 'ascii')
+    code_width = max(int(codes.dtype.itemsize), 1)
+
+    scaled = np.rint(cycle_array.values * scale)
+    no_value = np.isnan(scaled)
+    if cycle_array.flags is not None:
+        missing = (cycle_array.flags & QC_MISSING) != 0
+        if np.any(no_value & ((cycle_array.flags & (QC_BLANK | QC_MISSING)) == 0)):
+            raise ValueError(f"{cycle_array.variable_type} values were masked by QC, read the cycle with qc_mask=0")
+    else:
+        missing = np.zeros(scaled.shape, dtype=bool)
+    if np.any(np.abs(scaled[~no_value]) > np.iinfo(np.int16).max):
+        raise ValueError(f"values of {cycle_array.variable_type} out of range for the binary format")
+    values = np.where(missing, BINARY_MISSING, np.where(no_value, BINARY_BLANK, scaled)).astype('<i2')
+
+    stations_offset, times_offset, values_offset, end = _section_offsets(n_stations, n_columns, code_width)
+    header = BINARY_HEADER.pack(
+        BINARY_MAGIC, BINARY_VERSION, scale, code_width,
+        cycle_array.variable_type.encode('ascii'), int(cycle_array.cycle.timestamp()),
+        n_stations, n_columns,
+    )
+
+    buffer = bytearray(end)
+    buffer[:len(header)] = header
+    buffer[stations_offset:stations_offset + n_stations * code_width] = codes.astype(f'S{code_width}').tobytes()
+    times = np.concatenate([cycle_array.valid_start, cycle_array.valid_end]).astype('datetime64[s]').astype('<i8')
+    buffer[times_offset:times_offset + times.nbytes] = times.tobytes()
+    buffer[values_offset:end] = values.tobytes()
+
+    tmp_path = out_path + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(buffer)
+    os.replace(tmp_path, out_path)
+    return out_path
+
+
+class BinaryCycle():
+    """a binary cycle file mapped into memory.  The stations, valid_start, valid_end
+    and values attributes are read-only numpy views of the mapped file"""
+
+    def __init__(self, path:str):
+        """map the file
+
+        Args:
+            path (str): binary cycle file
+
+        Raises:
+            ValueError: not a binary cycle file or an unsupported version
+        """
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self._map_sections(path)
+        except Exception:
+            self._mmap.close()
+            raise
+
+    def _map_sections(self, path:str):
+        """check the header and create the numpy views of the sections"""
+        if len(self._mmap) < BINARY_HEADER.size:
+            raise ValueError(f"not an NDFD binary cycle file: {path}")
+        magic, version, scale, code_width, variable, cycle, n_stations, n_columns = \
+            BINARY_HEADER.unpack_from(self._mmap, 0)
+        if magic != BINARY_MAGIC:
+            raise ValueError(f"not an NDFD binary cycle file: {path}")
+        if version != BINARY_VERSION:
+            raise ValueError(f"unsupported NDFD binary version {version}: {path}")
+
+        self.variable_type = variable.rstrip(b'\0').decode('ascii')
+        self.cycle = datetime.fromtimestamp(cycle, tz=timezone.utc)
+        self.scale = scale
+
+        stations_offset, times_offset, values_offset, end = _section_offsets(n_stations, n_columns, code_width)
+        if len(self._mmap) < end:
+            raise ValueError(f"truncated NDFD binary cycle file: {path}")
+
+        self.stations = np.frombuffer(self._mmap, dtype=f'S{code_width}', count=n_stations, offset=stations_offset)
+        times = np.frombuffer(self._mmap, dtype='<i8', count=2 * n_columns, offset=times_offset).view('datetime64[s]')
+        self.valid_start = times[:n_columns]
+        self.valid_end = times[n_columns:]
+        self.values = np.frombuffer(self._mmap, dtype='<i2', count=n_stations * n_columns,
+                                    offset=values_offset).reshape(n_stations, n_columns)
+
+    def station_codes(self)->list[str]:
+        return [code.decode('ascii') for code in self.stations]
+
+    def station_index(self, station:str)->int:
+        """row of a station code, or -1"""
+        matches = np.flatnonzero(self.stations == station.encode('ascii'))
+        return int(matches[0]) if len(matches) else -1
+
+    def float_values(self, rows=None, columns=None, missing_value:float=np.nan)->np.ndarray:
+        """values as floats with NaN for blank, for all or a selection of rows and
+        columns.  Values are not QC checked.  This is a copy, select first to convert 
+        only what is needed
+
+        Args:
+            rows, columns (optional): numpy indices of the rows and columns. Defaults to all.
+            missing_value (float, optional): value for the -9999 missing value. Defaults to NaN.
+        """
+        values = self.values
+        if rows is not None:
+            values = values[rows]
+        if columns is not None:
+            values = values[:, columns]
+        result = values.astype(float) / self.scale
+        result[values == BINARY_BLANK] = np.nan
+        result[values == BINARY_MISSING] = missing_value
+        return result
+
+    def to_array(self, qc_mask:int=QC_DEFAULT_MASK)->NDFDCycleArray:
+        """copy into an NDFDCycleArray with QC flags and the qc_mask applied, the same 
+        as reading the csv file"""
+        raw_values = self.float_values(missing_value=NDFD_MISSING_VALUE)
+        values, flags = qc_values(self.variable_type, raw_values, mask=qc_mask)
+        return NDFDCycleArray(
+            variable_type=self.variable_type,
+            cycle=self.cycle,
+            stations=np.array(self.station_codes(), dtype=str),
+            valid_start=self.valid_start.copy(),
+            valid_end=self.valid_end.copy(),
+            values=values,
+            flags=flags,
+        )
+
+    def close(self):
+        """release the mapping.  Views taken from the attributes before closing stay
+        valid, the file is unmapped when the last of them is deleted"""
+        self.stations = self.valid_start = self.valid_end = self.values = None
+        if self._mmap is None:
+            return
+        try:
+            self._mmap.close()
+        except BufferError:
+            # views still point into the map, it is released with the last of them
+            pass
+        self._mmap = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+def load_binary_cycle(path:str)->BinaryCycle:
+    """memory map a binary cycle file, see BinaryCycle"""
+    return BinaryCycle(path)
+
+
+def convert_cycle_file(csv_path:str, out_dir:str=None)->str:
+    """convert one NDFD_Auto csv file (or compressed csv) to a binary file with the same name and BINARY_EXTENSION
+
+    Args:
+        csv_path (str): csv cycle file
+        out_dir (str, optional): directory to write to. Defaults to None, next to the csv file.
+
+    Returns:
+        str: path of the binary file
+    """
+    base_name = os.path.basename(csv_path).split('.')[0]
+    out_path = os.path.join(out_dir or os.path.dirname(csv_path), base_name + BINARY_EXTENSION)
+    # values as read, QC is applied when the binary file is loaded
+    return write_binary_cycle(read_cycle_array(csv_path, qc_mask=0), out_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        prog="ndfd_binary",
+        description="""Convert NDFD_Auto csv cycle files to the compact binary format.  For example:
+        ndfd_binary /data/ndfd --out-dir /data/ndfd_binary"""
+    )
+    parser.add_argument("ndfd_dir", help="directory of NDFD csv files")
+    parser.add_argument("--out-dir", dest="out_dir", default=None, help="output directory, defaults to ndfd_dir")
+    parser.add_argument("--pattern", default="*_*t??.csv", help="file name pattern to convert")
+    args = parser.parse_args()
+
+    if args.out_dir is not None:
+        os.makedirs(args.out_dir, exist_ok=True)
+    paths = sorted(glob.glob(os.path.join(args.ndfd_dir, args.pattern)))
+    for csv_path in paths:
+        convert_cycle_file(csv_path, args.out_dir)
+    print(f"converted {len(paths)} files")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""compress a directory of NDFD_Auto csv cycle files in place with gzip or zstd.
+The NDFD reader finds and reads the compressed files directly, see
+ewx_ndfd_file.find_ndfd_file and open_ndfd_file
+"""
+
+import argparse
+import glob
+import gzip
+import os
+import shutil
+
+COMPRESSION_FORMATS = {"gz": ".gz", "zst": ".zst"}
+
+
+def _compressed_writer(out_path:str, compression:str, level:int=None):
+    if compression == "gz":
+        return gzip.open(out_path, 'wb', compresslevel=9 if level is None else level)
+    try:
+        import zstandard
+    except ImportError as e:
+        raise ImportError("writing .zst NDFD files requires zstandard, install with pip install 'ewxndfd[zstd]'") from e
+    compressor = zstandard.ZstdCompressor(level=19 if level is None else level)
+    return compressor.stream_writer(open(out_path, 'wb'), closefd=True)
+
+
+def compress_cycle_file(csv_path:str, compression:str="gz", level:int=None, keep:bool=False)->str:
+    """compress one csv file next to itself, streaming so the file is never held in
+    memory.  The compressed file is written under a temporary name and renamed before
+    the csv is removed, so the cycle is always readable
+
+    Args:
+        csv_path (str): csv cycle file
+        compression (str, optional): 'gz' or 'zst'. Defaults to "gz".
+        level (int, optional): compression level. Defaults to None, 9 for gzip and 19 for zstd.
+        keep (bool, optional): keep the csv file. Defaults to False.
+
+    Returns:
+        str: path of the compressed file
+    """
+    if compression not in COMPRESSION_FORMATS:
+        raise ValueError(f"Invalid compression: {compression}")
+
+    out_path = csv_path + COMPRESSION_FORMATS[compression]
+    tmp_path = out_path + ".tmp"
+    with open(csv_path, 'rb') as source, _compressed_writer(tmp_path, compression, level) as destination:
+        shutil.copyfileobj(source, destination)
+    os.replace(tmp_path, out_path)
+
+    if not keep:
+        os.remove(csv_path)
+    return out_path
+
+
+def compress_cycle_directory(ndfd_dir:str, compression:str="gz", level:int=None, keep:bool=False,
+                             pattern:str="*_*t??.csv")->list[str]:
+    """compress every csv cycle file in a directory in place
+
+    Args:
+        ndfd_dir (str): directory of NDFD csv files
+        compression (str, optional): 'gz' or 'zst'. Defaults to "gz".
+        level (int, optional): compression level. Defaults to None.
+        keep (bool, optional): keep the csv files. Defaults to False.
+        pattern (str, optional): file name pattern of cycle files. Defaults to "*_*t??.csv".
+
+    Returns:
+        list[str]: paths of the compressed files
+    """
+    return [compress_cycle_file(csv_path, compression=compression, level=level, keep=keep)
+            for csv_path in sorted(glob.glob(os.path.join(ndfd_dir, pattern)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        prog="ndfd_compress",
+        description="""Compress NDFD_Auto csv cycle files in a directory in place, replacing
+        each .csv with .csv.gz or .csv.zst.  For example:
+        ndfd_compress /data/ndfd/archive --format zst"""
+    )
+    parser.add_argument("ndfd_dir", help="directory of NDFD csv files")
+    parser.add_argument("--format", dest="compression", choices=sorted(COMPRESSION_FORMATS), default="gz",
+                        help="compression format, zst requires the zstandard package")
+    parser.add_argument("--level", type=int, default=None, help="compression level")
+    parser.add_argument("--keep", action="store_true", help="keep the csv files")
+    parser.add_argument("--pattern", default="*_*t??.csv", help="file name pattern to compress")
+    args = parser.parse_args()
+
+    paths = compress_cycle_directory(args.ndfd_dir, compression=args.compression, level=args.level,
+                                     keep=args.keep, pattern=args.pattern)
+    print(f"compressed {len(paths)} files")
+
+
+if __name__ == "__main__":
+    main()
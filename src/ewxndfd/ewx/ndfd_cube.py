@@ -0,0 +1,195 @@
+"""stack successive forecast cycles of a variable into one cycle x station x valid time
+array, to see how the forecast for a station and valid date changes from cycle to
+cycle with array operations over the whole network
+
+example usage:
+
+    from ewxndfd.ewx.ndfd_cube import build_forecast_cube
+    cube = build_forecast_cube("/data/ndfd", "mint", date(2025, 11, 19), date(2025, 11, 20))
+    print(cube.lead_time_statistics())
+    blended = cube.lagged_ensemble_mean(k=4)
+    print(cube.largest_jumps(n=10))
+"""
+
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from .ndfd_array import NDFDCycleArray, read_cycle_array
+from .ndfd_backfill import enumerate_cycle_files
+
+
+class ForecastCube():
+    """values of one variable from several cycles, aligned by station and valid time
+
+    Attributes:
+        variable_type (str): NDFD variable type
+        cycles (np.ndarray): utc cycle times, datetime64[s], in increasing order
+        stations (np.ndarray): station codes
+        valid_start (np.ndarray): utc start of each valid time window, datetime64[s], increasing
+        valid_end (np.ndarray): utc end of each valid time window
+        values (np.ndarray): float (cycle, station, valid time), NaN where a cycle has no forecast
+    """
+
+    def __init__(self, cycle_arrays:list[NDFDCycleArray]):
+        """align cycle arrays into a cube
+
+        Args:
+            cycle_arrays (list[NDFDCycleArray]): cycles of one variable, in any order
+
+        Raises:
+            ValueError: no cycles, or cycles of more than one variable
+        """
+        if not cycle_arrays:
+            raise ValueError("a forecast cube needs at least one cycle")
+        variable_types = {a.variable_type for a in cycle_arrays}
+        if len(variable_types) != 1:
+            raise ValueError(f"cycles of more than one variable: {sorted(variable_types)}")
+
+        cycle_arrays = sorted(cycle_arrays, key=lambda a: a.cycle)
+        self.variable_type = cycle_arrays[0].variable_type
+        self.cycles = np.array([a.cycle.replace(tzinfo=None) for a in cycle_arrays], dtype='datetime64[s]')
+
+        # stations in order of first appearance, valid times sorted
+        station_index = {}
+        for a in cycle_arrays:
+            for station in a.stations:
+                station_index.setdefault(str(station), len(station_index))
+        self.stations = np.array(list(station_index.keys()), dtype=str)
+
+        valid_start, first = np.unique(np.concatenate([a.valid_start for a in cycle_arrays]), return_index=True)
+        self.valid_start = valid_start
+        self.valid_end = np.concatenate([a.valid_end for a in cycle_arrays])[first]
+
+        self.values = np.full((len(cycle_arrays), len(self.stations), len(self.valid_start)), np.nan)
+        for c, a in enumerate(cycle_arrays):
+            rows = np.array([station_index[str(s)] for s in a.stations], dtype=int)
+            columns = np.searchsorted(self.valid_start, a.valid_start)
+            self.values[c][np.ix_(rows, columns)] = a.values
+
+    @classmethod
+    def from_files(cls, paths:list[str])->"ForecastCube":
+        """cube from cycle files of one variable (csv, compressed or binary)"""
+        return cls([read_cycle_array(path) for path in paths])
+
+    def lead_hours(self)->np.ndarray:
+        """hours from each cycle to the start of each valid time, (cycle, valid time)"""
+        return (self.valid_start[np.newaxis, :] - self.cycles[:, np.newaxis]) / np.timedelta64(1, 'h')
+
+    def latest_forecast(self)->np.ndarray:
+        """the value from the most recent cycle with a forecast, (station, valid time)"""
+        has_value = ~np.isnan(self.values)
+        # index of the last cycle with a value, along the cycle axis
+        last = self.values.shape[0] - 1 - np.argmax(has_value[::-1], axis=0)
+        latest = np.take_along_axis(self.values, last[np.newaxis], axis=0)[0]
+        return latest
+
+    def lead_time_statistics(self, reference:np.ndarray=None, bin_hours:int=24)->pd.DataFrame:
+        """bias and spread of the forecast by lead time, over all stations and valid times
+
+        Args:
+            reference (np.ndarray, optional): (station, valid time) values to compare with,
+                e.g. observations aligned to stations and valid_start. Defaults to None,
+                the latest forecast for each station and valid time.
+            bin_hours (int, optional): width of lead time bins in hours. Defaults to 24.
+
+        Returns:
+            pd.DataFrame: count, bias (mean forecast - reference), mae and spread (standard
+                deviation of forecast - reference) indexed by the lead time bin start in hours
+        """
+        if reference is None:
+            reference = self.latest_forecast()
+        errors = self.values - reference[np.newaxis]
+        lead = np.broadcast_to(self.lead_hours()[:, np.newaxis, :], errors.shape)
+
+        keep = ~np.isnan(errors)
+        errors = errors[keep]
+        lead_bin = (np.floor(lead[keep] / bin_hours) * bin_hours).astype(int)
+
+        bins, inverse = np.unique(lead_bin, return_inverse=True)
+        count = np.bincount(inverse, minlength=len(bins))
+        total = np.bincount(inverse, weights=errors, minlength=len(bins))
+        total_abs = np.bincount(inverse, weights=np.abs(errors), minlength=len(bins))
+        total_sq = np.bincount(inverse, weights=errors ** 2, minlength=len(bins))
+        bias = total / count
+        spread = np.sqrt(np.maximum(total_sq / count - bias ** 2, 0.0))
+
+        return pd.DataFrame(
+            {'count': count, 'bias': bias, 'mae': total_abs / count, 'spread': spread},
+            index=pd.Index(bins, name='lead_hours'),
+        )
+
+    def lagged_ensemble_mean(self, k:int=4, as_of:int=None)->np.ndarray:
+        """time-lagged ensemble: the mean of the latest k cycles that forecast each
+        station and valid time
+
+        Args:
+            k (int, optional): number of cycles to average. Defaults to 4.
+            as_of (int, optional): index of the last cycle to use. Defaults to None, the latest.
+
+        Returns:
+            np.ndarray: (station, valid time) means, NaN where no cycle has a forecast
+        """
+        values = self.values if as_of is None else self.values[:as_of + 1]
+        has_value = ~np.isnan(values)
+        # 1 for the latest cycle with a value, 2 for the one before...
+        rank_from_latest = np.cumsum(has_value[::-1], axis=0)[::-1]
+        use = has_value & (rank_from_latest <= k)
+        count = use.sum(axis=0)
+        total = np.where(use, values, 0.0).sum(axis=0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(count > 0, total / count, np.nan)
+
+    def jumps(self)->np.ndarray:
+        """change in the forecast from each cycle to the next, (cycle - 1, station, valid time),
+        NaN where either cycle has no forecast"""
+        return np.diff(self.values, axis=0)
+
+    def largest_jumps(self, n:int=10)->pd.DataFrame:
+        """the n largest cycle to cycle changes in the forecast for a station and valid time
+
+        Args:
+            n (int, optional): number of jumps. Defaults to 10.
+
+        Returns:
+            pd.DataFrame: station, valid_start, from_cycle, to_cycle, from_value, to_value and
+                jump, largest absolute jump first
+        """
+        jumps = self.jumps()
+        magnitude = np.where(np.isnan(jumps), -1.0, np.abs(jumps)).ravel()
+        n = min(n, int((magnitude >= 0).sum()))
+        if n == 0:
+            top = np.array([], dtype=int)
+        else:
+            top = np.argpartition(magnitude, -n)[-n:]
+            top = top[np.argsort(-magnitude[top], kind='stable')]
+
+        c, s, v = np.unravel_index(top, jumps.shape)
+        return pd.DataFrame({
+            'station': self.stations[s],
+            'valid_start': self.valid_start[v],
+            'from_cycle': self.cycles[c],
+            'to_cycle': self.cycles[c + 1],
+            'from_value': self.values[c, s, v],
+            'to_value': self.values[c + 1, s, v],
+            'jump': jumps[c, s, v],
+        })
+
+
+def build_forecast_cube(ndfd_dir:str, variable_type:str, start_date:date, end_date:date)->ForecastCube:
+    """cube of all cycles of a variable for a range of utc cycle dates
+
+    Args:
+        ndfd_dir (str): directory of NDFD_Auto files
+        variable_type (str): NDFD variable type
+        start_date (date): first utc cycle date
+        end_date (date): last utc cycle date, inclusive
+
+    Returns:
+        ForecastCube: cube of the cycles found
+    """
+    paths = enumerate_cycle_files(ndfd_dir, start_date, end_date, [variable_type])
+    if not paths:
+        raise FileNotFoundError(f"no {variable_type} cycle files from {start_date} to {end_date} in {ndfd_dir}")
+    return ForecastCube.from_files(paths)
@@ -0,0 +1,248 @@
+"""agricultural metrics derived from NDFD forecasts for the whole station network at
+once: growing degree days from maxt and mint, accumulated degree days continuing an
+observed season total, and hours of high relative humidity per day from hourly relh
+
+Daily forecast windows are assigned to the local date of the middle of the window,
+so the maxt window (12 to 00 UTC) and the mint window (00 to 13 UTC) of the same
+local day line up.  Metrics work on station x date arrays in the units of the
+forecast files (Celsius), so use bases in Celsius, e.g. 10 rather than 50 F.
+
+example usage:
+
+    from ewxndfd.ewx.ndfd_array import read_cycle_bundle
+    from ewxndfd.ewx.ndfd_metrics import forecast_degree_days, high_rh_hours
+
+    bundle = read_cycle_bundle("/data/ndfd", cycle, variables=["maxt", "mint", "relh"])
+    gdd = forecast_degree_days(bundle, base=10.0, cap=30.0, method="baskerville-emin",
+                               observed_total=season_totals)
+    print(gdd.dates, gdd.values["accumulated_gdd"])
+    wet = high_rh_hours(bundle["relh"], threshold=90.0)
+"""
+
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from . import DEFAULT_TIME_ZONE
+from .ndfd_array import NDFDCycleArray
+from .ndfd_qc import QC_BLANK
+
+GDD_METHODS = ("simple", "baskerville-emin")
+
+
+class DailyGrid(NamedTuple):
+    stations: np.ndarray   # station codes, str
+    dates: np.ndarray      # local dates, datetime64[D], increasing
+    values: dict           # name -> float (stations, dates), NaN where there is no value
+
+
+def local_dates(valid_start:np.ndarray, valid_end:np.ndarray, tz:str=DEFAULT_TIME_ZONE)->np.ndarray:
+    """local date of the middle of each utc valid time window
+
+    Args:
+        valid_start (np.ndarray): utc window starts, datetime64
+        valid_end (np.ndarray): utc window ends, datetime64
+        tz (str, optional): local time zone. Defaults to DEFAULT_TIME_ZONE.
+
+    Returns:
+        np.ndarray: datetime64[D] local dates
+    """
+    middle = valid_start + (valid_end - valid_start) / 2
+    local = pd.DatetimeIndex(middle).tz_localize('UTC').tz_convert(tz).tz_localize(None)
+    return local.normalize().values.astype('datetime64[D]')
+
+
+def align_daily(cycle_arrays:dict, tz:str=DEFAULT_TIME_ZONE)->DailyGrid:
+    """align daily variables (e.g. maxt and mint) by station and local date
+
+    Args:
+        cycle_arrays (dict): variable type -> NDFDCycleArray of a daily variable
+        tz (str, optional): local time zone for dates. Defaults to DEFAULT_TIME_ZONE.
+
+    Returns:
+        DailyGrid: stations of the first array, the union of dates and a value matrix per variable
+
+    Raises:
+        ValueError: a variable has more than one window on a local date (it is not a daily variable)
+    """
+    if not cycle_arrays:
+        raise ValueError("no cycle arrays to align")
+    first = next(iter(cycle_arrays.values()))
+    stations = first.stations
+    station_index = {str(s): i for i, s in enumerate(stations)}
+
+    variable_dates = {}
+    for variable_type, cycle_array in cycle_arrays.items():
+        dates = local_dates(cycle_array.valid_start, cycle_array.valid_end, tz)
+        if len(np.unique(dates)) != len(dates):
+            raise ValueError(f"{variable_type} has more than one forecast window per day, use a daily variable")
+        variable_dates[variable_type] = dates
+    all_dates = np.unique(np.concatenate(list(variable_dates.values())))
+
+    values = {}
+    for variable_type, cycle_array in cycle_arrays.items():
+        matrix = np.full((len(stations), len(all_dates)), np.nan)
+        rows = np.array([station_index.get(str(s), -1) for s in cycle_array.stations], dtype=int)
+        keep = rows >= 0
+        columns = np.searchsorted(all_dates, variable_dates[variable_type])
+        matrix[np.ix_(rows[keep], columns)] = cycle_array.values[keep]
+        values[variable_type] = matrix
+
+    return DailyGrid(stations=stations, dates=all_dates, values=values)
+
+
+def degree_days(tmax:np.ndarray, tmin:np.ndarray, base:float=10.0, cap:float=None,
+                method:str="simple")->np.ndarray:
+    """daily degree days for arrays of maximum and minimum temperature
+
+    Args:
+        tmax (np.ndarray): daily maximum temperatures, any shape
+        tmin (np.ndarray): daily minimum temperatures, same shape
+        base (float, optional): lower threshold. Defaults to 10.0.
+        cap (float, optional): upper threshold (horizontal cutoff). Defaults to None, no cap.
+        method (str, optional): "simple" for the average of tmax and tmin (both capped) minus
+            the base, at least 0, or "baskerville-emin" for the single sine method. Defaults to "simple".
+
+    Returns:
+        np.ndarray: degree days, NaN where either temperature is NaN
+
+    Raises:
+        ValueError: unknown method, or cap not above base
+    """
+    if method not in GDD_METHODS:
+        raise ValueError(f"Invalid degree day method: {method}, use one of {', '.join(GDD_METHODS)}")
+    if cap is not None and cap <= base:
+        raise ValueError(f"cap {cap} must be greater than base {base}")
+
+    tmax = np.asarray(tmax, dtype=float)
+    tmin = np.asarray(tmin, dtype=float)
+    upper = np.inf if cap is None else cap
+
+    if method == "simple":
+        mean = (np.minimum(tmax, upper) + np.minimum(tmin, upper)) / 2
+        return np.maximum(mean - base, 0.0)
+
+    # single sine curve from tmin to tmax, integrated between base and cap.  With the
+    # crossing angles clipped to +-pi/2 one formula covers every case
+    mean = (tmax + tmin) / 2
+    amplitude = (tmax - tmin) / 2
+    with np.errstate(divide='ignore', invalid='ignore'):
+        theta1 = np.arcsin(np.clip((base - mean) / amplitude, -1.0, 1.0))
+        theta2 = np.arcsin(np.clip((upper - mean) / amplitude, -1.0, 1.0)) if cap is not None \
+            else np.full_like(mean, np.pi / 2)
+        capped = 0.0 if cap is None else (upper - base) * (np.pi / 2 - theta2)
+        sine = ((mean - base) * (theta2 - theta1)
+                + amplitude * (np.cos(theta1) - np.cos(theta2))
+                + capped) / np.pi
+    # a flat day (tmax == tmin) has no curve
+    flat = np.clip(mean, None, upper) - base
+    return np.where(amplitude > 0, sine, np.maximum(flat, 0.0))
+
+
+def accumulated_degree_days(daily_degree_days:np.ndarray, observed_total=0.0)->np.ndarray:
+    """running total of daily degree days along the last (date) axis, starting from
+    observed totals up to the first forecast date
+
+    Args:
+        daily_degree_days (np.ndarray): (stations, dates) daily degree days
+        observed_total (float or np.ndarray, optional): total per station, or one total for all
+            stations, before the first date. Defaults to 0.0.
+
+    Returns:
+        np.ndarray: accumulated degree days, NaN from the first NaN day of a station on
+    """
+    daily_degree_days = np.asarray(daily_degree_days, dtype=float)
+    observed_total = np.asarray(observed_total, dtype=float)
+    if observed_total.ndim == 1:
+        observed_total = observed_total[:, np.newaxis]
+    return observed_total + np.cumsum(daily_degree_days, axis=-1)
+
+
+def forecast_degree_days(cycle_arrays:dict, base:float=10.0, cap:float=None, method:str="simple",
+                         observed_total=0.0, tz:str=DEFAULT_TIME_ZONE)->DailyGrid:
+    """daily and accumulated degree days for every station from the maxt and mint of a cycle
+
+    Args:
+        cycle_arrays (dict): variable type -> NDFDCycleArray including maxt and mint,
+            e.g. from ndfd_array.read_cycle_bundle
+        base (float, optional): lower threshold. Defaults to 10.0.
+        cap (float, optional): upper threshold. Defaults to None.
+        method (str, optional): one of GDD_METHODS. Defaults to "simple".
+        observed_total (float or np.ndarray, optional): observed total per station before the
+            first date of the result, in station order of the maxt array. Defaults to 0.0.
+        tz (str, optional): local time zone for dates. Defaults to DEFAULT_TIME_ZONE.
+
+    Returns:
+        DailyGrid: values gdd and accumulated_gdd
+    """
+    missing = {'maxt', 'mint'} - set(cycle_arrays)
+    if missing:
+        raise ValueError(f"degree days need maxt and mint, missing {', '.join(sorted(missing))}")
+    grid = align_daily({'maxt': cycle_arrays['maxt'], 'mint': cycle_arrays['mint']}, tz=tz)
+
+    gdd = degree_days(grid.values['maxt'], grid.values['mint'], base=base, cap=cap, method=method)
+    # dates without both temperatures for any station (e.g. a day already past at the
+    # cycle time) are left out, rather than making every accumulated value NaN
+    keep = ~np.isnan(gdd).all(axis=0)
+    gdd = gdd[:, keep]
+    return DailyGrid(
+        stations=grid.stations,
+        dates=grid.dates[keep],
+        values={'gdd': gdd, 'accumulated_gdd': accumulated_degree_days(gdd, observed_total)},
+    )
+
+
+def high_rh_hours(relh_array:NDFDCycleArray, threshold:float=90.0, max_fill_hours:int=None,
+                  tz:str=DEFAULT_TIME_ZONE)->DailyGrid:
+    """hours per local date with relative humidity at or above a threshold, a proxy for
+    leaf wetness
+
+    Later days of the hourly forecast have values every 3 hours and then every 6 hours,
+    so a value also covers the blank hours after it, up to the next value.  Blank hours
+    after the last value, and hours next to missing or masked values, are not filled.
+
+    Args:
+        relh_array (NDFDCycleArray): hourly relative humidity
+        threshold (float, optional): percent relative humidity. Defaults to 90.0.
+        max_fill_hours (int, optional): at most this many blank hours after a value that it
+            covers. Defaults to None, up to the next value whatever the spacing.
+        tz (str, optional): local time zone for dates. Defaults to DEFAULT_TIME_ZONE.
+
+    Returns:
+        DailyGrid: values high_rh_hours and valid_hours, the hours with a value after filling
+    """
+    values = relh_array.values
+    n_columns = values.shape[1]
+
+    column = np.arange(n_columns)
+    has_value = ~np.isnan(values)
+    blank = np.isnan(values) if relh_array.flags is None else (relh_array.flags & QC_BLANK) != 0
+    # the previous and next column with a value, and with anything but a blank cell
+    last = np.maximum.accumulate(np.where(has_value, column, -1), axis=1)
+    last_cell = np.maximum.accumulate(np.where(~blank, column, -1), axis=1)
+    next_value = np.minimum.accumulate(np.where(has_value, column, n_columns)[:, ::-1], axis=1)[:, ::-1]
+    next_cell = np.minimum.accumulate(np.where(~blank, column, n_columns)[:, ::-1], axis=1)[:, ::-1]
+
+    # carry each value forward over the blank columns up to the next value
+    fill = has_value | (blank & (last >= 0) & (last == last_cell)
+                        & (next_value < n_columns) & (next_value == next_cell))
+    if max_fill_hours is not None:
+        hours = (relh_array.valid_start - relh_array.valid_start[0]) / np.timedelta64(1, 'h')
+        fill &= hours[column] - hours[np.maximum(last, 0)] <= max_fill_hours
+    filled = np.where(fill, np.take_along_axis(values, np.maximum(last, 0), axis=1), np.nan)
+
+    dates, date_index = np.unique(local_dates(relh_array.valid_start, relh_array.valid_start, tz),
+                                  return_inverse=True)
+    # columns x dates indicator, so counts per date are one matrix product
+    by_date = np.zeros((n_columns, len(dates)))
+    by_date[column, date_index] = 1.0
+    with np.errstate(invalid='ignore'):
+        high = (filled >= threshold).astype(float)
+    valid = (~np.isnan(filled)).astype(float)
+
+    return DailyGrid(
+        stations=relh_array.stations,
+        dates=dates,
+        values={'high_rh_hours': high @ by_date, 'valid_hours': valid @ by_date},
+    )
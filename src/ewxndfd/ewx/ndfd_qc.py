@@ -0,0 +1,138 @@
+"""quality control of NDFD_Auto values, run once on the whole value matrix of a
+cycle file as it is read
+
+Each value gets a bitmask of QC flags.  Blank cells and the -9999 missing value are
+always masked (set to NaN), values outside the physical range of the variable are
+masked by default, and daily min/max pairs where the minimum is above the maximum
+are flagged when the variables of a cycle are checked together.
+"""
+
+import numpy as np
+
+from .ewx_ndfd_file import NDFD_MISSING_VALUE
+
+# QC flag bits
+QC_OK = 0
+QC_BLANK = 1           # blank cell, hours without a forecast in hourly files
+QC_MISSING = 2         # the -9999 missing value, periods that ended before the cycle
+QC_OUT_OF_RANGE = 4    # outside QC_RANGES for the variable
+QC_INCONSISTENT = 8    # daily minimum above the daily maximum for the same day
+
+# flags that set the value to NaN unless another mask is given
+QC_DEFAULT_MASK = QC_BLANK | QC_MISSING | QC_OUT_OF_RANGE
+
+# plausible (low, high) values in the units of the NDFD_Auto files
+QC_RANGES = {
+    "maxt": (-60.0, 60.0),  # Celsius
+    "mint": (-60.0, 60.0),
+    "temp": (-60.0, 60.0),
+    # relative humidity is 0-100 but NDFD values can be slightly over 100, e.g. 100.5
+    "relh": (0.0, 101.0),
+    "maxr": (0.0, 101.0),
+    "minr": (0.0, 101.0),
+    "pops": (0.0, 100.0),   # percent
+    "qpf6": (0.0, 100.0),
+    "qpfd": (0.0, 100.0),
+    "wspd": (0.0, 75.0),    # meters/second
+    "wdir": (0.0, 360.0),   # degrees
+}
+
+# (minimum variable, maximum variable) pairs checked for a cycle, matched on the
+# utc date each daily window starts
+QC_MIN_MAX_PAIRS = [
+    ("mint", "maxt"),
+    ("minr", "maxr"),
+]
+
+
+def qc_values(variable_type:str, values:np.ndarray, mask:int=QC_DEFAULT_MASK)->tuple[np.ndarray, np.ndarray]:
+    """flag and mask the values of one cycle file
+
+    Args:
+        variable_type (str): NDFD variable type, for the range check
+        values (np.ndarray): float values as read, NaN for blank cells and the
+            missing value still in place
+        mask (int, optional): flags to set to NaN. Defaults to QC_DEFAULT_MASK.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: (values with masked values NaN, uint8 flags)
+    """
+    blank = np.isnan(values)
+    missing = values == NDFD_MISSING_VALUE
+    low, high = QC_RANGES.get(variable_type, (-np.inf, np.inf))
+    with np.errstate(invalid='ignore'):
+        out_of_range = ~missing & ((values < low) | (values > high))
+
+    flags = (blank * np.uint8(QC_BLANK)
+             | missing * np.uint8(QC_MISSING)
+             | out_of_range * np.uint8(QC_OUT_OF_RANGE)).astype(np.uint8)
+
+    masked_values = np.where((flags & mask) != 0, np.nan, values)
+    # missing is not a value even if not masked
+    masked_values[missing] = np.nan
+    return (masked_values, flags)
+
+
+def check_min_max(min_array, max_array)->tuple[np.ndarray, np.ndarray]:
+    """flag values where the daily minimum is above the daily maximum, matching
+    stations by code and windows by the utc date they start
+
+    Args:
+        min_array (NDFDCycleArray): e.g. mint with flags
+        max_array (NDFDCycleArray): e.g. maxt with flags
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: new flags for min_array and max_array
+    """
+    min_flags = min_array.flags.copy()
+    max_flags = max_array.flags.copy()
+
+    max_rows = {str(s): n for n, s in enumerate(max_array.stations)}
+    pairs = [(n, max_rows[str(s)]) for n, s in enumerate(min_array.stations) if str(s) in max_rows]
+    if not pairs:
+        return (min_flags, max_flags)
+    min_rows, max_rows = (np.array(rows, dtype=int) for rows in zip(*pairs))
+
+    min_days = min_array.valid_start.astype('datetime64[D]')
+    max_days = max_array.valid_start.astype('datetime64[D]')
+    days = np.intersect1d(min_days, max_days)
+    min_columns = np.searchsorted(min_days, days)
+    max_columns = np.searchsorted(max_days, days)
+
+    with np.errstate(invalid='ignore'):
+        inconsistent = (min_array.values[np.ix_(min_rows, min_columns)]
+                        > max_array.values[np.ix_(max_rows, max_columns)])
+    flag = inconsistent * np.uint8(QC_INCONSISTENT)
+    min_flags[np.ix_(min_rows, min_columns)] |= flag
+    max_flags[np.ix_(max_rows, max_columns)] |= flag
+    return (min_flags, max_flags)
+
+
+def qc_cycle_bundle(bundle:dict, qc_mask:int=QC_DEFAULT_MASK)->dict:
+    """run the min/max consistency checks on the variables of one cycle
+
+    Args:
+        bundle (dict): variable type -> NDFDCycleArray with flags, e.g. from read_cycle_bundle
+        qc_mask (int, optional): flags to set to NaN, with QC_INCONSISTENT the values of
+            both variables of an inconsistent pair are masked. Defaults to QC_DEFAULT_MASK.
+
+    Returns:
+        dict: the same bundle with updated flags and values
+    """
+    bundle = dict(bundle)
+    for min_variable, max_variable in QC_MIN_MAX_PAIRS:
+        if min_variable in bundle and max_variable in bundle:
+            min_flags, max_flags = check_min_max(bundle[min_variable], bundle[max_variable])
+            for variable_type, flags in ((min_variable, min_flags), (max_variable, max_flags)):
+                values = np.where((flags & qc_mask) != 0, np.nan, bundle[variable_type].values)
+                bundle[variable_type] = bundle[variable_type]._replace(values=values, flags=flags)
+    return bundle
+
+
+def qc_summary(flags:np.ndarray)->dict:
+    """number of values with each flag"""
+    return {
+        name: int(np.count_nonzero(flags & bit))
+        for name, bit in [("blank", QC_BLANK), ("missing", QC_MISSING),
+                          ("out_of_range", QC_OUT_OF_RANGE), ("inconsistent", QC_INCONSISTENT)]
+    }
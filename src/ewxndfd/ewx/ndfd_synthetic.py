@@ -0,0 +1,259 @@
+"""generate synthetic NDFD forecast csv files in the Enviroweather (NDFD_Auto)
+format, for load testing readers and ETL processes with any number of stations,
+variables and days without access to real NDFD output
+"""
+
+from datetime import datetime, date, timedelta, timezone
+import argparse
+import os
+import string
+
+import numpy as np
+
+from .ewx_ndfd_file import (
+    DAILY_NDFD_VARIABLE_TYPES,
+    HOURLY_NDFD_VARIABLE_TYPES,
+    NDFD_CYCLE_HOURS,
+    NDFD_MISSING_VALUE,
+)
+
+# windows for the non-hourly variables as they appear in NDFD_Auto files:
+# (utc hour the first window starts, window length hours, step hours, number of windows)
+# all windows are anchored to 00Z of the cycle date
+_WINDOW_VARIABLES = {
+    "maxt": (12, 12, 24, 7),
+    "mint": (0, 13, 24, 7),
+    "maxr": (6, 12, 24, 7),
+    "minr": (18, 12, 24, 7),
+    "qpfd": (0, 24, 24, 3),
+    "pops": (0, 12, 12, 14),
+    "qpf6": (0, 6, 6, 12),
+}
+
+# hourly files have 168 columns starting 01Z of the cycle date, but values are
+# thinned out: hourly for 36 hours after the cycle, then 3-hourly until 72 hours
+# after 00Z of the cycle date, then 6-hourly, whatever the cycle hour
+HOURLY_COLUMN_COUNT = 168
+_HOURLY_LEAD_HOURS = 36
+_THREE_HOURLY_UNTIL_HOUR = 72
+
+
+def synthetic_station_codes(n_stations:int)->list[str]:
+    """create n unique lowercase station codes similar to Enviroweather codes
+    (e.g. 'aaa', 'aab'...).  Codes get a fourth letter after 17576 stations
+
+    Args:
+        n_stations (int): number of codes to create
+
+    Returns:
+        list[str]: station codes
+    """
+    letters = string.ascii_lowercase
+    width = 3 if n_stations <= 26 ** 3 else 4
+    codes = []
+    for i in range(n_stations):
+        code = ""
+        for _ in range(width):
+            i, r = divmod(i, 26)
+            code = letters[r] + code
+        codes.append(code)
+    return codes
+
+
+def _column_headers(variable_type:str, cycle_date:date)->tuple[list[str], np.ndarray]:
+    """header labels and the utc hour (from 00Z of the cycle date) each column ends"""
+    if variable_type in HOURLY_NDFD_VARIABLE_TYPES:
+        hours = np.arange(1, HOURLY_COLUMN_COUNT + 1)
+        d0 = datetime.combine(cycle_date, datetime.min.time())
+        labels = [(d0 + timedelta(hours=int(h))).strftime("%Y%m%d%H") for h in hours]
+        return labels, hours
+
+    first, length, step, count = _WINDOW_VARIABLES[variable_type]
+    d0 = datetime.combine(cycle_date, datetime.min.time())
+    labels = []
+    ends = []
+    for n in range(count):
+        start = first + n * step
+        end = start + length
+        labels.append(
+            (d0 + timedelta(hours=start)).strftime("%Y%m%d%H") + "-"
+            + (d0 + timedelta(hours=end)).strftime("%Y%m%d%H")
+        )
+        ends.append(end)
+    return labels, np.array(ends)
+
+
+def _hourly_thinning_mask(hours:np.ndarray, cycle_hour:int)->np.ndarray:
+    """True for columns that have a value in an hourly file for this cycle, hours are
+    from 00Z of the cycle date"""
+    return (
+        (hours - cycle_hour <= _HOURLY_LEAD_HOURS)
+        | ((hours <= _THREE_HOURLY_UNTIL_HOUR) & (hours % 3 == 0))
+        | (hours % 6 == 0)
+    )
+
+
+def _synthetic_values(variable_type:str, hours:np.ndarray, n_stations:int, rng:np.random.Generator)->np.ndarray:
+    """plausible values for a station x column grid, not meteorologically consistent"""
+    n_cols = len(hours)
+    station_offset = rng.normal(0.0, 2.0, size=(n_stations, 1))
+    noise = rng.normal(0.0, 1.0, size=(n_stations, n_cols))
+    # local afternoon is ~20Z in Michigan
+    diurnal = np.cos((hours - 20) / 24.0 * 2 * np.pi)
+
+    if variable_type in ("temp", "maxt", "mint"):
+        values = 4.0 + 6.0 * diurnal + station_offset + noise
+        if variable_type == "maxt":
+            values = values + 4.0
+        elif variable_type == "mint":
+            values = values - 4.0
+    elif variable_type in ("relh", "maxr", "minr"):
+        values = 75.0 - 15.0 * diurnal + 3.0 * station_offset + 4.0 * noise
+        if variable_type == "maxr":
+            values = values + 15.0
+        elif variable_type == "minr":
+            values = values - 15.0
+        values = np.clip(values, 5.0, 100.0)
+    elif variable_type == "wspd":
+        values = np.clip(3.0 + 0.5 * station_offset + noise, 0.0, None)
+    elif variable_type == "wdir":
+        values = np.round(rng.uniform(0, 36, size=(n_stations, n_cols))) * 10
+    elif variable_type == "pops":
+        values = np.round(np.clip(rng.gamma(0.8, 20.0, size=(n_stations, n_cols)), 0, 100))
+    else:
+        # qpf6, qpfd: mostly dry with occasional precipitation
+        wet = rng.random(size=(n_stations, n_cols)) < 0.2
+        values = np.where(wet, rng.gamma(1.0, 0.3, size=(n_stations, n_cols)), 0.0)
+
+    return values
+
+
+def _format_cell(variable_type:str, value:float)->str:
+    if variable_type == "pops":
+        return str(int(value))
+    if variable_type in ("qpf6", "qpfd"):
+        return str(round(float(value), 2))
+    if variable_type == "wdir":
+        return str(int(value)) if value != NDFD_MISSING_VALUE else str(float(NDFD_MISSING_VALUE))
+    return str(round(float(value), 1))
+
+
+def write_synthetic_cycle(out_dir:str, variable_type:str, cycle_utc:datetime, stations:list[str],
+                          missing_fraction:float=0.0, seed:int=None)->str:
+    """write one synthetic NDFD forecast file for a variable and forecast cycle
+
+    Windows or hours that have already ended when the cycle was issued are set
+    to the -9999.0 sentinel, and hourly files have blank cells thinned out the
+    same way as real NDFD_Auto output
+
+    Args:
+        out_dir (str): directory to write to, must exist
+        variable_type (str): one of the daily or hourly NDFD variable types
+        cycle_utc (datetime): cycle datetime, hour must be 0, 6, 12 or 18
+        stations (list[str]): station codes, one row per station
+        missing_fraction (float, optional): fraction of cells randomly replaced with the sentinel. Defaults to 0.0.
+        seed (int, optional): random seed for reproducible output. Defaults to None.
+
+    Raises:
+        ValueError: invalid variable type or cycle hour
+
+    Returns:
+        str: full path to the file written
+    """
+    if variable_type not in DAILY_NDFD_VARIABLE_TYPES | HOURLY_NDFD_VARIABLE_TYPES:
+        raise ValueError(f"Invalid variable type: {variable_type}")
+    if cycle_utc.hour not in NDFD_CYCLE_HOURS:
+        raise ValueError(f"cycle hour must be one of {NDFD_CYCLE_HOURS}: {cycle_utc.hour}")
+
+    rng = np.random.default_rng(seed)
+    labels, hours = _column_headers(variable_type, cycle_utc.date())
+    values = _synthetic_values(variable_type, hours, len(stations), rng)
+
+    past = hours <= cycle_utc.hour
+    values[:, past] = NDFD_MISSING_VALUE
+    if missing_fraction > 0:
+        values[rng.random(size=values.shape) < missing_fraction] = NDFD_MISSING_VALUE
+
+    if variable_type in HOURLY_NDFD_VARIABLE_TYPES:
+        keep = _hourly_thinning_mask(hours, cycle_utc.hour) | past
+    else:
+        keep = np.ones(len(hours), dtype=bool)
+
+    filename = f"{variable_type}_{cycle_utc.strftime('%Y%m%d')}t{cycle_utc.hour:02d}.csv"
+    file_path = os.path.join(out_dir, filename)
+
+    # NDFD_Auto writes ", " separated fields with windows line endings
+    with open(file_path, "w", newline="") as f:
+        f.write(", ".join(["station"] + labels) + "\r\n")
+        for station, row in zip(stations, values):
+            cells = [
+                (_format_cell(variable_type, v) if k else "")
+                for v, k in zip(row, keep)
+            ]
+            f.write(", ".join([station] + cells) + "\r\n")
+
+    return file_path
+
+
+def write_synthetic_cycles(out_dir:str, start_date:date, n_days:int=1, variables:list[str]=None,
+                           n_stations:int=90, missing_fraction:float=0.0, seed:int=0)->list[str]:
+    """write every cycle (00, 06, 12, 18 Z) for each day and variable
+
+    Args:
+        out_dir (str): directory to write to, created if needed
+        start_date (date): first cycle date
+        n_days (int, optional): number of days of cycles. Defaults to 1.
+        variables (list[str], optional): variable types. Defaults to all daily and hourly types.
+        n_stations (int, optional): number of stations per file. Defaults to 90.
+        missing_fraction (float, optional): fraction of random sentinel cells. Defaults to 0.0.
+        seed (int, optional): base random seed. Defaults to 0.
+
+    Returns:
+        list[str]: paths of the files written, in cycle then variable order
+    """
+    if variables is None:
+        variables = sorted(DAILY_NDFD_VARIABLE_TYPES | HOURLY_NDFD_VARIABLE_TYPES)
+
+    os.makedirs(out_dir, exist_ok=True)
+    stations = synthetic_station_codes(n_stations)
+
+    paths = []
+    for day in range(n_days):
+        cycle_date = start_date + timedelta(days=day)
+        for hour in NDFD_CYCLE_HOURS:
+            cycle_utc = datetime(cycle_date.year, cycle_date.month, cycle_date.day, hour, tzinfo=timezone.utc)
+            for i, variable_type in enumerate(variables):
+                # distinct but reproducible random stream per file
+                file_seed = None if seed is None else seed + day * 1000 + hour * 10 + i
+                paths.append(write_synthetic_cycle(out_dir, variable_type, cycle_utc, stations,
+                                                   missing_fraction=missing_fraction, seed=file_seed))
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        prog="ndfd_synthetic",
+        description="""Write synthetic NDFD forecast csv files in the Enviroweather
+        NDFD_Auto format for testing.  For example:
+        ndfd_synthetic /tmp/ndfd --start 2025-11-19 --days 2 --stations 5000"""
+    )
+    parser.add_argument("out_dir", help="directory to write files to")
+    parser.add_argument("--start", type=date.fromisoformat, default=date.today(),
+                        help="first cycle date YYYY-MM-DD, defaults to today")
+    parser.add_argument("--days", type=int, default=1, help="number of days of cycles")
+    parser.add_argument("--stations", type=int, default=90, help="number of stations")
+    parser.add_argument("--variables", nargs="+", default=None,
+                        help="variable types to write, defaults to all")
+    parser.add_argument("--missing-fraction", dest="missing_fraction", type=float, default=0.0,
+                        help="fraction of cells randomly set to -9999.0")
+    parser.add_argument("--seed", type=int, default=0, help="random seed")
+    args = parser.parse_args()
+
+    paths = write_synthetic_cycles(args.out_dir, args.start, n_days=args.days, variables=args.variables,
+                                   n_stations=args.stations, missing_fraction=args.missing_fraction,
+                                   seed=args.seed)
+    print(f"wrote {len(paths)} files to {args.out_dir}")
+
+
+if __name__ == "__main__":
+    main()
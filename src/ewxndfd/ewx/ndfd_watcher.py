@@ -0,0 +1,398 @@
+"""watch an NDFD_Auto directory and call handlers as soon as every variable of a
+new forecast cycle has been completely written, instead of guessing the current
+cycle from the clock
+
+On Linux the directory is watched with inotify (through ctypes, no extra package).
+A file is complete when it is closed after writing or renamed into place; files that
+only appear in a directory listing (other platforms, network file systems) are
+complete once their size and modification time stop changing for stable_seconds.
+
+example usage:
+
+    from ewxndfd.ewx.ndfd_watcher import NDFDCycleWatcher
+
+    watcher = NDFDCycleWatcher("/data/ndfd", variables=["mint", "maxt"])
+
+    @watcher.on_cycle
+    def ingest(cycle_bundle):
+        print(cycle_bundle.cycle, cycle_bundle.arrays["mint"].values.shape)
+
+    with watcher:
+        watcher.run()
+"""
+
+from datetime import datetime, timezone
+from typing import NamedTuple
+import argparse
+import ctypes
+import ctypes.util
+import os
+import re
+import select
+import struct
+import sys
+import threading
+import time
+
+from .ewx_ndfd_file import NDFD_VARIABLE_TYPES
+from .ndfd_array import read_cycle_array
+from .ndfd_qc import QC_DEFAULT_MASK, qc_cycle_bundle
+
+# cycle file names, plain or compressed, but not temporary files
+CYCLE_FILE_PATTERN = re.compile(r"^(?P<variable>[a-z0-9]+)_(?P<cycle>\d{8}t\d{2})\.csv(\.gz|\.zst)?$")
+
+# inotify constants from <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+_INOTIFY_EVENT = struct.Struct("iIII")
+
+
+class CycleBundle(NamedTuple):
+    cycle: datetime   # utc cycle time
+    paths: dict       # variable type -> file path
+    arrays: dict      # variable type -> NDFDCycleArray, QC checked together
+
+
+class _Inotify():
+    """minimal inotify watch of one directory through libc"""
+
+    def __init__(self, path:str):
+        libc_name = ctypes.util.find_library("c") or "libc.so.6"
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        self.fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        mask = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_MODIFY
+        if self._libc.inotify_add_watch(self.fd, os.fsencode(path), mask) < 0:
+            errno = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(errno, f"inotify_add_watch failed for {path}")
+
+    def read(self, timeout:float, wake_fd:int=None)->list[tuple[str, int]]:
+        """(file name, event mask) of events within timeout seconds, or until wake_fd is readable"""
+        fds = [self.fd] if wake_fd is None else [self.fd, wake_fd]
+        ready, _, _ = select.select(fds, [], [], timeout)
+        if self.fd not in ready:
+            return []
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+
+        events = []
+        offset = 0
+        while offset + _INOTIFY_EVENT.size <= len(data):
+            _, mask, _, name_length = _INOTIFY_EVENT.unpack_from(data, offset)
+            offset += _INOTIFY_EVENT.size
+            name = data[offset:offset + name_length].rstrip(b"\0").decode(errors="replace")
+            offset += name_length
+            events.append((name, mask))
+        return events
+
+    def close(self):
+        os.close(self.fd)
+
+
+def inotify_available()->bool:
+    """True if inotify can be used on this system"""
+    if not sys.platform.startswith("linux"):
+        return False
+    libc_name = ctypes.util.find_library("c") or "libc.so.6"
+    try:
+        return hasattr(ctypes.CDLL(libc_name), "inotify_init1")
+    except OSError:
+        return False
+
+
+class NDFDCycleWatcher():
+    """detect complete forecast cycles in an NDFD_Auto directory and pass them to handlers"""
+
+    def __init__(self, ndfd_dir:str, variables:list[str]=None, poll_interval:float=5.0,
+                 stable_seconds:float=2.0, use_inotify:bool=True, process_existing:bool=False,
+                 qc_mask:int=QC_DEFAULT_MASK):
+        """configure the watcher, which starts with run() or start().  Call close(), or use
+        the watcher as a context manager, to release its file descriptors
+
+        Args:
+            ndfd_dir (str): directory NDFD_Auto writes cycle files to
+            variables (list[str], optional): variables that make a complete cycle. Defaults to all.
+            poll_interval (float, optional): seconds between directory scans without inotify. Defaults to 5.0.
+            stable_seconds (float, optional): seconds a file's size must not change to be complete,
+                when it was not seen being closed or renamed. Defaults to 2.0.
+            use_inotify (bool, optional): use inotify if available. Defaults to True.
+            process_existing (bool, optional): also pass cycles already complete when watching
+                starts. Defaults to False, cycles with files modified within stable_seconds are
+                still passed once they are complete.
+            qc_mask (int, optional): QC flags set to NaN when reading. Defaults to QC_DEFAULT_MASK.
+        """
+        if not os.path.isdir(ndfd_dir):
+            raise ValueError(f"NDFD directory does not exist: {ndfd_dir}")
+        self.ndfd_dir = ndfd_dir
+        self.variables = sorted(NDFD_VARIABLE_TYPES) if variables is None else list(variables)
+        self.poll_interval = poll_interval
+        self.stable_seconds = stable_seconds
+        self.use_inotify = use_inotify and inotify_available()
+        self.qc_mask = qc_mask
+
+        self.handlers = []
+        self.dispatched = set()
+        # file name -> (size, mtime, monotonic time first seen with that size and mtime)
+        self._file_states = {}
+        # file names closed after writing or renamed into place, with their size then
+        self._closed = {}
+        # cycle -> (file name, size, mtime) of each file when it failed to read, retried when they change
+        self._failed = {}
+        self._stop = threading.Event()
+        self._watching = threading.Event()
+        # stop() writes to this pipe to wake a watcher waiting for inotify events
+        self._wake_read, self._wake_write = os.pipe()
+        os.set_blocking(self._wake_read, False)
+        self._thread = None
+
+        if not process_existing:
+            self.dispatched.update(self._cycles_present())
+
+    def add_handler(self, handler):
+        """register a function called with a CycleBundle for each complete cycle"""
+        self.handlers.append(handler)
+        return handler
+
+    # decorator form of add_handler
+    on_cycle = add_handler
+
+    def _cycles_present(self)->set:
+        """cycles that have a file for every variable, each unmodified for stable_seconds"""
+        now = time.time()
+        cycles = {}
+        for name in os.listdir(self.ndfd_dir):
+            match = CYCLE_FILE_PATTERN.match(name)
+            if not match or match['variable'] not in self.variables:
+                continue
+            try:
+                stat = os.stat(os.path.join(self.ndfd_dir, name))
+            except FileNotFoundError:
+                continue
+            if stat.st_size > 0 and now - stat.st_mtime >= self.stable_seconds:
+                cycles.setdefault(match['cycle'], set()).add(match['variable'])
+        return {cycle for cycle, variables in cycles.items() if len(variables) == len(self.variables)}
+
+    def _file_signature(self, files:dict)->tuple:
+        """(file name, size, mtime) of each file of a cycle, to tell when they change"""
+        signature = []
+        for name in sorted(files.values()):
+            try:
+                stat = os.stat(os.path.join(self.ndfd_dir, name))
+            except FileNotFoundError:
+                return None
+            signature.append((name, stat.st_size, stat.st_mtime_ns))
+        return tuple(signature)
+
+    def _is_complete(self, name:str, now:float)->bool:
+        try:
+            stat = os.stat(os.path.join(self.ndfd_dir, name))
+        except FileNotFoundError:
+            self._file_states.pop(name, None)
+            return False
+
+        if self._closed.get(name) == stat.st_size:
+            return True
+
+        state = (stat.st_size, stat.st_mtime_ns)
+        previous = self._file_states.get(name)
+        if previous is None or previous[:2] != state:
+            self._file_states[name] = state + (now,)
+            return self.stable_seconds <= 0 and stat.st_size > 0
+        return stat.st_size > 0 and now - previous[2] >= self.stable_seconds
+
+    def scan(self)->list[CycleBundle]:
+        """check the directory for cycles that are newly complete and pass each to the
+        handlers, oldest cycle first
+
+        Returns:
+            list[CycleBundle]: cycles passed to the handlers
+        """
+        now = time.monotonic()
+        cycle_files = {}
+        for name in os.listdir(self.ndfd_dir):
+            match = CYCLE_FILE_PATTERN.match(name)
+            if not match or match['variable'] not in self.variables or match['cycle'] in self.dispatched:
+                continue
+            # plain csv is preferred over a compressed copy, as in find_ndfd_file
+            files = cycle_files.setdefault(match['cycle'], {})
+            if match['variable'] not in files or name.endswith('.csv'):
+                files[match['variable']] = name
+
+        bundles = []
+        for cycle in sorted(cycle_files):
+            files = cycle_files[cycle]
+            if len(files) < len(self.variables):
+                continue
+            # a cycle that failed to read is only read again once its files change
+            signature = self._file_signature(files)
+            if cycle in self._failed and self._failed[cycle] == signature:
+                continue
+            # check every file so their states are all updated
+            complete = [self._is_complete(name, now) for name in files.values()]
+            if not all(complete):
+                continue
+
+            paths = {variable: os.path.join(self.ndfd_dir, name) for variable, name in files.items()}
+            try:
+                arrays = qc_cycle_bundle({variable: read_cycle_array(path, qc_mask=self.qc_mask)
+                                          for variable, path in paths.items()}, qc_mask=self.qc_mask)
+            except Exception as e:
+                print(f"Error reading NDFD cycle {cycle}: {e}", file=sys.stderr)
+                self._failed[cycle] = signature
+                for name in files.values():
+                    self._file_states.pop(name, None)
+                    self._closed.pop(name, None)
+                continue
+
+            self.dispatched.add(cycle)
+            self._failed.pop(cycle, None)
+            for name in files.values():
+                self._file_states.pop(name, None)
+                self._closed.pop(name, None)
+
+            bundle = CycleBundle(
+                cycle=datetime.strptime(cycle, "%Y%m%dt%H").replace(tzinfo=timezone.utc),
+                paths=paths,
+                arrays=arrays,
+            )
+            for handler in self.handlers:
+                try:
+                    handler(bundle)
+                except Exception as e:
+                    print(f"Error in NDFD cycle handler {handler} for {cycle}: {e}", file=sys.stderr)
+            bundles.append(bundle)
+        return bundles
+
+    def _record_events(self, events:list[tuple[str, int]]):
+        for name, mask in events:
+            if mask & (IN_CLOSE_WRITE | IN_MOVED_TO) and CYCLE_FILE_PATTERN.match(name):
+                try:
+                    self._closed[name] = os.stat(os.path.join(self.ndfd_dir, name)).st_size
+                except FileNotFoundError:
+                    pass
+
+    def run(self, timeout:float=None):
+        """watch until stop() is called, or for timeout seconds
+
+        Args:
+            timeout (float, optional): seconds to watch. Defaults to None, until stopped.
+        """
+        if self._wake_read is None:
+            raise ValueError("the NDFD cycle watcher is closed")
+        end = None if timeout is None else time.monotonic() + timeout
+        try:
+            os.read(self._wake_read, 1024)
+        except BlockingIOError:
+            pass
+        inotify = _Inotify(self.ndfd_dir) if self.use_inotify else None
+        self._watching.set()
+        try:
+            self.scan()
+            while not self._stop.is_set():
+                wait = self.poll_interval
+                if self._file_states:
+                    # files waiting to become stable
+                    wait = min(wait, max(self.stable_seconds / 2, 0.05))
+                if end is not None:
+                    remaining = end - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    wait = min(wait, remaining)
+
+                if inotify is not None:
+                    self._record_events(inotify.read(wait, wake_fd=self._wake_read))
+                else:
+                    self._stop.wait(wait)
+                self.scan()
+        finally:
+            self._watching.clear()
+            if inotify is not None:
+                inotify.close()
+
+    def start(self)->threading.Thread:
+        """run the watcher in a background thread, returning once it is watching"""
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run, name="ndfd-cycle-watcher", daemon=True)
+        self._thread.start()
+        self._watching.wait()
+        return self._thread
+
+    def stop(self):
+        """stop a running watcher"""
+        self._stop.set()
+        if self._wake_write is not None:
+            os.write(self._wake_write, b"\0")
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def close(self):
+        """stop the watcher if it is running and close the wake pipe.  The inotify
+        watch is closed when run() returns"""
+        self.stop()
+        for fd in (self._wake_read, self._wake_write):
+            if fd is not None:
+                os.close(fd)
+        self._wake_read = self._wake_write = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        prog="ndfd_watch",
+        description="""Watch an NDFD_Auto directory and report each forecast cycle as soon as
+        all of its files are written, optionally adding its rows to a csv, parquet or sqlite sink.
+        For example:  ndfd_watch /data/ndfd --variables mint maxt --sink live.sqlite"""
+    )
+    parser.add_argument("ndfd_dir", help="directory of NDFD csv files")
+    parser.add_argument("--variables", nargs="+", default=None, help="variables of a complete cycle, defaults to all")
+    parser.add_argument("--sink", default=None, help="output .csv, .parquet (directory) or .sqlite path")
+    parser.add_argument("--poll-interval", dest="poll_interval", type=float, default=5.0,
+                        help="seconds between scans when inotify is not available")
+    parser.add_argument("--stable-seconds", dest="stable_seconds", type=float, default=2.0,
+                        help="seconds a file must not change to be complete")
+    parser.add_argument("--process-existing", dest="process_existing", action="store_true",
+                        help="also process cycles already in the directory")
+    args = parser.parse_args()
+
+    watcher = NDFDCycleWatcher(args.ndfd_dir, variables=args.variables, poll_interval=args.poll_interval,
+                               stable_seconds=args.stable_seconds, process_existing=args.process_existing)
+
+    sink = None
+    if args.sink is not None:
+        from .ndfd_backfill import chunk_part_name, cycle_file_rows, sink_for_path
+        sink = sink_for_path(args.sink)
+
+    @watcher.on_cycle
+    def report(cycle_bundle):
+        if sink is not None:
+            for path in cycle_bundle.paths.values():
+                sink.write(cycle_file_rows(path), chunk_part_name(path, watcher.variables))
+        print(f"{cycle_bundle.cycle.isoformat()} {' '.join(sorted(cycle_bundle.paths))}", flush=True)
+
+    try:
+        watcher.run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
+        if sink is not None:
+            sink.close()
+
+
+if __name__ == "__main__":
+    main()
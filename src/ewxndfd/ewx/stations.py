@@ -0,0 +1,182 @@
+"""station metadata for the Enviroweather stations that key the rows of NDFD_Auto
+csv files, with a spatial index to answer nearest station and within-radius
+questions from local files instead of requesting a forecast for a coordinate
+"""
+
+from typing import NamedTuple
+import csv
+import math
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0
+
+
+class Station(NamedTuple):
+    station: str
+    name: str
+    latitude: float
+    longitude: float
+    elevation: float
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """great circle distance in km, vectorized over numpy arrays"""
+    lat1, lon1, lat2, lon2 = (np.radians(v) for v in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+
+class StationRegistry():
+    """station codes, names, coordinates and elevation, indexed on a regular
+    lat/lon grid of buckets for nearest and radius queries
+    """
+
+    def __init__(self, stations:list[Station], bucket_degrees:float=0.5):
+        """create registry and spatial index
+
+        Args:
+            stations (list[Station]): stations, codes must be unique
+            bucket_degrees (float, optional): size of the spatial index buckets. Defaults to 0.5.
+
+        Raises:
+            ValueError: duplicate station codes
+        """
+        self.stations = list(stations)
+        self._by_code = {s.station: s for s in self.stations}
+        if len(self._by_code) != len(self.stations):
+            raise ValueError("station codes must be unique")
+
+        self.bucket_degrees = bucket_degrees
+        self._lat = np.array([s.latitude for s in self.stations], dtype=float)
+        self._lon = np.array([s.longitude for s in self.stations], dtype=float)
+
+        buckets = {}
+        for n, key in enumerate(zip(self._bucket(self._lat), self._bucket(self._lon))):
+            buckets.setdefault((int(key[0]), int(key[1])), []).append(n)
+        self._buckets = {k: np.array(v) for k, v in buckets.items()}
+
+    @classmethod
+    def from_csv(cls, file_path:str, **kwargs)->"StationRegistry":
+        """load stations from a csv file with a header row of
+        station, name, latitude, longitude, elevation
+
+        Args:
+            file_path (str): path to station csv file
+
+        Returns:
+            StationRegistry: registry of the stations in the file
+        """
+        with open(file_path, 'r', newline='') as f:
+            reader = csv.DictReader(f, skipinitialspace=True)
+            stations = [
+                Station(
+                    station=row['station'].strip(),
+                    name=row['name'].strip(),
+                    latitude=float(row['latitude']),
+                    longitude=float(row['longitude']),
+                    elevation=float(row['elevation']) if row.get('elevation', '').strip() else math.nan,
+                )
+                for row in reader
+            ]
+        return cls(stations, **kwargs)
+
+    def __len__(self)->int:
+        return len(self.stations)
+
+    def __contains__(self, code:str)->bool:
+        return code in self._by_code
+
+    def get(self, code:str)->Station:
+        """station for a code, or None"""
+        return self._by_code.get(code)
+
+    def _bucket(self, degrees):
+        return np.floor(np.asarray(degrees) / self.bucket_degrees).astype(int)
+
+    def _candidates(self, lat:float, lon:float, ring:int)->list:
+        """station indices in the buckets at exactly `ring` buckets from the point"""
+        b_lat, b_lon = int(self._bucket(lat)), int(self._bucket(lon))
+        found = []
+        for d_lat in range(-ring, ring + 1):
+            for d_lon in range(-ring, ring + 1):
+                if max(abs(d_lat), abs(d_lon)) != ring:
+                    continue
+                bucket = self._buckets.get((b_lat + d_lat, b_lon + d_lon))
+                if bucket is not None:
+                    found.append(bucket)
+        return found
+
+    def within_radius(self, lat:float, lon:float, radius_km:float)->list[tuple[Station, float]]:
+        """stations within a distance of a point
+
+        Args:
+            lat (float): latitude in decimal degrees
+            lon (float): longitude in decimal degrees
+            radius_km (float): search radius in km
+
+        Returns:
+            list[tuple[Station, float]]: (station, distance km) closest first
+        """
+        # buckets that can hold stations within the radius, longitude buckets
+        # shrink towards the poles
+        lat_degrees = radius_km / 111.19
+        cos_lat = max(math.cos(math.radians(min(89.0, abs(lat) + lat_degrees))), 1e-6)
+        rings = int(math.ceil(max(lat_degrees, lat_degrees / cos_lat) / self.bucket_degrees))
+
+        buckets = []
+        for ring in range(rings + 1):
+            buckets.extend(self._candidates(lat, lon, ring))
+        if not buckets:
+            return []
+
+        idx = np.concatenate(buckets)
+        distance = haversine_km(lat, lon, self._lat[idx], self._lon[idx])
+        keep = distance <= radius_km
+        idx, distance = idx[keep], distance[keep]
+        order = np.argsort(distance, kind='stable')
+        return [(self.stations[i], float(d)) for i, d in zip(idx[order], distance[order])]
+
+    def nearest(self, lat:float, lon:float, k:int=1, max_distance_km:float=None)->list[tuple[Station, float]]:
+        """the k stations closest to a point, searching outward one ring of
+        buckets at a time until no unsearched bucket can hold a closer station
+
+        Args:
+            lat (float): latitude in decimal degrees
+            lon (float): longitude in decimal degrees
+            k (int, optional): number of stations. Defaults to 1.
+            max_distance_km (float, optional): ignore stations farther than this. Defaults to None.
+
+        Returns:
+            list[tuple[Station, float]]: up to k (station, distance km), closest first
+        """
+        if not self.stations:
+            return []
+
+        max_ring = int(max(
+            np.abs(self._bucket(self._lat) - self._bucket(lat)).max(),
+            np.abs(self._bucket(self._lon) - self._bucket(lon)).max(),
+        ))
+
+        buckets = []
+        for ring in range(max_ring + 1):
+            buckets.extend(self._candidates(lat, lon, ring))
+            if not buckets:
+                continue
+            idx = np.concatenate(buckets)
+            distance = haversine_km(lat, lon, self._lat[idx], self._lon[idx])
+            if len(idx) >= k:
+                # closest any station beyond this ring can be
+                edge_degrees = ring * self.bucket_degrees
+                cos_lat = math.cos(math.radians(min(89.0, abs(lat) + edge_degrees)))
+                bound_km = edge_degrees * 111.19 * cos_lat
+                if np.partition(distance, k - 1)[k - 1] <= bound_km:
+                    break
+
+        idx = np.concatenate(buckets)
+        distance = haversine_km(lat, lon, self._lat[idx], self._lon[idx])
+        order = np.argsort(distance, kind='stable')[:k]
+        result = [(self.stations[i], float(d)) for i, d in zip(idx[order], distance[order])]
+        if max_distance_km is not None:
+            result = [(s, d) for s, d in result if d <= max_distance_km]
+        return result
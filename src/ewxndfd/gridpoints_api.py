@@ -0,0 +1,254 @@
+"""methods to get raw gridpoint forecast data from the api.weather.gov JSON API
+and summarize by day into the same table as ndfd_forecast_api.daily_forecast_summary
+
+The gridpoint data is a set of layers (temperature, relativeHumidity...) each with
+a list of values that hold for an ISO-8601 interval, for example
+{"validTime": "2025-12-08T19:00:00+00:00/PT3H", "value": 91}.  Each layer's
+intervals are expanded into an hourly series with numpy in a single pass.
+"""
+
+import requests
+import numpy as np
+import pandas as pd
+
+from . import instrumentation
+from .ndfd_forecast_api import (
+    DEFAULT_USER_AGENT,
+    add_summary_location_columns,
+    check_summary_format,
+    expand_intervals_hourly,
+    merge_observed_hourly_weather,
+    summarize_metric_frames,
+    summary_to_format,
+)
+
+API_WEATHER_GOV_URL = "https://api.weather.gov"
+
+# ISO-8601 duration as used in validTime, e.g. PT3H, P1D, P7DT9H
+_DURATION_PATTERN = r"P(?:(?P<days>\d+)D)?(?:T(?:(?P<hours>\d+)H)?(?:(?P<minutes>\d+)M)?)?"
+
+# convert gridpoint units to the metric units of the NDFD XML service
+_UNIT_CONVERSIONS = {
+    "wmoUnit:degC": lambda v: v,
+    "wmoUnit:degF": lambda v: (v - 32.0) * 5.0 / 9.0,
+    "wmoUnit:percent": lambda v: v,
+    "wmoUnit:mm": lambda v: v / 10.0,  # to centimeters
+    "wmoUnit:km_h-1": lambda v: v / 3.6,  # to meters/second
+}
+
+
+def request_gridpoint_forecast(lat, lon, user_agent = DEFAULT_USER_AGENT, base_url = API_WEATHER_GOV_URL):
+    """get raw gridpoint forecast data for a coordinate from api.weather.gov, which
+    requires two requests: the points endpoint to find the grid and time zone, then
+    the grid data
+
+    Args:
+        lat (float): latitude in decimal degrees
+        lon (float): longitude in decimal degrees
+        user_agent (str, optional): User-Agent header, required by api.weather.gov
+        base_url (str, optional): API url, change for a mirror or mock server
+
+    Raises:
+        ValueError: either request did not succeed
+
+    Returns:
+        tuple: (gridpoint data dict, IANA time zone name of the point)
+    """
+    headers = {"User-Agent": user_agent, "Accept": "application/geo+json"}
+
+    with instrumentation.span("request_gridpoints"):
+        points_response = requests.get(f"{base_url}/points/{lat},{lon}", headers=headers)
+        if points_response.status_code != 200:
+            raise ValueError(f"Error retrieving api.weather.gov point {lat},{lon}: {points_response.text}")
+        point_properties = points_response.json()['properties']
+
+        grid_response = requests.get(point_properties['forecastGridData'], headers=headers)
+        if grid_response.status_code != 200:
+            raise ValueError(f"Error retrieving api.weather.gov grid data for {lat},{lon}: {grid_response.text}")
+
+    instrumentation.count("bytes_downloaded", len(points_response.content) + len(grid_response.content))
+    return (grid_response.json(), point_properties['timeZone'])
+
+
+def split_valid_times(valid_times)->tuple[pd.DatetimeIndex, np.ndarray]:
+    """split ISO-8601 'start/duration' interval strings into start times and
+    whole-hour durations
+
+    Args:
+        valid_times (list-like): strings like '2025-12-08T19:00:00+00:00/PT3H'
+
+    Returns:
+        tuple: (utc start times, duration in hours as int array)
+    """
+    valid_times = pd.Series(valid_times, dtype="string")
+    parts = valid_times.str.split("/", n=1, expand=True)
+    starts = pd.DatetimeIndex(pd.to_datetime(parts[0], utc=True))
+
+    duration = parts[1].str.extract(_DURATION_PATTERN).fillna("0").astype(int)
+    minutes = duration["days"] * 1440 + duration["hours"] * 60 + duration["minutes"]
+    # partial hours count as a whole hour
+    hours = np.ceil(minutes.to_numpy() / 60.0).astype(int)
+    return (starts, hours)
+
+
+def expand_valid_times(layer_values:list[dict], accumulated:bool=False)->pd.DataFrame:
+    """expand a gridpoint layer's list of interval values to hourly values, see
+    ndfd_forecast_api.expand_intervals_hourly
+
+    Args:
+        layer_values (list[dict]): the layer 'values' list of {'validTime':..., 'value':...}
+        accumulated (bool, optional): the value is a total for the interval (e.g.
+            precipitation) and is split evenly across its hours. Defaults to False.
+
+    Returns:
+        pd.DataFrame: columns forecast_time (utc, hourly) and value
+    """
+    with instrumentation.span("expand_valid_times"):
+        if not layer_values:
+            return pd.DataFrame({'forecast_time': pd.DatetimeIndex([], tz="UTC"), 'value': np.array([], dtype=float)})
+
+        starts, hours = split_valid_times([v['validTime'] for v in layer_values])
+        values = np.array([v['value'] for v in layer_values], dtype=float)  # null -> nan
+        forecast_time, values = expand_intervals_hourly(starts.tz_localize(None).to_numpy(), hours, values,
+                                                        accumulated=accumulated)
+        df = pd.DataFrame({
+            'forecast_time': pd.DatetimeIndex(forecast_time, tz="UTC"),
+            'value': values,
+        })
+
+    instrumentation.count("rows_parsed", len(df))
+    return df
+
+
+def _layer_values(grid_properties:dict, layer_name:str)->tuple[list, callable]:
+    layer = grid_properties.get(layer_name)
+    if layer is None:
+        raise ValueError(f"The layer {layer_name} not found in gridpoint forecast data.")
+    convert = _UNIT_CONVERSIONS.get(layer.get('uom'), lambda v: v)
+    return (layer['values'], convert)
+
+
+def _local_time_strings(utc_times:pd.Series, time_zone:str)->pd.Series:
+    """utc times as ISO-8601 local time strings with the utc offset, like the DWML
+    forecast times, e.g. 2025-12-08T14:00:00-05:00"""
+    local = pd.Series(utc_times).dt.tz_convert(time_zone).dt.strftime('%Y-%m-%dT%H:%M:%S%z')
+    return local.str.slice(0, -2) + ':' + local.str.slice(-2)
+
+
+def _metric_frame(utc_times, values, time_zone:str)->pd.DataFrame:
+    forecast_time = _local_time_strings(pd.Series(utc_times), time_zone)
+    return pd.DataFrame({
+        'forecast_time': forecast_time.to_numpy(),
+        'value': np.asarray(values, dtype=float),
+        'forecast_date': pd.to_datetime(forecast_time.str.slice(0, 10), format='%Y-%m-%d').dt.date.to_numpy(),
+    })
+
+
+def gridpoint_metric_frames(grid_data:dict, time_zone:str)->list:
+    """values of each ndfd_forecast_api.DAILY_SUMMARY_METRICS metric from gridpoint data,
+    in the same form as ndfd_forecast_api.xml_metric_frames so the summary and the merge
+    with observed weather are shared with the DWML source
+
+    Args:
+        grid_data (dict): gridpoint JSON from api.weather.gov /gridpoints/{wfo}/{x},{y}
+        time_zone (str): IANA time zone used to assign hours to local dates
+
+    Returns:
+        list: (metric name with units, DataFrame of forecast_time, value and forecast_date) per metric
+    """
+    grid_properties = grid_data['properties']
+    metric_frames = []
+
+    # hourly humidity and precipitation, precipitation totals are split over their hours
+    for layer_name, metric_name, accumulated in [
+        ('relativeHumidity', 'Relative Humidity (percent)', False),
+        ('quantitativePrecipitation', 'Liquid Precipitation Amount (centimeters)', True),
+    ]:
+        values, convert = _layer_values(grid_properties, layer_name)
+        metric_df = expand_valid_times(values, accumulated=accumulated)
+        metric_frames.append(
+            (metric_name, _metric_frame(metric_df['forecast_time'], convert(metric_df['value']), time_zone))
+        )
+
+    # max/min temperatures are already daily values for a day or night period,
+    # use the local date the period starts as in the XML summary
+    for layer_name, metric_name in [
+        ('minTemperature', 'Daily Minimum Temperature (Celsius)'),
+        ('maxTemperature', 'Daily Maximum Temperature (Celsius)'),
+    ]:
+        values, convert = _layer_values(grid_properties, layer_name)
+        starts, _ = split_valid_times([v['validTime'] for v in values])
+        temperature = convert(pd.Series([v['value'] for v in values], dtype=float))
+        metric_frames.append((metric_name, _metric_frame(starts, temperature, time_zone)))
+
+    return metric_frames
+
+
+def gridpoint_daily_summary(grid_data:dict, time_zone:str)->pd.DataFrame:
+    """summarize raw gridpoint data by local day, with the same columns and units as
+    the NDFD XML daily summary
+
+    Args:
+        grid_data (dict): gridpoint JSON from api.weather.gov /gridpoints/{wfo}/{x},{y}
+        time_zone (str): IANA time zone used to assign hours to local dates
+
+    Returns:
+        pd.DataFrame: daily summary indexed by forecast_date
+    """
+    return summarize_metric_frames(gridpoint_metric_frames(grid_data, time_zone)).sort_index()
+
+
+def gridpoint_observed_daily_summary(grid_data:dict, time_zone:str, hourly_weather:pd.DataFrame,
+                                     location_name:str=None)->pd.DataFrame:
+    """daily summary of gridpoint data combined with observed hourly weather for the
+    same location, like the DWML daily_forecast_summary with hourly_weather
+
+    Args:
+        grid_data (dict): gridpoint JSON from api.weather.gov /gridpoints/{wfo}/{x},{y}
+        time_zone (str): IANA time zone used to assign hours to local dates
+        hourly_weather (pd.DataFrame): observed hourly weather, rows of other locations are
+            left out if it has a Location column and location_name is given
+        location_name (str, optional): location of the forecast. Defaults to None.
+
+    Returns:
+        pd.DataFrame: daily summary indexed by forecast_date
+    """
+    if location_name is not None and 'Location' in hourly_weather.columns:
+        hourly_weather = hourly_weather[hourly_weather['Location'] == location_name]
+    metric_frames = [(metric_name, metric_df.assign(_point=0))
+                     for metric_name, metric_df in gridpoint_metric_frames(grid_data, time_zone)]
+    metric_frames = merge_observed_hourly_weather(metric_frames, hourly_weather.assign(_point=0), key='_point')
+    summary_df = summarize_metric_frames(metric_frames, keys=['_point'])
+    return summary_df.droplevel('_point').sort_index()
+
+
+def gridpoint_daily_forecast_summary(lat, lon, hourly_weather = None, location_name = None, add_coordinates=True,
+                                     base_url = API_WEATHER_GOV_URL, user_agent = DEFAULT_USER_AGENT,
+                                     format = "pandas"):
+    """daily forecast summary for a coordinate from api.weather.gov gridpoint data, a
+    drop-in alternative to ndfd_forecast_api.daily_forecast_summary
+
+    Args:
+        lat (float): latitude in decimal degrees
+        lon (float): longitude in decimal degrees
+        hourly_weather (pd.DataFrame, optional): observed hourly weather for the coordinate,
+            merged with the forecast as in daily_forecast_summary, see
+            ndfd_forecast_api.merge_observed_hourly_weather. Defaults to None.
+        location_name (str, optional): value for a Location column. Defaults to None.
+        add_coordinates (bool, optional): add latitude and longitude columns. Defaults to True.
+        base_url (str, optional): API url. Defaults to API_WEATHER_GOV_URL.
+        user_agent (str, optional): User-Agent header.
+        format (str, optional): 'pandas', 'arrow', 'polars' or 'xarray', as in 
+            daily_forecast_summary. Defaults to "pandas".
+
+    Returns:
+        pd.DataFrame: daily summary with a forecast_date column, or the summary in the requested format
+    """
+    check_summary_format(format)
+    grid_data, time_zone = request_gridpoint_forecast(lat, lon, user_agent=user_agent, base_url=base_url)
+    if hourly_weather is None:
+        summary_df = gridpoint_daily_summary(grid_data, time_zone)
+    else:
+        summary_df = gridpoint_observed_daily_summary(grid_data, time_zone, hourly_weather, location_name)
+    summary_df = add_summary_location_columns(summary_df, lat, lon, location_name, add_coordinates)
+    return summary_to_format(summary_df, format)
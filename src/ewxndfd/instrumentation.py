@@ -0,0 +1,224 @@
+"""optional timing, counter and memory instrumentation for the fetch, parse and
+summarize steps.  Disabled by default, where each span or counter call is
+a single attribute check.
+
+example usage:
+
+    from ewxndfd import instrumentation
+    instrumentation.enable(trace_memory=True)
+    df = daily_forecast_summary(42.73, -84.55)
+    print(instrumentation.report())
+    print(instrumentation.to_prometheus())
+"""
+
+import contextvars
+import json
+import threading
+import time
+import tracemalloc
+
+METRIC_PREFIX = "ewxndfd"
+
+
+class _NullSpan():
+    """context manager that does nothing, returned when instrumentation is disabled"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span():
+    """times a block of code and records it in the owning Instrumentation"""
+
+    __slots__ = ("_instrumentation", "_name", "_start", "_memory")
+
+    def __init__(self, instrumentation:"Instrumentation", name:str):
+        self._instrumentation = instrumentation
+        self._name = name
+        self._memory = None
+
+    def __enter__(self):
+        if self._instrumentation.trace_memory:
+            self._memory = self._instrumentation._memory_enter()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self._start
+        peak = None
+        if self._memory is not None:
+            peak = self._instrumentation._memory_exit(*self._memory)
+        self._instrumentation._record_span(self._name, elapsed, peak)
+        return False
+
+
+class Instrumentation():
+    """collects timing spans, counters and optional tracemalloc peak memory
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.trace_memory = False
+        self._lock = threading.Lock()
+        # open memory spans of the current thread or asyncio task, see _memory_enter
+        self._memory_stack = contextvars.ContextVar(f"ewxndfd_memory_stack_{id(self)}", default=())
+        self.reset()
+
+    def reset(self):
+        """clear all recorded spans and counters"""
+        with self._lock:
+            # span name -> [calls, total seconds, max seconds, peak memory bytes]
+            self.spans = {}
+            self.counters = {}
+
+    def enable(self, trace_memory:bool=False):
+        """start recording
+
+        Args:
+            trace_memory (bool, optional): also record the peak memory allocated in each
+                span using tracemalloc, which slows python down considerably. Defaults to False.
+        """
+        self.enabled = True
+        self.trace_memory = trace_memory
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def disable(self):
+        """stop recording, keeping what has been recorded so far"""
+        self.enabled = False
+        if self.trace_memory and tracemalloc.is_tracing():
+            tracemalloc.stop()
+        self.trace_memory = False
+
+    def span(self, name:str):
+        """context manager timing the enclosed block
+
+        Args:
+            name (str): span name, calls with the same name are aggregated
+
+        Returns:
+            context manager
+        """
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name)
+
+    def count(self, name:str, value:int=1):
+        """add value to a named counter
+
+        Args:
+            name (str): counter name e.g. 'bytes_downloaded'
+            value (int, optional): amount to add. Defaults to 1.
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def _record_span(self, name:str, elapsed:float, peak:int=None):
+        with self._lock:
+            stats = self.spans.setdefault(name, [0, 0.0, 0.0, None])
+            stats[0] += 1
+            stats[1] += elapsed
+            stats[2] = max(stats[2], elapsed)
+            if peak is not None:
+                stats[3] = peak if stats[3] is None else max(stats[3], peak)
+
+    # tracemalloc only keeps a single global peak, so nested spans keep a stack of
+    # [memory at entry, highest absolute peak seen] and pass their peak up to the parent.
+    # The stack is an immutable tuple in a ContextVar, so spans in threads and in
+    # asyncio tasks interleaving across awaits each see only their own parents
+    def _memory_enter(self)->tuple:
+        stack = self._memory_stack.get()
+        current, peak = tracemalloc.get_traced_memory()
+        if stack:
+            stack[-1][1] = max(stack[-1][1], peak)
+        tracemalloc.reset_peak()
+        entry = [current, current]
+        token = self._memory_stack.set(stack + (entry,))
+        return (entry, token)
+
+    def _memory_exit(self, entry:list, token)->int:
+        _, peak = tracemalloc.get_traced_memory()
+        entry_memory, highest = entry
+        highest = max(highest, peak)
+        self._memory_stack.reset(token)
+        stack = self._memory_stack.get()
+        if stack:
+            stack[-1][1] = max(stack[-1][1], highest)
+        return highest - entry_memory
+
+    def to_dict(self)->dict:
+        """recorded spans and counters as a dictionary"""
+        with self._lock:
+            spans = {
+                name: {
+                    "calls": calls,
+                    "total_seconds": total,
+                    "max_seconds": longest,
+                    "peak_memory_bytes": peak,
+                }
+                for name, (calls, total, longest, peak) in self.spans.items()
+            }
+            return {"spans": spans, "counters": dict(self.counters)}
+
+    def to_json(self)->str:
+        """recorded spans and counters as a JSON string"""
+        return json.dumps(self.to_dict(), indent=2)
+
+    def to_prometheus(self)->str:
+        """recorded spans and counters in Prometheus text exposition format"""
+        data = self.to_dict()
+        lines = []
+
+        span_metrics = [
+            ("span_calls_total", "counter", "calls"),
+            ("span_seconds_total", "counter", "total_seconds"),
+            ("span_seconds_max", "gauge", "max_seconds"),
+            ("span_peak_memory_bytes", "gauge", "peak_memory_bytes"),
+        ]
+        for metric, metric_type, key in span_metrics:
+            samples = [(name, s[key]) for name, s in data["spans"].items() if s[key] is not None]
+            if not samples:
+                continue
+            lines.append(f"# TYPE {METRIC_PREFIX}_{metric} {metric_type}")
+            for name, value in samples:
+                lines.append(f'{METRIC_PREFIX}_{metric}{{span="{name}"}} {value}')
+
+        for name, value in data["counters"].items():
+            lines.append(f"# TYPE {METRIC_PREFIX}_{name}_total counter")
+            lines.append(f"{METRIC_PREFIX}_{name}_total {value}")
+
+        return "\n".join(lines) + "\n"
+
+    def report(self)->str:
+        """human-readable breakdown of spans and counters, slowest span first"""
+        data = self.to_dict()
+        lines = [f"{'span':<36}{'calls':>8}{'total s':>12}{'max s':>12}{'peak MB':>10}"]
+        spans = sorted(data["spans"].items(), key=lambda item: item[1]["total_seconds"], reverse=True)
+        for name, s in spans:
+            peak = "" if s["peak_memory_bytes"] is None else f"{s['peak_memory_bytes'] / 1e6:.2f}"
+            lines.append(f"{name:<36}{s['calls']:>8}{s['total_seconds']:>12.4f}{s['max_seconds']:>12.4f}{peak:>10}")
+        for name, value in data["counters"].items():
+            lines.append(f"{name:<36}{value:>8}")
+        return "\n".join(lines)
+
+
+# package-wide instance used by the forecast and file reading modules
+INSTRUMENTATION = Instrumentation()
+
+span = INSTRUMENTATION.span
+count = INSTRUMENTATION.count
+enable = INSTRUMENTATION.enable
+disable = INSTRUMENTATION.disable
+reset = INSTRUMENTATION.reset
+report = INSTRUMENTATION.report
+to_dict = INSTRUMENTATION.to_dict
+to_json = INSTRUMENTATION.to_json
+to_prometheus = INSTRUMENTATION.to_prometheus
@@ -0,0 +1,302 @@
+"""local stand-in for the NDFD ndfdXMLclient.php REST service, returning well-formed
+DWML time-series forecasts for any lat/lon (or list of lat/lon) so the forecast
+client can be tested and load-tested without the network
+
+example usage:
+
+    with MockNDFDServer(latency=0.05, error_rate=0.1) as server:
+        df = daily_forecast_summary(42.73, -84.55, base_url=server.url)
+"""
+
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+import argparse
+import math
+import random
+import threading
+import time
+
+MOCK_NDFD_PATH = "/xml/sample_products/browser_interface/ndfdXMLclient.php"
+
+# body the real service returns (with a 200 status) for invalid requests
+NDFD_ERROR_BODY = """<?xml version='1.0'?><error><h2>ERROR</h2><pre>
+<problem>Mock NDFD server injected error</problem>
+</pre></error>"""
+
+DWML_HEADER = """<?xml version="1.0" encoding="UTF-8"?>
+<dwml version="1.0" xmlns:xsd="http://www.w3.org/2001/XMLSchema" xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" xsi:noNamespaceSchemaLocation="https://digital.weather.gov/xml/schema/DWML.xsd">
+  <head>
+    <product srsName="WGS 1984" concise-name="time-series" operational-mode="official">
+      <title>NOAA's National Weather Service Forecast Data</title>
+      <field>meteorological</field>
+      <category>forecast</category>
+      <creation-date refresh-frequency="PT30M">{creation_date}</creation-date>
+    </product>
+  </head>
+  <data>
+"""
+
+
+def _local_iso(dt:datetime, utc_offset_hours:int)->str:
+    offset = timezone(timedelta(hours=utc_offset_hours))
+    sign = "-" if utc_offset_hours < 0 else "+"
+    return dt.astimezone(offset).strftime("%Y-%m-%dT%H:%M:%S") + f"{sign}{abs(utc_offset_hours):02d}:00"
+
+
+def _time_layouts(now:datetime, utc_offset_hours:int)->dict:
+    """time layouts like the ones the real service uses: key -> list of (start, end).
+    Like the real service, periods that have already ended are left out"""
+    offset = timezone(timedelta(hours=utc_offset_hours))
+    local_now = now.astimezone(offset)
+    local_midnight = local_now.replace(hour=0, minute=0, second=0, microsecond=0)
+    next_hour = local_now.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+
+    def current(periods, n):
+        return [(start, end) for start, end in periods if end > local_now][:n]
+
+    day_starts = [local_midnight + timedelta(days=d) for d in range(8)]
+    layouts = {
+        "k-p24h-n7-1": current([(d + timedelta(hours=7), d + timedelta(hours=19)) for d in day_starts], 7),
+        "k-p24h-n7-2": current([(d - timedelta(hours=5), d + timedelta(hours=8)) for d in day_starts], 7),
+        "k-p1h-n64-3": [(next_hour + timedelta(hours=h), None) for h in range(64)],
+        "k-p6h-n12-4": current([(local_midnight + timedelta(hours=6 * n - 5), local_midnight + timedelta(hours=6 * n + 1))
+                                for n in range(16)], 12),
+    }
+    return layouts
+
+
+def _point_value(element:str, lat:float, lon:float, t:datetime)->float:
+    """deterministic value for an element at a point and time, so repeated
+    requests for the same point return the same forecast"""
+    hours = t.timestamp() / 3600.0
+    diurnal = math.cos((hours % 24 - 20) / 24.0 * 2 * math.pi)
+    base = 10.0 - 0.5 * (lat - 40.0) + 0.05 * (lon + 85.0)
+    wobble = math.sin(lat * 12.9898 + lon * 78.233 + hours / 17.0)
+
+    if element == "maxt":
+        return round(base + 6 + 2 * wobble)
+    if element == "mint":
+        return round(base - 6 + 2 * wobble)
+    if element == "temp":
+        return round(base + 6 * diurnal + wobble)
+    if element == "rh":
+        return max(5, min(100, round(75 - 15 * diurnal + 5 * wobble)))
+    if element == "wspd":
+        return max(0, round(3 + 2 * wobble))
+    if element == "qpf":
+        return round(max(0.0, 0.2 * wobble - 0.1), 2)
+    raise ValueError(f"unsupported element {element}")
+
+
+# element -> (xml tag, type attribute, units, name, time layout key)
+DWML_ELEMENTS = {
+    "maxt": ("temperature", "maximum", "Celsius", "Daily Maximum Temperature", "k-p24h-n7-1"),
+    "mint": ("temperature", "minimum", "Celsius", "Daily Minimum Temperature", "k-p24h-n7-2"),
+    "temp": ("temperature", "hourly", "Celsius", "Temperature", "k-p1h-n64-3"),
+    "qpf": ("precipitation", "liquid", "centimeters", "Liquid Precipitation Amount", "k-p6h-n12-4"),
+    "wspd": ("wind-speed", "sustained", "meters/second", "Wind Speed", "k-p1h-n64-3"),
+    "rh": ("humidity", "relative", "percent", "Relative Humidity", "k-p1h-n64-3"),
+}
+
+
+def dwml_for_points(points:list[tuple], elements:list[str]=None, now:datetime=None, utc_offset_hours:int=-5)->str:
+    """build a DWML time-series document for a list of points
+
+    Args:
+        points (list[tuple]): list of (lat, lon) tuples
+        elements (list[str], optional): NDFD element names e.g. 'maxt', 'rh'. Defaults to all supported elements.
+        now (datetime, optional): utc time the forecast is made, defaults to current time
+        utc_offset_hours (int, optional): offset used for the 'local' time coordinates. Defaults to -5.
+
+    Returns:
+        str: DWML xml document
+    """
+    if elements is None:
+        elements = list(DWML_ELEMENTS.keys())
+    if now is None:
+        now = datetime.now(timezone.utc)
+
+    layouts = _time_layouts(now, utc_offset_hours)
+    used_layouts = sorted({DWML_ELEMENTS[e][4] for e in elements})
+
+    parts = [DWML_HEADER.format(creation_date=now.strftime("%Y-%m-%dT%H:%M:%SZ"))]
+    for n, (lat, lon) in enumerate(points, start=1):
+        parts.append(
+            f'    <location>\n      <location-key>point{n}</location-key>\n'
+            f'      <point latitude="{lat:.2f}" longitude="{lon:.2f}"/>\n    </location>\n'
+        )
+
+    for key in used_layouts:
+        parts.append(f'    <time-layout time-coordinate="local" summarization="none">\n      <layout-key>{key}</layout-key>\n')
+        for start, end in layouts[key]:
+            parts.append(f"      <start-valid-time>{_local_iso(start, utc_offset_hours)}</start-valid-time>\n")
+            if end is not None:
+                parts.append(f"      <end-valid-time>{_local_iso(end, utc_offset_hours)}</end-valid-time>\n")
+        parts.append("    </time-layout>\n")
+
+    for n, (lat, lon) in enumerate(points, start=1):
+        parts.append(f'    <parameters applicable-location="point{n}">\n')
+        for element in elements:
+            tag, type_attr, units, name, key = DWML_ELEMENTS[element]
+            parts.append(f'      <{tag} type="{type_attr}" units="{units}" time-layout="{key}">\n        <name>{name}</name>\n')
+            for start, _ in layouts[key]:
+                parts.append(f"        <value>{_point_value(element, lat, lon, start)}</value>\n")
+            parts.append(f"      </{tag}>\n")
+        parts.append("    </parameters>\n")
+
+    parts.append("  </data>\n</dwml>\n")
+    return "".join(parts)
+
+
+def _points_from_query(query:dict)->list[tuple]:
+    if "listLatLon" in query:
+        pairs = query["listLatLon"][0].split()
+        return [tuple(float(v) for v in pair.split(",")) for pair in pairs]
+    return [(float(query["lat"][0]), float(query["lon"][0]))]
+
+
+class _MockNDFDHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        server = self.server.mock
+        server._count_request()
+
+        url = urlparse(self.path)
+        if url.path != MOCK_NDFD_PATH:
+            self.send_error(404)
+            return
+
+        if server.latency:
+            time.sleep(server.latency)
+
+        if server._inject_error():
+            if server.error_mode == "http":
+                self.send_error(500, "Mock NDFD server injected error")
+            else:
+                self._send(NDFD_ERROR_BODY)
+            return
+
+        query = parse_qs(url.query)
+        elements = [e for e in DWML_ELEMENTS if e in query]
+        try:
+            points = _points_from_query(query)
+        except (KeyError, ValueError):
+            self._send(NDFD_ERROR_BODY)
+            return
+
+        self._send(dwml_for_points(points, elements, now=server.now, utc_offset_hours=server.utc_offset_hours))
+
+    def _send(self, body:str):
+        data = body.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/xml;charset=UTF-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        # keep test output quiet
+        pass
+
+
+class MockNDFDServer():
+    """threaded local http server imitating digital.weather.gov ndfdXMLclient.php
+    """
+
+    def __init__(self, host:str="127.0.0.1", port:int=0, latency:float=0.0, error_rate:float=0.0,
+                 error_mode:str="body", utc_offset_hours:int=-5, seed:int=None, now:datetime=None):
+        """configure mock server, which is not started until start() is called
+
+        Args:
+            host (str, optional): interface to listen on. Defaults to "127.0.0.1".
+            port (int, optional): port to listen on, 0 picks a free port. Defaults to 0.
+            latency (float, optional): seconds to wait before each response. Defaults to 0.0.
+            error_rate (float, optional): fraction of requests that return an error. Defaults to 0.0.
+            error_mode (str, optional): 'body' for an NDFD error document with status 200 (like the
+                real service) or 'http' for a 500 status. Defaults to "body".
+            utc_offset_hours (int, optional): offset for local times in the DWML. Defaults to -5.
+            seed (int, optional): random seed for error injection. Defaults to None.
+            now (datetime, optional): utc time the forecasts are made, for forecasts that don't 
+                change with the clock. Defaults to None, the time of each request.
+        """
+        if error_mode not in ("body", "http"):
+            raise ValueError(f"error_mode must be 'body' or 'http': {error_mode}")
+
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.error_rate = error_rate
+        self.error_mode = error_mode
+        self.utc_offset_hours = utc_offset_hours
+        self.now = now
+        self.request_count = 0
+
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._httpd = None
+        self._thread = None
+
+    @property
+    def url(self)->str:
+        """url of the mock ndfdXMLclient.php, to use as base_url in the forecast client"""
+        return f"http://{self.host}:{self.port}{MOCK_NDFD_PATH}"
+
+    def _count_request(self):
+        with self._lock:
+            self.request_count += 1
+
+    def _inject_error(self)->bool:
+        with self._lock:
+            return self._random.random() < self.error_rate
+
+    def start(self)->"MockNDFDServer":
+        self._httpd = ThreadingHTTPServer((self.host, self.port), _MockNDFDHandler)
+        self._httpd.daemon_threads = True
+        self._httpd.mock = self
+        self.port = self._httpd.server_address[1]
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._thread.join()
+            self._httpd = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        prog="ndfd_mock_server",
+        description="""Serve a local imitation of the NDFD ndfdXMLclient.php service
+        for testing.  For example: ndfd_mock_server --port 8080 --latency 0.2 --error-rate 0.05"""
+    )
+    parser.add_argument("--host", default="127.0.0.1", help="interface to listen on")
+    parser.add_argument("--port", type=int, default=8080, help="port to listen on")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds of delay per response")
+    parser.add_argument("--error-rate", dest="error_rate", type=float, default=0.0,
+                        help="fraction of requests that return an error")
+    parser.add_argument("--error-mode", dest="error_mode", choices=["body", "http"], default="body",
+                        help="'body' returns an NDFD error document, 'http' returns status 500")
+    args = parser.parse_args()
+
+    server = MockNDFDServer(host=args.host, port=args.port, latency=args.latency,
+                            error_rate=args.error_rate, error_mode=args.error_mode).start()
+    print(f"mock NDFD service at {server.url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
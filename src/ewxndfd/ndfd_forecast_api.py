@@ -5,23 +5,33 @@ summarize by day
 
 import requests
 import xml.etree.ElementTree as ET
+import numpy as np
 import pandas as pd
 import argparse
 import sys
+import time
 from datetime import date # , timedelta, datetime
 
+from . import instrumentation
+from .ndfd_grid import GridCellMap, grid_cell_to_latlon
+
 
 
 DEFAULT_USER_AGENT = '(enviroweather.msu.edu, ewx@enviroweather.msu.edu)'
 # for testing
 LANSING_LAT_LON = (42.73, -84.55)  # approximate lat/lon for Lansing, MI
 
+NDFD_XML_CLIENT_URL = "https://digital.weather.gov/xml/sample_products/browser_interface/ndfdXMLclient.php"
+
+# NDFD is updated 25 and 55 minutes after the hour, DWML creation-date refresh-frequency is PT30M
+NDFD_REFRESH_SECONDS = 30 * 60
 
 
-def construct_ndfd_digital_forecast_url(lat, lon, begin=None, end=None):
+
+def construct_ndfd_digital_forecast_url(lat, lon, begin=None, end=None, base_url=NDFD_XML_CLIENT_URL):
     
     # dwml by default, not summarized 
-    base_url = "https://digital.weather.gov/xml/sample_products/browser_interface/ndfdXMLclient.php"
+    # base_url can be changed to use a mirror or the local mock server for testing
     
     if begin is None:
         date_today =  date.today().isoformat() + "T00:00:00"
@@ -33,7 +43,7 @@ def construct_ndfd_digital_forecast_url(lat, lon, begin=None, end=None):
     else:
         date_future = end
     
-    metrics = ['maxt', 'mint', 'rh', 'wspd', 'qpf']
+    metrics = ['maxt', 'mint', 'temp', 'rh', 'wspd', 'qpf']
     metrics_param = '&'.join([f"{m}={m}" for m in metrics])  # maxt=maxt&mint=mint...
     
     forecast_params = f"Unit=m&lat={lat}&lon={lon}&product=time-series&begin={date_today}&end={date_future}&{metrics_param}"
@@ -42,15 +52,22 @@ def construct_ndfd_digital_forecast_url(lat, lon, begin=None, end=None):
     
     return forecast_url
 
-def request_ndfd_digital_forecast(lat, lon, user_agent = DEFAULT_USER_AGENT):
-    
+def ndfd_forecast_request_url(lat, lon, base_url = NDFD_XML_CLIENT_URL):
+    """url for all of the forecast for a coordinate from today on"""
     date_today =  date.today().isoformat() + "T00:00:00"
     date_future = '2030-04-20T00:00:00'  
     
-    forecast_url = construct_ndfd_digital_forecast_url(lat, lon, begin=date_today, end=date_future) # f"{base_url}?{forecast_params}"
+    return construct_ndfd_digital_forecast_url(lat, lon, begin=date_today, end=date_future, base_url=base_url) # f"{base_url}?{forecast_params}"
+
+
+def request_ndfd_digital_forecast(lat, lon, user_agent = DEFAULT_USER_AGENT, base_url = NDFD_XML_CLIENT_URL):
+    
+    forecast_url = ndfd_forecast_request_url(lat, lon, base_url=base_url)
     headers = {"User-Agent": user_agent}
     
-    forecast_response = requests.get(forecast_url, headers=headers)
+    with instrumentation.span("request_ndfd_digital_forecast"):
+        forecast_response = requests.get(forecast_url, headers=headers)
+    instrumentation.count("bytes_downloaded", len(forecast_response.content))
     return(forecast_response)
     
   
@@ -92,9 +109,12 @@ def weather_metric_xml_to_df(root, metric_path):
         }
     )
     
-    df['forecast_date'] = pd.to_datetime(df['forecast_time']).dt.date
+    # local date from the time string, which keeps working when the offset
+    # changes for daylight saving time within the forecast
+    df['forecast_date'] = pd.to_datetime(df['forecast_time'].str.slice(0, 10), format='%Y-%m-%d').dt.date
     # df['end_date'] = pd.to_datetime(df['end_time']).dt.date
     df['value'] = pd.to_numeric(df['value'], errors='coerce')
+    instrumentation.count("rows_parsed", len(df))
     return df
 
 def weather_metric_name_from_xml(root, metric_path):
@@ -104,103 +124,241 @@ def weather_metric_name_from_xml(root, metric_path):
     return f"{value_name} ({unit_name})"
     
     
-def daily_forecast_summary(lat, lon, hourly_weather = None, location_name = None, add_coordinates=True):
+def parse_ndfd_forecast_xml(xml_text):
+    """check the text of an NDFD response for an error and parse it"""
     
-    ######
-    # add hourly weather into df here for today
-    # the way it's added depends on the metric and how that's stored in df from the xml
-    resp = request_ndfd_digital_forecast(lat, lon)
     # if resp has an error # note status code is always 200 even if params are invalid
-    if "ERROR" in resp.text.upper():
+    if "ERROR" in xml_text.upper():
         # extract error message from resp.text and put in raise msg
-        print(resp.text)
+        print(xml_text)
         raise ValueError("Error retrieving NDFD digital weather data.")
         
-        
-    root = ET.fromstring(resp.text)
-    
-    # collect daily summaries for each metric.  The unique requirements of each 
-    # metric are the path to find it in the XML and how to summarize it by day
-    # to keep this easy to edit/copy&paste, re-using the variable name metric_df
-    # and then deleting the df before the next metric to ensure there is no 
-    # re-use causing bugs.  Since don't know how to to cleanly send the Pandas
-    # Summary functions as parameters, just repeat the code for each metric
-    
-    metric_df_list = []
-    
+    with instrumentation.span("parse_xml"):
+        root = ET.fromstring(xml_text)
+    return root
 
-    metric_path = './/humidity'
-    
-    metric_df = weather_metric_xml_to_df(root, metric_path)
-    if metric_df.empty:
-        raise ValueError(f"The element {metric_path} not found found in NDFD forecast XML.")
-    metric_name = weather_metric_name_from_xml(root, metric_path)
-    
+
+def daily_forecast_summary(lat, lon, hourly_weather = None, location_name = None, add_coordinates=True,
+                           base_url = NDFD_XML_CLIENT_URL, user_agent = DEFAULT_USER_AGENT, cache = None,
+                           format = "pandas"):
+    """daily summary of the NDFD forecast for a coordinate
+    
+    The forecast only covers the rest of today, so for an accurate summary of today
+    provide observed hourly weather for the coordinate.  Observations before the first
+    forecast time of each metric are combined with the forecast, see 
+    merge_observed_hourly_weather for the format. 
+
+    Args:
+        lat (float): latitude in decimal degrees
+        lon (float): longitude in decimal degrees
+        hourly_weather (pd.DataFrame, optional): observed hourly weather with a datetime index
+            and any of the columns temperature (Celsius), relative_humidity (percent) and 
+            precipitation (centimeters). Defaults to None.
+        location_name (str, optional): value for a Location column. Defaults to None.
+        add_coordinates (bool, optional): add latitude and longitude columns. Defaults to True.
+        base_url (str, optional): URL of the ndfdXMLclient.php service.
+        user_agent (str, optional): User-Agent header to send with requests.
+        cache (NDFDForecastCache, optional): cache of forecasts by grid cell. Defaults to None.
+        format (str, optional): 'pandas', 'arrow', 'polars' or 'xarray' (with forecast_date
+            and Location dimensions), see ewxndfd.output_formats. Defaults to "pandas".
+
+    Returns:
+        pd.DataFrame: daily summary with a forecast_date column, or the summary in the requested format
+    """
+    # before any request, an invalid format should not cost a forecast download
+    check_summary_format(format)
+    
+    # always a batch of one point, so the forecast is requested for the grid cell 
+    # center whether or not a cache or observations are used
+    summary_df = daily_forecast_summary_batch([(lat, lon, location_name)], hourly_weather=hourly_weather, 
+                                              add_coordinates=add_coordinates, base_url=base_url, 
+                                              user_agent=user_agent, cache=cache)
+    return summary_to_format(summary_df, format)
+
+
+def check_summary_format(format):
+    """raise ValueError for a daily summary format that is not one of output_formats.OUTPUT_FORMATS"""
+    from .output_formats import _check_format
+    _check_format(format)
+
+
+def summary_to_format(summary_df, format = "pandas"):
+    """convert a daily summary with a forecast_date column to a format of 
+    ewxndfd.output_formats, with forecast_date and Location (if present) dimensions. 
+    Shared by the forecast sources so they all offer the same formats"""
+    if format == "pandas":
+        return summary_df
+    from .output_formats import dataframe_to_format
+    index_columns = ['Location', 'forecast_date'] if 'Location' in summary_df.columns else ['forecast_date']
+    return dataframe_to_format(summary_df, format, index_columns=index_columns)
+
+
+# collect daily summaries for each metric.  The unique requirements of each 
+# metric are the path to find it in the XML, the column of observed hourly weather
+# it is combined with and how to summarize it by day: 
+# (xml path, observed column, [(summary column name, pandas aggregation)...], span name)
+# where {name} in the summary column is replaced with the name and units from the XML
+DAILY_SUMMARY_METRICS = [
     # humidity must be summarized 
-    metric_df_list.append(
-        pd.DataFrame(
-        { 
-            f'Maximum {metric_name}': metric_df.groupby('forecast_date')['value'].max(), 
-            f'Minimum {metric_name}': metric_df.groupby('forecast_date')['value'].min()
-        }
-        )
-    )
-    del(metric_df)
+    ('.//humidity', 'relative_humidity', 
+     [('Maximum {name}', 'max'), ('Minimum {name}', 'min')], "aggregate_humidity"),
     
     ## wind speed
     # disabled, not included in daily summary as it's a logical daily statistic 
-    # but will be included in hourly forecast 
-    # metric_path = './/wind-speed[@type="sustained"]'
-    # metric_name = weather_metric_name_from_xml(root, metric_path)
-    # metric_df = weather_metric_xml_to_df(root, metric_path)
-    # metric_df_list.append(
-    #     pd.DataFrame(
-    #     { 
-    #         f'Maximum {metric_name}':  metric_df.groupby('forecast_date')['value'].max(), 
-    #         f'Mean {metric_name}':  metric_df.groupby('forecast_date')['value'].mean()
-    #     }
-    #     )
-    # )
-    # del(metric_df)
-    
-    metric_path = './/precipitation[@type="liquid"]'
-    metric_name = weather_metric_name_from_xml(root, metric_path)
-    metric_df = weather_metric_xml_to_df(root, metric_path)
-    metric_df_list.append(
-        pd.DataFrame(
-        { 
-            f'Total {metric_name}':  metric_df.groupby('forecast_date')['value'].sum()
-        }
-        )
-    )
-    del(metric_df)
+    # but is included in the hourly forecast, see hourly_forecast
+    # ('.//wind-speed[@type="sustained"]', 'wind_speed', 
+    #  [('Maximum {name}', 'max'), ('Mean {name}', 'mean')], "aggregate_wind_speed"),
     
-
-    # max/min temps are already reported daily
-    metric_path = ".//temperature[@type='minimum']"
-    metric_name = weather_metric_name_from_xml(root, metric_path)
-    min_temperature_df = weather_metric_xml_to_df(root, metric_path)
-    metric_df_list.append( 
-        pd.DataFrame(
-            { 
-            f'{metric_name}': min_temperature_df.groupby('forecast_date')['value'].min()
-            }
-        )
-    )
+    ('.//precipitation[@type="liquid"]', 'precipitation', 
+     [('Total {name}', 'sum')], "aggregate_precipitation"),
     
-    metric_path = ".//temperature[@type='maximum']"
-    metric_name = weather_metric_name_from_xml(root, metric_path)
-    max_temperature_df = weather_metric_xml_to_df(root, metric_path)
-    metric_df_list.append(    
-        pd.DataFrame(
-            { 
-            f'{metric_name}': max_temperature_df.groupby('forecast_date')['value'].max()  
-            }
-        )
-    )
-    
-    summary_df = pd.concat(metric_df_list, axis=1)    # [humidity_daily, min_temperature_daily, max_temperature_daily, windspeed_daily], axis=1)
+    # max/min temps are already reported daily
+    (".//temperature[@type='minimum']", 'temperature', 
+     [('{name}', 'min')], "aggregate_min_temperature"),
+    (".//temperature[@type='maximum']", 'temperature', 
+     [('{name}', 'max')], "aggregate_max_temperature"),
+]
+
+# columns of observed hourly weather that can be merged with the forecast
+OBSERVED_HOURLY_COLUMNS = ['temperature', 'relative_humidity', 'precipitation']
+
+
+def xml_metric_frames(root):
+    """values of each DAILY_SUMMARY_METRICS metric from a parsed DWML forecast
+
+    Args:
+        root (xml.etree.ElementTree.Element): parsed DWML document
+
+    Returns:
+        list: (metric name with units, DataFrame from weather_metric_xml_to_df) for each metric
+    """
+    metric_frames = []
+    for metric_path, _, _, _ in DAILY_SUMMARY_METRICS:
+        metric_df = weather_metric_xml_to_df(root, metric_path)
+        if metric_df.empty:
+            raise ValueError(f"The element {metric_path} not found found in NDFD forecast XML.")
+        metric_name = weather_metric_name_from_xml(root, metric_path)
+        metric_frames.append((metric_name, metric_df))
+    return metric_frames
+
+
+def summarize_metric_frames(metric_frames, keys = []):
+    """summarize metric values by day, and optionally by key columns, 
+    with one groupby per metric
+
+    Args:
+        metric_frames (list): (metric name, DataFrame) per DAILY_SUMMARY_METRICS metric, the 
+            DataFrames need forecast_date, value and any key columns
+        keys (list, optional): columns to group by in addition to date, e.g. a location. Defaults to [].
+
+    Returns:
+        pd.DataFrame: daily summary indexed by keys and forecast_date
+    """
+    metric_df_list = []
+    for (metric_name, metric_df), (_, _, aggregations, span_name) in zip(metric_frames, DAILY_SUMMARY_METRICS):
+        with instrumentation.span(span_name):
+            grouped = metric_df.groupby(keys + ['forecast_date'])['value']
+            metric_df_list.append(
+                pd.DataFrame(
+                { 
+                    column.format(name=metric_name): grouped.agg(aggregation)
+                    for column, aggregation in aggregations
+                }
+                )
+            )
+    
+    summary_df = pd.concat(metric_df_list, axis=1)
+    return summary_df
+
+
+def daily_summary_from_xml(root):
+    """summarize each metric of a parsed NDFD DWML forecast by day
 
+    Args:
+        root (xml.etree.ElementTree.Element): parsed DWML document
+
+    Returns:
+        pd.DataFrame: daily summary indexed by date
+    """
+    return summarize_metric_frames(xml_metric_frames(root))
+
+
+def _utc_offsets(time_strings):
+    """utc offsets of ISO-8601 local time strings like 2025-12-12T07:00:00-05:00 as Timedeltas"""
+    offset = time_strings.str.slice(19)
+    sign = offset.str.slice(0, 1).map({'-': -1, '+': 1}).fillna(0)
+    hours = pd.to_numeric(offset.str.slice(1, 3), errors='coerce').fillna(0)
+    minutes = pd.to_numeric(offset.str.slice(4, 6), errors='coerce').fillna(0)
+    return pd.to_timedelta(sign * (hours * 60 + minutes), unit='min')
+
+
+def merge_observed_hourly_weather(metric_frames, hourly_weather, key = '_point'):
+    """add observed hourly weather to forecast metric values on one time axis, for all 
+    locations at once.  For each location and metric, the observations before the 
+    metric's first forecast time are added, so today's daily values reflect both the 
+    observations so far and the forecast for the rest of the day.  Only observations 
+    on the first date of the location's forecast are used, so observations of past 
+    days do not add rows to the summary.
+    
+    hourly_weather has a DatetimeIndex of observation times and any of the columns in 
+    OBSERVED_HOURLY_COLUMNS: temperature (Celsius), relative_humidity (percent) and 
+    precipitation (centimeters, the total for the hour), plus the key column to match
+    forecast rows.  Timezone-aware times are converted to the forecast's local time, 
+    naive times are assumed to already be local time.
+
+    Args:
+        metric_frames (list): (metric name, DataFrame) per DAILY_SUMMARY_METRICS metric, the 
+            DataFrames need forecast_time (DWML local time string), value and the key column
+        hourly_weather (pd.DataFrame): observed hourly weather with a key column
+        key (str, optional): column identifying the location. Defaults to '_point'.
+
+    Returns:
+        list: metric_frames with the observations added as rows
+    """
+    observed = hourly_weather.reset_index(names='_observed_time')
+    observed_time = pd.to_datetime(observed['_observed_time'])
+    
+    # first forecast date per location, over all metrics
+    first_dates = pd.concat([metric_df[[key, 'forecast_date']] for _, metric_df in metric_frames])
+    first_date = first_dates.groupby(key, sort=False)['forecast_date'].min()
+    
+    merged_frames = []
+    for (metric_name, metric_df), (_, column, _, _) in zip(metric_frames, DAILY_SUMMARY_METRICS):
+        if column not in observed.columns:
+            merged_frames.append((metric_name, metric_df))
+            continue
+        
+        # first forecast time per location as local wall time and utc offset
+        first_time = metric_df.groupby(key, sort=False)['forecast_time'].min()
+        first_local = pd.to_datetime(first_time.str.slice(0, 19), format='%Y-%m-%dT%H:%M:%S')
+        utc_offset = _utc_offsets(first_time)
+        
+        if observed_time.dt.tz is not None:
+            offset = observed[key].map(utc_offset)
+            local_time = observed_time.dt.tz_convert('UTC').dt.tz_localize(None) + offset
+        else:
+            local_time = observed_time
+        
+        observed_date = local_time.dt.date
+        keep = (observed[column].notna() 
+                & (local_time < observed[key].map(first_local))
+                & (observed_date == observed[key].map(first_date)))
+        observed_rows = pd.DataFrame({
+            key: observed.loc[keep, key],
+            'forecast_date': observed_date[keep],
+            'value': observed.loc[keep, column].astype(float),
+        })
+        merged_frames.append((metric_name, pd.concat([metric_df, observed_rows], ignore_index=True)))
+    
+    return merged_frames
+
+
+def add_summary_location_columns(summary_df, lat, lon, location_name = None, add_coordinates=True,
+                                 index_name = 'forecast_date'):
+    """add the optional location and coordinate columns to a daily summary indexed 
+    by date and move the date index to a forecast_date column.  Shared by the 
+    forecast sources so they all return the same table layout"""
+    
     if add_coordinates:
         summary_df['latitude'] = lat
         summary_df['longitude'] = lon
@@ -208,10 +366,331 @@ def daily_forecast_summary(lat, lon, hourly_weather = None, location_name = None
     if location_name is not None:
         summary_df.insert(0,'Location', location_name)
         
-    summary_df = summary_df.rename_axis('forecast_date').reset_index()
+    summary_df = summary_df.rename_axis(index_name).reset_index()
     
     return summary_df
 
+
+# elements of the hourly forecast: (xml path, is the value a total for its interval)
+HOURLY_FORECAST_METRICS = [
+    (".//temperature[@type='hourly']", False),
+    ('.//humidity', False),
+    ('.//wind-speed[@type="sustained"]', False),
+    ('.//precipitation[@type="liquid"]', True),
+]
+
+
+def time_layout_index(root):
+    """start and end times of every time-layout in a parsed DWML document, read in
+    one pass over the document
+
+    Args:
+        root (xml.etree.ElementTree.Element): parsed DWML document
+
+    Returns:
+        dict: layout key -> (utc start times, utc end times or None) as datetime64 arrays
+    """
+    layouts = {}
+    for tl in root.findall('.//time-layout'):
+        layout_key = tl.find('layout-key').text
+        start_times = [st.text for st in tl.findall('start-valid-time')]
+        end_times = [et.text for et in tl.findall('end-valid-time')]
+        starts = pd.to_datetime(start_times, utc=True, format='ISO8601').tz_localize(None).to_numpy()
+        ends = None
+        if end_times:
+            ends = pd.to_datetime(end_times, utc=True, format='ISO8601').tz_localize(None).to_numpy()
+        layouts[layout_key] = (starts, ends)
+    return layouts
+
+
+def expand_intervals_hourly(starts, hours, values, accumulated = False):
+    """expand values that hold for intervals to one value per hour, for every 
+    interval at once with numpy repeat instead of looping per value
+
+    Args:
+        starts (np.ndarray): interval start times, datetime64
+        hours (np.ndarray): whole hours in each interval, intervals are at least 1 hour
+        values (np.ndarray): value of each interval
+        accumulated (bool, optional): the value is a total for the interval (e.g. 
+            precipitation) and is split evenly across its hours. Defaults to False.
+
+    Returns:
+        tuple: (hourly times, hourly values) as numpy arrays
+    """
+    hours = np.maximum(np.asarray(hours), 1).astype(int)
+    values = np.asarray(values, dtype=float)
+    if accumulated:
+        values = values / hours
+    # hour offset of each expanded row within its own interval
+    interval_first_row = np.repeat(np.cumsum(hours) - hours, hours)
+    offsets = np.arange(int(hours.sum())) - interval_first_row
+    times = np.repeat(starts, hours) + offsets * np.timedelta64(1, 'h')
+    return (times, np.repeat(values, hours))
+
+
+def hourly_forecast_from_xml(root):
+    """hourly values of each HOURLY_FORECAST_METRICS element on one utc time index
+    
+    Each element has its own time-layout.  The index is the sorted union of the 
+    times of all elements, and each element's values are placed on it with a 
+    sorted-array search rather than a lookup per row.  Interval totals (precipitation) 
+    are split evenly over the hours of the interval, so hourly values sum to the 
+    forecast totals.  Times where an element has no value are NaN.
+
+    Args:
+        root (xml.etree.ElementTree.Element): parsed DWML document
+
+    Returns:
+        pd.DataFrame: one column per element with names and units from the XML, 
+            indexed by utc forecast_time
+    """
+    layouts = time_layout_index(root)
+    
+    element_series = []
+    with instrumentation.span("hourly_forecast_align"):
+        for metric_path, accumulated in HOURLY_FORECAST_METRICS:
+            weather_values = root.find(metric_path)
+            if weather_values is None:
+                raise ValueError(f"The element {metric_path} not found found in NDFD forecast XML.")
+            starts, ends = layouts[weather_values.get('time-layout')]
+            values = pd.to_numeric(pd.Series([v.text for v in weather_values.findall('value')], dtype=object), 
+                                   errors='coerce').to_numpy(dtype=float)
+            if accumulated and ends is not None:
+                times, values = expand_intervals_hourly(starts, (ends - starts) // np.timedelta64(1, 'h'),
+                                                        values, accumulated=True)
+            else:
+                times = starts
+            name = weather_metric_name_from_xml(root, metric_path)
+            element_series.append((name, times, values))
+        
+        forecast_time = np.unique(np.concatenate([times for _, times, _ in element_series]))
+        columns = {}
+        for name, times, values in element_series:
+            column = np.full(len(forecast_time), np.nan)
+            column[np.searchsorted(forecast_time, times)] = values
+            columns[name] = column
+    
+    hourly_df = pd.DataFrame(columns, index=pd.DatetimeIndex(forecast_time, tz='UTC', name='forecast_time'))
+    instrumentation.count("rows_parsed", len(hourly_df))
+    return hourly_df
+
+
+def hourly_forecast(lat, lon, location_name = None, add_coordinates=True, 
+                    base_url = NDFD_XML_CLIENT_URL, user_agent = DEFAULT_USER_AGENT):
+    """hourly NDFD forecast of temperature, relative humidity, wind speed and 
+    precipitation for a coordinate, see hourly_forecast_from_xml
+
+    Args:
+        lat (float): latitude in decimal degrees
+        lon (float): longitude in decimal degrees
+        location_name (str, optional): value for a Location column. Defaults to None.
+        add_coordinates (bool, optional): add latitude and longitude columns. Defaults to True.
+        base_url (str, optional): URL of the ndfdXMLclient.php service.
+        user_agent (str, optional): User-Agent header to send with requests.
+
+    Returns:
+        pd.DataFrame: hourly forecast with a utc forecast_time column
+    """
+    resp = request_ndfd_digital_forecast(*forecast_request_latlon(lat, lon), user_agent=user_agent, base_url=base_url)
+    root = parse_ndfd_forecast_xml(resp.text)
+    hourly_df = hourly_forecast_from_xml(root)
+    return add_summary_location_columns(hourly_df, lat, lon, location_name, add_coordinates, index_name='forecast_time')
+
+
+def daily_and_hourly_forecast(lat, lon, location_name = None, add_coordinates=True,
+                              base_url = NDFD_XML_CLIENT_URL, user_agent = DEFAULT_USER_AGENT):
+    """daily summary and hourly forecast for a coordinate from one request and one 
+    parse of the response
+
+    Returns:
+        tuple: (daily summary like daily_forecast_summary, hourly forecast like hourly_forecast)
+    """
+    resp = request_ndfd_digital_forecast(*forecast_request_latlon(lat, lon), user_agent=user_agent, base_url=base_url)
+    root = parse_ndfd_forecast_xml(resp.text)
+    summary_df = add_summary_location_columns(daily_summary_from_xml(root), lat, lon, location_name, add_coordinates)
+    hourly_df = add_summary_location_columns(hourly_forecast_from_xml(root), lat, lon, location_name, 
+                                             add_coordinates, index_name='forecast_time')
+    return (summary_df, hourly_df)
+
+class NDFDForecastCache():
+    """in-memory cache of NDFD forecast XML by grid cell.  Entries expire after 
+    max_age seconds, by default the 30 minute NDFD update interval
+    """
+    
+    def __init__(self, max_age:float = NDFD_REFRESH_SECONDS):
+        self.max_age = max_age
+        self.responses = {}
+    
+    def get(self, cell:tuple):
+        """cached forecast XML text for a grid cell, or None if missing or expired"""
+        entry = self.responses.get(cell)
+        if entry is not None and time.monotonic() - entry[0] <= self.max_age:
+            instrumentation.count("cache_hits")
+            return entry[1]
+        instrumentation.count("cache_misses")
+        return None
+    
+    def put(self, cell:tuple, xml_text:str):
+        self.responses[cell] = (time.monotonic(), xml_text)
+    
+    def clear(self):
+        self.responses = {}
+
+
+def daily_forecast_summary_batch(points, hourly_weather = None, add_coordinates=True, base_url = NDFD_XML_CLIENT_URL,
+                                 user_agent = DEFAULT_USER_AGENT, grid_map = None, cache = None):
+    """daily forecast summaries for many points, requesting the forecast only once
+    for each NDFD grid cell.  Points in the same 2.5 km cell get the same forecast,
+    so the forecast for the cell is fetched (at the cell center) and parsed once, 
+    then copied to every point in the cell. 
+    
+    Observed hourly weather for all points is merged with the forecast and summarized
+    in one pass, see merge_observed_hourly_weather. 
+
+    Args:
+        points (list): list of (lat, lon) or (lat, lon, location_name) tuples
+        hourly_weather (pd.DataFrame, optional): observed hourly weather for any of the points,
+            with a Location column matching the location names of points (not needed 
+            for a single point). Defaults to None.
+        add_coordinates (bool, optional): add latitude and longitude columns. Defaults to True.
+        base_url (str, optional): URL of the ndfdXMLclient.php service.
+        user_agent (str, optional): User-Agent header to send with requests.
+        grid_map (GridCellMap, optional): point to grid cell mapping, saved after use.
+            Defaults to None, an in-memory mapping.
+        cache (NDFDForecastCache, optional): cache of forecasts by grid cell. Defaults to None.
+
+    Returns:
+        pd.DataFrame: daily summaries for all points, in the order of points, with a
+            Location column if any point has a location name
+    """
+    cell_points = group_points_by_cell(points, grid_map)
+    
+    cell_metric_frames = []
+    for cell in cell_points:
+        xml_text = cache.get(cell) if cache is not None else None
+        if xml_text is None:
+            lat, lon = cell_request_latlon(cell)
+            resp = request_ndfd_digital_forecast(lat, lon, user_agent=user_agent, base_url=base_url)
+            xml_text = resp.text
+            root = parse_ndfd_forecast_xml(xml_text)
+            if cache is not None:
+                cache.put(cell, xml_text)
+        else:
+            root = parse_ndfd_forecast_xml(xml_text)
+        
+        cell_metric_frames.append(xml_metric_frames(root))
+    
+    return summarize_cell_forecasts(points, cell_points, cell_metric_frames, hourly_weather=hourly_weather,
+                                    add_coordinates=add_coordinates)
+
+
+def group_points_by_cell(points, grid_map = None):
+    """group point indices by NDFD grid cell, points outside the grid are keyed
+    by ('point', lat, lon) and requested as-is
+
+    Args:
+        points (list): list of (lat, lon) or (lat, lon, location_name) tuples
+        grid_map (GridCellMap, optional): point to grid cell mapping, saved after use.
+
+    Returns:
+        dict: grid cell -> list of point indices, in order of first appearance
+    """
+    if grid_map is None:
+        grid_map = GridCellMap()
+    
+    cell_points = {}
+    for n, point in enumerate(points):
+        cell = grid_map.cell(point[0], point[1])
+        if cell == (-1, -1):
+            cell = ('point', point[0], point[1])
+        cell_points.setdefault(cell, []).append(n)
+    grid_map.save()
+    return cell_points
+
+
+def cell_request_latlon(cell):
+    """coordinate to request the forecast for a grid cell from group_points_by_cell"""
+    lat, lon = cell[1:] if cell[0] == 'point' else grid_cell_to_latlon(*cell)
+    return (round(lat, 4), round(lon, 4))
+
+
+def forecast_request_latlon(lat, lon, grid_map = None):
+    """coordinate to request the forecast for a point: the center of its grid cell,
+    so every function requests the same forecast for a point as the batch functions"""
+    cell = next(iter(group_points_by_cell([(lat, lon)], grid_map)))
+    return cell_request_latlon(cell)
+
+
+def summarize_cell_forecasts(points, cell_points, cell_metric_frames, hourly_weather = None, add_coordinates=True):
+    """daily summaries for points from the parsed forecast of each grid cell, 
+    the second half of daily_forecast_summary_batch
+
+    Args:
+        points (list): list of (lat, lon) or (lat, lon, location_name) tuples
+        cell_points (dict): grid cell -> point indices, from group_points_by_cell
+        cell_metric_frames (list): xml_metric_frames for each cell, in the order of cell_points
+        hourly_weather (pd.DataFrame, optional): observed hourly weather, see daily_forecast_summary_batch
+        add_coordinates (bool, optional): add latitude and longitude columns. Defaults to True.
+
+    Returns:
+        pd.DataFrame: daily summaries for all points, in the order of points
+    """
+    # one DataFrame of values for all cells per metric
+    metric_frames = []
+    for m in range(len(DAILY_SUMMARY_METRICS)):
+        metric_name = cell_metric_frames[0][m][0]
+        metric_df = pd.concat([frames[m][1].assign(_cell=cell_number) 
+                               for cell_number, frames in enumerate(cell_metric_frames)], ignore_index=True)
+        metric_frames.append((metric_name, metric_df))
+    
+    point_cell = [0] * len(points)
+    for cell_number, point_indices in enumerate(cell_points.values()):
+        for n in point_indices:
+            point_cell[n] = cell_number
+    points_df = pd.DataFrame({'_point': range(len(points)), '_cell': point_cell})
+    names = [point[2] if len(point) > 2 else None for point in points]
+    
+    if hourly_weather is None:
+        # summarize once per cell, fan out to points with a single merge below
+        summary_key = '_cell'
+    else:
+        # observations differ by point, so fan out forecast values to points first
+        summary_key = '_point'
+        metric_frames = [(metric_name, metric_df.merge(points_df, on='_cell'))
+                         for metric_name, metric_df in metric_frames]
+        
+        if 'Location' in hourly_weather.columns:
+            point_for_name = {name: n for n, name in enumerate(names) if name is not None}
+            observed = hourly_weather.assign(_point=hourly_weather['Location'].map(point_for_name))
+            observed = observed[observed['_point'].notna()].astype({'_point': int})
+        elif len(points) == 1:
+            observed = hourly_weather.assign(_point=0)
+        else:
+            raise ValueError("hourly_weather needs a Location column to match observations to points")
+        
+        metric_frames = merge_observed_hourly_weather(metric_frames, observed, key='_point')
+    
+    daily_df = summarize_metric_frames(metric_frames, keys=[summary_key]).reset_index()
+    
+    has_names = any(name is not None for name in names)
+    if has_names:
+        points_df['Location'] = names
+    if add_coordinates:
+        points_df['latitude'] = [point[0] for point in points]
+        points_df['longitude'] = [point[1] for point in points]
+    
+    summary_df = points_df.merge(daily_df, on=summary_key, how='left')
+    summary_df = summary_df.sort_values(['_point', 'forecast_date'], kind='stable')
+    
+    # same column order as daily_forecast_summary
+    metric_columns = [c for c in daily_df.columns if c not in (summary_key, 'forecast_date')]
+    columns = ['forecast_date'] + (['Location'] if has_names else []) + metric_columns
+    if add_coordinates:
+        columns += ['latitude', 'longitude']
+    
+    return summary_df[columns].reset_index(drop=True)
+
+
 def main():
     def _valid_lat(value: str) -> float:
         try:
@@ -253,19 +732,61 @@ def main():
     parser.add_argument("--location", type=str, default=None,
                       help="Optional value for Location column to key output, to enable combining with other locations")
 
+    parser.add_argument("--source", choices=["dwml", "gridpoints"], default="dwml",
+                        help="forecast source: the digital.weather.gov DWML XML service (default) or api.weather.gov gridpoints JSON")
+
+    parser.add_argument("--base-url", dest="base_url", default=None,
+                        help=f"URL of the forecast service, defaults to {NDFD_XML_CLIENT_URL} for dwml or https://api.weather.gov for gridpoints")
+
+    parser.add_argument("--hourly", action="store_true",
+                        help="output the hourly forecast instead of the daily summary (dwml source only)")
+
+    parser.add_argument("--profile", choices=["text", "json", "prometheus"], nargs="?", const="text", default=None,
+                        help="print timing and counter breakdown to stderr, optionally as json or prometheus")
+
+    parser.add_argument("--profile-memory", dest="profile_memory", action="store_true",
+                        help="also record peak memory of each step with tracemalloc, which slows the timings down")
+
     args = parser.parse_args()
 
+    if args.profile_memory and not args.profile:
+        args.profile = "text"
+    if args.profile:
+        instrumentation.enable(trace_memory=args.profile_memory)
+
+    if args.hourly and args.source == "gridpoints":
+        parser.error("--hourly is only available for the dwml source")
+
+    if args.source == "gridpoints":
+        from .gridpoints_api import gridpoint_daily_forecast_summary, API_WEATHER_GOV_URL
+        summary_function = gridpoint_daily_forecast_summary
+        base_url = args.base_url or API_WEATHER_GOV_URL
+    else:
+        summary_function = daily_forecast_summary
+        base_url = args.base_url or NDFD_XML_CLIENT_URL
 
     try:
-        daily_forecast_df = daily_forecast_summary(lat=args.latitude, 
-                                                   lon = args.longitude, 
-                                                   hourly_weather=None, location_name=args.location)
+        if args.hourly:
+            daily_forecast_df = hourly_forecast(lat=args.latitude, lon=args.longitude, location_name=args.location,
+                                                base_url=base_url, user_agent=args.user_agent)
+        else:
+            daily_forecast_df = summary_function(lat=args.latitude, 
+                                                 lon = args.longitude, 
+                                                 hourly_weather=None, location_name=args.location,
+                                                 base_url=base_url, user_agent=args.user_agent)
     except Exception as exc:
         print(f"Error retrieving forecast: {exc}", file=sys.stderr)
         sys.exit(2)
 
     # print CSV to stdout
     print(daily_forecast_df.to_csv(index=False))
+
+    if args.profile == "json":
+        print(instrumentation.to_json(), file=sys.stderr)
+    elif args.profile == "prometheus":
+        print(instrumentation.to_prometheus(), file=sys.stderr)
+    elif args.profile:
+        print(instrumentation.report(), file=sys.stderr)
     
 if __name__ == "__main__":
     main()
@@ -0,0 +1,182 @@
+"""asyncio versions of daily_forecast_summary and daily_forecast_summary_batch, for
+use inside an event loop (e.g. a web service) without blocking it.
+
+Requests are made with aiohttp (an optional dependency, pip install 'ewxndfd[async]'),
+sharing one connection pool, with a semaphore limiting how many are in flight at once.
+Parsing the XML and summarizing are CPU bound and run in an executor so the event
+loop can keep serving other requests.
+
+example usage:
+
+    from ewxndfd.ndfd_forecast_async import async_daily_forecast_summary, ndfd_client_session
+
+    async with ndfd_client_session() as session:
+        df = await async_daily_forecast_summary(42.73, -84.55, session=session)
+"""
+
+import asyncio
+import contextlib
+import functools
+
+from . import instrumentation
+from .ndfd_forecast_api import (
+    DEFAULT_USER_AGENT,
+    NDFD_XML_CLIENT_URL,
+    cell_request_latlon,
+    group_points_by_cell,
+    ndfd_forecast_request_url,
+    parse_ndfd_forecast_xml,
+    summarize_cell_forecasts,
+    xml_metric_frames,
+)
+
+# requests in flight at once for a batch, and connections in the pool of a session
+DEFAULT_CONCURRENCY = 20
+
+
+def _import_aiohttp():
+    try:
+        import aiohttp
+    except ImportError as e:
+        raise ImportError("the async NDFD client requires aiohttp, install with pip install 'ewxndfd[async]'") from e
+    return aiohttp
+
+
+def ndfd_client_session(user_agent = DEFAULT_USER_AGENT, concurrency = DEFAULT_CONCURRENCY, timeout = 60):
+    """aiohttp session to share between calls, for example for the life of an application.
+    The connection pool size limits requests in flight across all calls using the session
+
+    Args:
+        user_agent (str, optional): User-Agent header to send with requests.
+        concurrency (int, optional): maximum open connections. Defaults to DEFAULT_CONCURRENCY.
+        timeout (float, optional): total seconds allowed for each request. Defaults to 60.
+
+    Returns:
+        aiohttp.ClientSession: session, close it or use it with async with
+    """
+    aiohttp = _import_aiohttp()
+    return aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(limit=concurrency),
+        headers={"User-Agent": user_agent},
+        timeout=aiohttp.ClientTimeout(total=timeout),
+    )
+
+
+@contextlib.asynccontextmanager
+async def _session_or_new(session, user_agent, concurrency):
+    """use the given session, or create one that is closed on exit"""
+    if session is not None:
+        yield session
+        return
+    async with ndfd_client_session(user_agent=user_agent, concurrency=concurrency) as new_session:
+        yield new_session
+
+
+async def async_request_ndfd_digital_forecast(session, lat, lon, base_url = NDFD_XML_CLIENT_URL, semaphore = None):
+    """get the NDFD forecast XML text for a coordinate without blocking the event loop
+
+    Args:
+        session (aiohttp.ClientSession): session to make the request with
+        lat (float): latitude in decimal degrees
+        lon (float): longitude in decimal degrees
+        base_url (str, optional): URL of the ndfdXMLclient.php service.
+        semaphore (asyncio.Semaphore, optional): held while the request is in flight. Defaults to None.
+
+    Returns:
+        str: response text
+    """
+    forecast_url = ndfd_forecast_request_url(lat, lon, base_url=base_url)
+
+    async with (semaphore if semaphore is not None else contextlib.nullcontext()):
+        with instrumentation.span("async_request_ndfd_digital_forecast"):
+            async with session.get(forecast_url) as resp:
+                content = await resp.read()
+
+    instrumentation.count("bytes_downloaded", len(content))
+    return content.decode('utf-8', errors='replace')
+
+
+def parse_forecast_metric_frames(xml_text):
+    """parse forecast XML text into the values of each metric, the CPU bound part of
+    fetching a cell.  Module level so it can run in a ProcessPoolExecutor"""
+    return xml_metric_frames(parse_ndfd_forecast_xml(xml_text))
+
+
+async def async_daily_forecast_summary(lat, lon, hourly_weather = None, location_name = None, add_coordinates=True,
+                                       base_url = NDFD_XML_CLIENT_URL, user_agent = DEFAULT_USER_AGENT, cache = None,
+                                       session = None, executor = None):
+    """daily summary of the NDFD forecast for a coordinate, the async version of
+    ndfd_forecast_api.daily_forecast_summary
+
+    Args:
+        lat (float): latitude in decimal degrees
+        lon (float): longitude in decimal degrees
+        hourly_weather (pd.DataFrame, optional): observed hourly weather, see daily_forecast_summary.
+        location_name (str, optional): value for a Location column. Defaults to None.
+        add_coordinates (bool, optional): add latitude and longitude columns. Defaults to True.
+        base_url (str, optional): URL of the ndfdXMLclient.php service.
+        user_agent (str, optional): User-Agent header, only used when a session is not given.
+        cache (NDFDForecastCache, optional): cache of forecasts by grid cell. Defaults to None.
+        session (aiohttp.ClientSession, optional): shared session. Defaults to None, a new session.
+        executor (concurrent.futures.Executor, optional): executor for parsing and
+            summarizing. Defaults to None, the event loop's default thread pool.
+
+    Returns:
+        pd.DataFrame: daily summary with a forecast_date column
+    """
+    # a batch of one point, so the grid cell center is requested as in daily_forecast_summary
+    return await async_daily_forecast_summary_batch([(lat, lon, location_name)], hourly_weather=hourly_weather,
+                                                    add_coordinates=add_coordinates, base_url=base_url,
+                                                    user_agent=user_agent, cache=cache, session=session,
+                                                    executor=executor)
+
+
+async def async_daily_forecast_summary_batch(points, hourly_weather = None, add_coordinates=True,
+                                             base_url = NDFD_XML_CLIENT_URL, user_agent = DEFAULT_USER_AGENT,
+                                             grid_map = None, cache = None, session = None,
+                                             concurrency = DEFAULT_CONCURRENCY, executor = None):
+    """daily forecast summaries for many points, the async version of
+    ndfd_forecast_api.daily_forecast_summary_batch.  The forecast for each grid cell is
+    requested concurrently, at most concurrency at a time, and parsed in the executor
+    as each response arrives
+
+    Args:
+        points (list): list of (lat, lon) or (lat, lon, location_name) tuples
+        hourly_weather (pd.DataFrame, optional): observed hourly weather, see daily_forecast_summary_batch.
+        add_coordinates (bool, optional): add latitude and longitude columns. Defaults to True.
+        base_url (str, optional): URL of the ndfdXMLclient.php service.
+        user_agent (str, optional): User-Agent header, only used when a session is not given.
+        grid_map (GridCellMap, optional): point to grid cell mapping. Defaults to None.
+        cache (NDFDForecastCache, optional): cache of forecasts by grid cell. Defaults to None.
+        session (aiohttp.ClientSession, optional): shared session. Defaults to None, a new session.
+        concurrency (int, optional): maximum requests in flight. Defaults to DEFAULT_CONCURRENCY.
+        executor (concurrent.futures.Executor, optional): executor for parsing. Defaults to
+            None, the event loop's default thread pool.  Summarizing always uses the default pool.
+
+    Returns:
+        pd.DataFrame: daily summaries for all points, in the order of points
+    """
+    loop = asyncio.get_running_loop()
+    # looking up cells and saving the grid map read and write files, keep them off the loop
+    cell_points = await loop.run_in_executor(None, group_points_by_cell, points, grid_map)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def cell_metric_frames(session, cell):
+        xml_text = cache.get(cell) if cache is not None else None
+        if xml_text is None:
+            lat, lon = cell_request_latlon(cell)
+            xml_text = await async_request_ndfd_digital_forecast(session, lat, lon, base_url=base_url,
+                                                                 semaphore=semaphore)
+            metric_frames = await loop.run_in_executor(executor, parse_forecast_metric_frames, xml_text)
+            # only cache forecasts that parsed
+            if cache is not None:
+                cache.put(cell, xml_text)
+            return metric_frames
+        return await loop.run_in_executor(executor, parse_forecast_metric_frames, xml_text)
+
+    async with _session_or_new(session, user_agent, concurrency) as session:
+        all_metric_frames = await asyncio.gather(*(cell_metric_frames(session, cell) for cell in cell_points))
+
+    summarize = functools.partial(summarize_cell_forecasts, points, cell_points, list(all_metric_frames),
+                                  hourly_weather=hourly_weather, add_coordinates=add_coordinates)
+    return await loop.run_in_executor(None, summarize)
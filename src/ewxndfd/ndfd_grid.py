@@ -0,0 +1,145 @@
+"""map coordinates to cells of the NDFD CONUS 2.5 km grid, so that points in the
+same grid cell (which always get the same forecast) can share one request
+
+The NDFD CONUS grid is a Lambert conformal conic projection on a sphere, with
+parameters from the NDFD GRIB2 grid definition:
+https://vlab.noaa.gov/web/mdl/ndfd-grid-data
+"""
+
+import json
+import math
+import os
+
+import numpy as np
+
+# NDFD CONUS 2.5 km grid definition
+NDFD_EARTH_RADIUS_M = 6371200.0
+NDFD_GRID_NX = 2145
+NDFD_GRID_NY = 1377
+NDFD_GRID_LAT1 = 20.191999   # latitude of the first (lower left) grid point
+NDFD_GRID_LON1 = -121.554001  # longitude of the first grid point (238.445999 E)
+NDFD_GRID_LOV = -95.0        # orientation longitude (265 E)
+NDFD_GRID_LATIN = 25.0       # tangent latitude (Latin1 = Latin2)
+NDFD_GRID_DX_M = 2539.703    # grid spacing, same in x and y
+
+_N = math.sin(math.radians(NDFD_GRID_LATIN))
+_F = math.cos(math.radians(NDFD_GRID_LATIN)) * math.tan(math.pi / 4 + math.radians(NDFD_GRID_LATIN) / 2) ** _N / _N
+
+
+def _project(lat, lon):
+    """forward lambert conformal projection to x,y meters (origin at the pole)"""
+    lat = np.radians(np.asarray(lat, dtype=float))
+    lon = np.asarray(lon, dtype=float)
+    rho = NDFD_EARTH_RADIUS_M * _F / np.tan(np.pi / 4 + lat / 2) ** _N
+    theta = _N * np.radians(lon - NDFD_GRID_LOV)
+    return (rho * np.sin(theta), -rho * np.cos(theta))
+
+
+_X1, _Y1 = _project(NDFD_GRID_LAT1, NDFD_GRID_LON1)
+
+
+def latlon_to_grid_cell(lat, lon):
+    """grid cell (i, j) containing a coordinate, with 0-based indices from the lower
+    left of the grid.  Accepts scalars or arrays.  Cells outside the grid are -1, -1
+
+    Args:
+        lat (float or array): latitude in decimal degrees
+        lon (float or array): longitude in decimal degrees (negative west)
+
+    Returns:
+        tuple: (i, j) ints for scalar input, int arrays for array input
+    """
+    x, y = _project(lat, lon)
+    i = np.rint((x - _X1) / NDFD_GRID_DX_M).astype(int)
+    j = np.rint((y - _Y1) / NDFD_GRID_DX_M).astype(int)
+
+    outside = (i < 0) | (i >= NDFD_GRID_NX) | (j < 0) | (j >= NDFD_GRID_NY)
+    i = np.where(outside, -1, i)
+    j = np.where(outside, -1, j)
+
+    if i.ndim == 0:
+        return (int(i), int(j))
+    return (i, j)
+
+
+def grid_cell_to_latlon(i, j):
+    """coordinate of the center of a grid cell, the inverse of latlon_to_grid_cell
+
+    Args:
+        i (int or array): 0-based column index
+        j (int or array): 0-based row index
+
+    Returns:
+        tuple: (lat, lon) in decimal degrees
+    """
+    x = _X1 + np.asarray(i, dtype=float) * NDFD_GRID_DX_M
+    y = _Y1 + np.asarray(j, dtype=float) * NDFD_GRID_DX_M
+    rho = np.sqrt(x ** 2 + y ** 2)
+    theta = np.arctan2(x, -y)
+    lat = np.degrees(2 * np.arctan((NDFD_EARTH_RADIUS_M * _F / rho) ** (1 / _N)) - np.pi / 2)
+    lon = NDFD_GRID_LOV + np.degrees(theta / _N)
+
+    if lat.ndim == 0:
+        return (float(lat), float(lon))
+    return (lat, lon)
+
+
+class GridCellMap():
+    """persistent mapping of coordinates to NDFD grid cells
+
+    Coordinates are rounded to 4 decimals (about 10 m) for the key, so the same
+    point with floating point differences maps to the same cell without
+    computing the projection again.  Cells can also be learned from another source
+    with learn(), which takes priority over the projection.
+    """
+
+    KEY_DECIMALS = 4
+
+    def __init__(self, path:str=None):
+        """load the mapping from path if it exists
+
+        Args:
+            path (str, optional): JSON file to persist the mapping. Defaults to None, in-memory only.
+        """
+        self.path = path
+        self.cells = {}
+        if path is not None and os.path.exists(path):
+            with open(path, 'r') as f:
+                self.cells = {k: tuple(v) for k, v in json.load(f).items()}
+        self._modified = False
+
+    def _key(self, lat:float, lon:float)->str:
+        return f"{round(float(lat), self.KEY_DECIMALS)},{round(float(lon), self.KEY_DECIMALS)}"
+
+    def cell(self, lat:float, lon:float)->tuple:
+        """grid cell for a coordinate, from the mapping or computed and remembered
+
+        Args:
+            lat (float): latitude in decimal degrees
+            lon (float): longitude in decimal degrees
+
+        Returns:
+            tuple: (i, j) grid cell, (-1, -1) if outside the NDFD grid
+        """
+        key = self._key(lat, lon)
+        cell = self.cells.get(key)
+        if cell is None:
+            cell = latlon_to_grid_cell(lat, lon)
+            self.cells[key] = cell
+            self._modified = True
+        return cell
+
+    def learn(self, lat:float, lon:float, cell:tuple):
+        """record the grid cell for a coordinate, overriding the computed cell"""
+        self.cells[self._key(lat, lon)] = tuple(cell)
+        self._modified = True
+
+    def save(self):
+        """write the mapping to path, if there is one and anything changed"""
+        if self.path is None or not self._modified:
+            return
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({k: list(v) for k, v in self.cells.items()}, f)
+        os.replace(tmp_path, self.path)
+        self._modified = False
@@ -0,0 +1,135 @@
+"""output adapters for forecast tables and NDFD cycle arrays: pyarrow Tables,
+Polars DataFrames and xarray Datasets, selected with format= on
+NDFD.get_forecast and daily_forecast_summary
+
+Cycle arrays are converted to a long Arrow table (station, valid_start,
+valid_end, value, flags) without copying the values: the value and flag columns
+are views of the numpy arrays and stations are dictionary encoded.  Polars reads
+the Arrow buffers as they are.  The xarray Dataset (station x valid_start) wraps
+the numpy arrays directly.
+
+pyarrow, polars and xarray are optional dependencies, imported when used.
+"""
+
+import numpy as np
+import pandas as pd
+
+OUTPUT_FORMATS = ("pandas", "arrow", "polars", "xarray")
+
+
+def _import_optional(module_name:str, extra:str):
+    try:
+        return __import__(module_name)
+    except ImportError as e:
+        raise ImportError(f"format requires {module_name}, install with pip install 'ewxndfd[{extra}]'") from e
+
+
+def _check_format(format:str, formats=OUTPUT_FORMATS):
+    if format not in formats:
+        raise ValueError(f"Invalid format: {format}, use one of {', '.join(formats)}")
+
+
+def cycle_array_to_arrow(cycle_array):
+    """long Arrow table of a cycle array, one row per station and valid time
+
+    Args:
+        cycle_array (NDFDCycleArray): arrays from ewx.ndfd_array
+
+    Returns:
+        pyarrow.Table: columns station (dictionary), valid_start, valid_end (utc timestamps),
+            value (NaN for masked values) and flags if the array has QC flags
+    """
+    pa = _import_optional("pyarrow", "arrow")
+    n_stations, n_columns = cycle_array.values.shape
+
+    station_index = np.repeat(np.arange(n_stations, dtype=np.int32), n_columns)
+    station = pa.DictionaryArray.from_arrays(pa.array(station_index), pa.array(cycle_array.stations.astype(str)))
+    timestamp = pa.timestamp('s', tz='UTC')
+    valid_start = pa.array(np.tile(cycle_array.valid_start.astype('datetime64[s]').view('i8'), n_stations),
+                           type=pa.int64()).view(timestamp)
+    valid_end = pa.array(np.tile(cycle_array.valid_end.astype('datetime64[s]').view('i8'), n_stations),
+                         type=pa.int64()).view(timestamp)
+
+    # C ordered (station, column) matrices flatten to the row order without a copy
+    columns = {
+        'station': station,
+        'valid_start': valid_start,
+        'valid_end': valid_end,
+        'value': pa.array(np.ascontiguousarray(cycle_array.values, dtype=float).reshape(-1)),
+    }
+    if getattr(cycle_array, 'flags', None) is not None:
+        columns['flags'] = pa.array(np.ascontiguousarray(cycle_array.flags).reshape(-1))
+    table = pa.table(columns)
+    return table.replace_schema_metadata({
+        'variable_type': cycle_array.variable_type,
+        'cycle': cycle_array.cycle.isoformat(),
+    })
+
+
+def cycle_array_to_xarray(cycle_array):
+    """xarray Dataset of a cycle array with dimensions station and valid_start,
+    wrapping the numpy arrays without a copy
+
+    Args:
+        cycle_array (NDFDCycleArray): arrays from ewx.ndfd_array
+
+    Returns:
+        xarray.Dataset: the variable type as a data variable, and flags if there are QC flags
+    """
+    xr = _import_optional("xarray", "xarray")
+    data_vars = {cycle_array.variable_type: (('station', 'valid_start'), cycle_array.values)}
+    if getattr(cycle_array, 'flags', None) is not None:
+        data_vars['flags'] = (('station', 'valid_start'), cycle_array.flags)
+    return xr.Dataset(
+        data_vars,
+        coords={
+            'station': cycle_array.stations,
+            'valid_start': cycle_array.valid_start,
+            'valid_end': ('valid_start', cycle_array.valid_end),
+        },
+        attrs={'variable_type': cycle_array.variable_type, 'cycle': cycle_array.cycle.isoformat()},
+    )
+
+
+def cycle_array_to_format(cycle_array, format:str):
+    """convert a cycle array to one of OUTPUT_FORMATS, pandas is a long DataFrame
+    like the Arrow table"""
+    _check_format(format)
+    if format == "xarray":
+        return cycle_array_to_xarray(cycle_array)
+    table = cycle_array_to_arrow(cycle_array)
+    if format == "arrow":
+        return table
+    if format == "polars":
+        pl = _import_optional("polars", "polars")
+        return pl.from_arrow(table)
+    return table.to_pandas()
+
+
+def dataframe_to_format(df:pd.DataFrame, format:str, index_columns:list[str]=None):
+    """convert a forecast table (e.g. a daily summary) to one of OUTPUT_FORMATS
+
+    Args:
+        df (pd.DataFrame): table to convert
+        format (str): output format
+        index_columns (list[str], optional): dimensions for xarray, e.g. ['Location', 'forecast_date'].
+            Defaults to None, the first column.
+
+    Returns:
+        the table as pandas, pyarrow.Table, polars.DataFrame or xarray.Dataset
+    """
+    _check_format(format)
+    if format == "pandas":
+        return df
+    if format == "xarray":
+        _import_optional("xarray", "xarray")
+        if index_columns is None:
+            index_columns = [df.columns[0]]
+        return df.set_index(index_columns).to_xarray()
+
+    pa = _import_optional("pyarrow", "arrow")
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    if format == "arrow":
+        return table
+    pl = _import_optional("polars", "polars")
+    return pl.from_arrow(table)
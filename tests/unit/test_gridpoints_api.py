@@ -0,0 +1,110 @@
+import datetime
+import numpy as np
+import pandas as pd
+import pytest
+
+from ewxndfd.gridpoints_api import expand_valid_times, split_valid_times, gridpoint_daily_summary
+
+
+@pytest.fixture
+def grid_data():
+    return {
+        'properties': {
+            'relativeHumidity': {'uom': 'wmoUnit:percent', 'values': [
+                {'validTime': '2025-12-08T19:00:00+00:00/PT3H', 'value': 91},
+                {'validTime': '2025-12-08T22:00:00+00:00/PT6H', 'value': 80},
+                {'validTime': '2025-12-09T04:00:00+00:00/P1DT2H', 'value': 60},
+            ]},
+            'quantitativePrecipitation': {'uom': 'wmoUnit:mm', 'values': [
+                {'validTime': '2025-12-08T18:00:00+00:00/PT6H', 'value': 6.0},
+                {'validTime': '2025-12-09T00:00:00+00:00/PT6H', 'value': 12.0},
+            ]},
+            'minTemperature': {'uom': 'wmoUnit:degC', 'values': [
+                {'validTime': '2025-12-09T00:00:00+00:00/PT14H', 'value': -12.2},
+            ]},
+            'maxTemperature': {'uom': 'wmoUnit:degF', 'values': [
+                {'validTime': '2025-12-09T12:00:00+00:00/PT13H', 'value': 32.0},
+            ]},
+        }
+    }
+
+
+def test_split_valid_times():
+    starts, hours = split_valid_times(['2025-12-08T19:00:00+00:00/PT3H', '2025-12-08T19:00:00+00:00/P7DT9H',
+                                       '2025-12-09T00:00:00+00:00/P1D', '2025-12-09T00:00:00+00:00/PT30M'])
+    assert list(hours) == [3, 177, 24, 1]
+    assert starts[0] == pd.Timestamp('2025-12-08T19:00:00Z')
+
+
+def test_expand_valid_times_hourly(grid_data):
+    values = grid_data['properties']['relativeHumidity']['values']
+    df = expand_valid_times(values)
+    assert len(df) == 3 + 6 + 26
+    assert df['forecast_time'].is_monotonic_increasing
+    assert (df['forecast_time'].diff().dropna() == pd.Timedelta(hours=1)).all()
+    assert list(df['value'][:4]) == [91, 91, 91, 80]
+
+
+def test_expand_valid_times_accumulated(grid_data):
+    values = grid_data['properties']['quantitativePrecipitation']['values']
+    df = expand_valid_times(values, accumulated=True)
+    assert len(df) == 12
+    assert np.isclose(df['value'].sum(), 18.0)
+    assert df['value'].iloc[0] == 1.0
+
+
+def test_gridpoint_daily_summary_matches_xml_columns(grid_data):
+    df = gridpoint_daily_summary(grid_data, 'America/Detroit')
+    assert list(df.columns) == ['Maximum Relative Humidity (percent)', 'Minimum Relative Humidity (percent)',
+                                'Total Liquid Precipitation Amount (centimeters)',
+                                'Daily Minimum Temperature (Celsius)', 'Daily Maximum Temperature (Celsius)']
+    dec8 = datetime.date(2025, 12, 8)
+    dec9 = datetime.date(2025, 12, 9)
+    # 00Z on the 9th is still the 8th in Michigan
+    assert df.loc[dec8, 'Daily Minimum Temperature (Celsius)'] == -12.2
+    assert df.loc[dec9, 'Daily Maximum Temperature (Celsius)'] == 0.0
+    # 18Z-05Z on the 8th local, 6 mm + 5/6 of 12 mm
+    assert np.isclose(df.loc[dec8, 'Total Liquid Precipitation Amount (centimeters)'], 1.6)
+    assert df.loc[dec8, 'Maximum Relative Humidity (percent)'] == 91
+
+
+def test_gridpoint_summary_with_observed_weather(grid_data):
+    from ewxndfd.gridpoints_api import gridpoint_observed_daily_summary
+
+    # hours before the first forecast time, 19Z (14:00 local) on the 8th
+    observed_times = pd.date_range('2025-12-08 10:00', periods=4, freq='h')
+    hourly_weather = pd.DataFrame({'relative_humidity': [99.0, 95.0, 90.0, 85.0],
+                                   'precipitation': [0.1, 0.0, 0.0, 0.0],
+                                   'Location': 'LAN'}, index=observed_times)
+    forecast_only = gridpoint_daily_summary(grid_data, 'America/Detroit')
+    df = gridpoint_observed_daily_summary(grid_data, 'America/Detroit', hourly_weather, location_name='LAN')
+
+    dec8 = datetime.date(2025, 12, 8)
+    assert list(df.columns) == list(forecast_only.columns)
+    assert df.loc[dec8, 'Maximum Relative Humidity (percent)'] == 99.0
+    assert np.isclose(df.loc[dec8, 'Total Liquid Precipitation Amount (centimeters)'],
+                      forecast_only.loc[dec8, 'Total Liquid Precipitation Amount (centimeters)'] + 0.1)
+
+    # observations of other locations are not used
+    other = gridpoint_observed_daily_summary(grid_data, 'America/Detroit', hourly_weather, location_name='GRR')
+    pd.testing.assert_frame_equal(other, forecast_only, check_names=False)
+
+
+def test_gridpoint_daily_forecast_summary_formats(grid_data, monkeypatch):
+    pa = pytest.importorskip("pyarrow")
+    from ewxndfd import gridpoints_api
+
+    requests = []
+    def request_gridpoint_forecast(lat, lon, **kwargs):
+        requests.append((lat, lon))
+        return (grid_data, 'America/Detroit')
+    monkeypatch.setattr(gridpoints_api, 'request_gridpoint_forecast', request_gridpoint_forecast)
+
+    summary_df = gridpoints_api.gridpoint_daily_forecast_summary(42.73, -84.55, location_name='LAN')
+    table = gridpoints_api.gridpoint_daily_forecast_summary(42.73, -84.55, location_name='LAN', format='arrow')
+    assert isinstance(table, pa.Table)
+    assert table.column_names == list(summary_df.columns)
+
+    with pytest.raises(ValueError):
+        gridpoints_api.gridpoint_daily_forecast_summary(42.73, -84.55, format='excel')
+    assert len(requests) == 2
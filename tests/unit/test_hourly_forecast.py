@@ -0,0 +1,62 @@
+from datetime import datetime, timezone
+import xml.etree.ElementTree as ET
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from ewxndfd import ndfd_forecast_api as ndfd
+from ewxndfd.mock_ndfd_server import MockNDFDServer, dwml_for_points
+
+
+@pytest.fixture
+def dwml_root():
+    now = datetime(2025, 12, 12, 14, 30, tzinfo=timezone.utc)
+    return ET.fromstring(dwml_for_points([ndfd.LANSING_LAT_LON], now=now))
+
+
+def test_construct_url_includes_hourly_temperature():
+    url = ndfd.construct_ndfd_digital_forecast_url(42.73, -84.55)
+    assert 'temp=temp' in url
+
+
+def test_time_layout_index(dwml_root):
+    layouts = ndfd.time_layout_index(dwml_root)
+    starts, ends = layouts['k-p1h-n64-3']
+    assert len(starts) == 64
+    assert ends is None
+    # utc, first hour after 09:30 local
+    assert starts[0] == np.datetime64('2025-12-12T15:00')
+    starts, ends = layouts['k-p6h-n12-4']
+    assert ((ends - starts) == np.timedelta64(6, 'h')).all()
+
+
+def test_hourly_forecast_from_xml(dwml_root):
+    hourly_df = ndfd.hourly_forecast_from_xml(dwml_root)
+    assert str(hourly_df.index.tz) == 'UTC'
+    assert hourly_df.index.is_monotonic_increasing and hourly_df.index.is_unique
+    assert list(hourly_df.columns) == [
+        'Temperature (Celsius)',
+        'Relative Humidity (percent)',
+        'Wind Speed (meters/second)',
+        'Liquid Precipitation Amount (centimeters)',
+    ]
+    assert hourly_df['Temperature (Celsius)'].notna().sum() == 64
+
+    # 6 hour totals are split evenly over their hours, keeping the total
+    qpf = dwml_root.find('.//precipitation[@type="liquid"]')
+    qpf_total = sum(float(v.text) for v in qpf.findall('value'))
+    assert hourly_df['Liquid Precipitation Amount (centimeters)'].sum() == pytest.approx(qpf_total)
+    assert hourly_df['Liquid Precipitation Amount (centimeters)'].notna().sum() == 12 * 6
+
+
+def test_daily_and_hourly_forecast_one_request():
+    lat, lon = ndfd.LANSING_LAT_LON
+    with MockNDFDServer() as server:
+        summary_df, hourly_df = ndfd.daily_and_hourly_forecast(lat, lon, location_name='LAN', base_url=server.url)
+        assert server.request_count == 1
+        expected = ndfd.hourly_forecast(lat, lon, location_name='LAN', base_url=server.url)
+
+    pd.testing.assert_frame_equal(hourly_df, expected)
+    assert list(hourly_df.columns[:2]) == ['forecast_time', 'Location']
+    assert 'Daily Minimum Temperature (Celsius)' in summary_df.columns
@@ -0,0 +1,87 @@
+import json
+import pytest
+
+from ewxndfd import instrumentation
+from ewxndfd import ndfd_forecast_api as ndfd
+from ewxndfd.instrumentation import Instrumentation
+from ewxndfd.ewx.mint_ndfd import NDFDMinT
+from ewxndfd.mock_ndfd_server import MockNDFDServer
+
+
+@pytest.fixture
+def enabled_instrumentation():
+    instrumentation.reset()
+    instrumentation.enable()
+    yield instrumentation
+    instrumentation.disable()
+    instrumentation.reset()
+
+
+def test_disabled_records_nothing():
+    instr = Instrumentation()
+    with instr.span("x"):
+        pass
+    instr.count("rows_parsed", 10)
+    assert instr.to_dict() == {"spans": {}, "counters": {}}
+
+
+def test_spans_counters_and_exports():
+    instr = Instrumentation()
+    instr.enable(trace_memory=True)
+    with instr.span("outer"):
+        with instr.span("inner"):
+            data = [0] * 100000
+    instr.count("rows_parsed", 3)
+    instr.count("rows_parsed", 2)
+    instr.disable()
+
+    d = instr.to_dict()
+    assert d["counters"]["rows_parsed"] == 5
+    assert d["spans"]["inner"]["calls"] == 1
+    # outer span includes the memory allocated in the inner span
+    assert d["spans"]["outer"]["peak_memory_bytes"] >= d["spans"]["inner"]["peak_memory_bytes"] > 0
+    assert json.loads(instr.to_json()) == d
+
+    prom = instr.to_prometheus()
+    assert 'ewxndfd_span_calls_total{span="inner"} 1' in prom
+    assert "ewxndfd_rows_parsed_total 5" in prom
+    assert "inner" in instr.report()
+
+
+def test_forecast_pipeline_is_instrumented(enabled_instrumentation, sample_dir, sample_datetime):
+    with MockNDFDServer() as server:
+        ndfd.daily_forecast_summary(*ndfd.LANSING_LAT_LON, base_url=server.url)
+
+    n = NDFDMinT(str(sample_dir))
+    n._wide_to_long(n.get_forecast(local_datetime=sample_datetime))
+
+    d = enabled_instrumentation.to_dict()
+    for name in ["request_ndfd_digital_forecast", "parse_xml", "aggregate_humidity",
+                 "aggregate_max_temperature", "ndfd_read", "ndfd_wide_to_long"]:
+        assert d["spans"][name]["calls"] == 1
+    assert d["counters"]["bytes_downloaded"] > 0
+    assert d["counters"]["rows_parsed"] > 96
+
+
+def test_memory_spans_in_interleaved_async_tasks():
+    import asyncio
+
+    instr = Instrumentation()
+    instr.enable(trace_memory=True)
+
+    async def task(name, size):
+        with instr.span(name):
+            await asyncio.sleep(0)
+            data = [0] * size
+            await asyncio.sleep(0)
+        return len(data)
+
+    async def run_tasks():
+        # spans of the two tasks are entered and exited in interleaved order
+        return await asyncio.gather(task("small", 1000), task("large", 200000))
+
+    asyncio.run(run_tasks())
+    instr.disable()
+    spans = instr.to_dict()["spans"]
+    assert spans["small"]["calls"] == spans["large"]["calls"] == 1
+    assert spans["large"]["peak_memory_bytes"] > 0
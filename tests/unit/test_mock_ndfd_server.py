@@ -0,0 +1,50 @@
+import xml.etree.ElementTree as ET
+import pandas as pd
+import pytest
+import requests
+
+from ewxndfd import ndfd_forecast_api as ndfd
+from ewxndfd.mock_ndfd_server import MockNDFDServer, dwml_for_points
+
+
+@pytest.fixture
+def mock_server():
+    with MockNDFDServer() as server:
+        yield server
+
+
+def test_dwml_for_points_has_location_per_point():
+    root = ET.fromstring(dwml_for_points([(42.73, -84.55), (43.0, -85.0)], ['maxt', 'rh']))
+    assert len(root.findall('.//location')) == 2
+    assert len(root.findall('.//parameters')) == 2
+    assert root.find('.//humidity').get('time-layout') == 'k-p1h-n64-3'
+    assert root.find('.//precipitation') is None
+
+
+def test_daily_forecast_summary_from_mock_server(mock_server):
+    lat, lon = ndfd.LANSING_LAT_LON
+    df = ndfd.daily_forecast_summary(lat, lon, location_name='LAN', base_url=mock_server.url)
+    assert isinstance(df, pd.DataFrame)
+    assert df.shape[0] >= 7
+    assert 'Maximum Relative Humidity (percent)' in df.columns
+    assert 'Daily Minimum Temperature (Celsius)' in df.columns
+    assert (df['Location'] == 'LAN').all()
+    assert mock_server.request_count == 1
+
+
+def test_mock_server_error_injection():
+    lat, lon = ndfd.LANSING_LAT_LON
+    with MockNDFDServer(error_rate=1.0) as server:
+        with pytest.raises(ValueError):
+            ndfd.daily_forecast_summary(lat, lon, base_url=server.url)
+
+    with MockNDFDServer(error_rate=1.0, error_mode='http') as server:
+        response = ndfd.request_ndfd_digital_forecast(lat, lon, base_url=server.url)
+        assert response.status_code == 500
+
+
+def test_mock_server_list_lat_lon(mock_server):
+    response = requests.get(mock_server.url, params={'listLatLon': '42.73,-84.55 43.00,-85.00', 'maxt': 'maxt'})
+    root = ET.fromstring(response.text)
+    points = [p.get('latitude') for p in root.findall('.//point')]
+    assert points == ['42.73', '43.00']
@@ -0,0 +1,107 @@
+from datetime import datetime, timezone
+
+import numpy as np
+import pytest
+
+from ewxndfd.ewx.ndfd_alerts import AlertEngine, AlertRule, CycleExtremes
+from ewxndfd.ewx.ndfd_array import read_cycle_bundle
+
+CYCLE = datetime(2025, 11, 19, 6, tzinfo=timezone.utc)
+NEXT_CYCLE = datetime(2025, 11, 19, 12, tzinfo=timezone.utc)
+
+RULES = [
+    AlertRule("frost", "mint", "<=", -2.0, lead_hours=72),
+    AlertRule("freeze", "mint", "<", -4.0, lead_hours=(24, 96)),
+    AlertRule("rain", "qpf6", ">=", 0.5, lead_hours=48, aggregate="sum"),
+]
+
+
+@pytest.fixture
+def bundle(sample_dir):
+    return read_cycle_bundle(str(sample_dir), CYCLE, variables=['mint', 'qpf6'])
+
+
+def window_slow(cycle_array, start, end):
+    """the values of columns ending within the window, looping over columns"""
+    cycle = np.datetime64(cycle_array.cycle.replace(tzinfo=None), 's')
+    columns = [c for c, valid_end in enumerate(cycle_array.valid_end)
+               if start < (valid_end - cycle) / np.timedelta64(1, 'h') <= end]
+    return cycle_array.values[:, columns]
+
+
+def test_window_values_match_direct_reduction(bundle):
+    for variable_type, aggregate, reduce in [('mint', 'min', np.nanmin), ('mint', 'max', np.nanmax),
+                                             ('qpf6', 'sum', np.nansum)]:
+        extremes = CycleExtremes(bundle[variable_type])
+        for start, end in [(0, 24), (0, 72), (24, 96), (12, 30)]:
+            window = window_slow(bundle[variable_type], start, end)
+            expected = reduce(window, axis=1) if window.shape[1] else np.full(window.shape[0], np.nan)
+            np.testing.assert_allclose(extremes.window_values(aggregate, start, end), expected)
+
+
+def test_evaluate_rules(bundle):
+    engine = AlertEngine(RULES)
+    stations, values, active = engine.evaluate(bundle)
+    assert values.shape == active.shape == (len(stations), len(RULES))
+
+    frost = np.nanmin(window_slow(bundle['mint'], 0, 72), axis=1)
+    np.testing.assert_array_equal(active[:, 0], frost <= -2.0)
+    rain = np.nansum(window_slow(bundle['qpf6'], 0, 48), axis=1)
+    np.testing.assert_array_equal(active[:, 2], rain >= 0.5)
+
+    with pytest.raises(ValueError):
+        engine.evaluate({'mint': bundle['mint']})
+
+
+def test_update_reports_changes(sample_dir, bundle):
+    engine = AlertEngine(RULES)
+    first = engine.update(bundle)
+    # the first cycle reports every active alert
+    assert first and all(change.active for change in first)
+    assert all(change.cycle == CYCLE for change in first)
+    active = engine.active_alerts()
+    assert len(first) == sum(len(stations) for stations in active.values())
+
+    # the same forecast again has no changes
+    assert engine.update(bundle) == []
+
+    changes = engine.update_from_dir(str(sample_dir), NEXT_CYCLE)
+    _, _, next_active = engine.evaluate(read_cycle_bundle(str(sample_dir), NEXT_CYCLE, variables=['mint', 'qpf6']))
+    for change in changes:
+        was_active = change.station in active[change.rule]
+        assert change.active != was_active
+    assert sum(len(stations) for stations in engine.active_alerts().values()) == next_active.sum()
+
+
+def test_stations_missing_from_cycle_end_alerts(bundle):
+    from ewxndfd.ewx.ndfd_array import select_stations
+
+    engine = AlertEngine(RULES)
+    engine.update(bundle)
+    dropped = engine.active_alerts()['frost'][0]
+    dropped_rules = [rule for rule, stations in engine.active_alerts().items() if dropped in stations]
+
+    kept = [str(s) for s in bundle['mint'].stations if str(s) != dropped]
+    changes = engine.update({variable: select_stations(cycle_array, kept) for variable, cycle_array in bundle.items()})
+    assert [change.rule for change in changes] == dropped_rules
+    assert all(change.station == dropped and not change.active and np.isnan(change.value) for change in changes)
+    assert dropped not in engine.states
+    assert all(dropped not in stations for stations in engine.active_alerts().values())
+
+    # the station is new again when it comes back
+    changes = engine.update(bundle)
+    assert [change.rule for change in changes] == dropped_rules
+    assert all(change.station == dropped and change.active for change in changes)
+
+
+def test_invalid_rules():
+    with pytest.raises(ValueError):
+        AlertEngine([])
+    with pytest.raises(ValueError):
+        AlertEngine([AlertRule("frost", "mint", "==", 0.0)])
+    with pytest.raises(ValueError):
+        AlertEngine([AlertRule("frost", "mint", "<=", 0.0, aggregate="mean")])
+    with pytest.raises(ValueError):
+        AlertEngine([AlertRule("frost", "mint", "<=", 0.0, lead_hours=(48, 24))])
+    with pytest.raises(ValueError):
+        AlertEngine([AlertRule("frost", "mint", "<=", 0.0), AlertRule("frost", "mint", "<=", -2.0)])
@@ -0,0 +1,157 @@
+from datetime import date
+import os
+import sqlite3
+
+import pandas as pd
+import pytest
+
+from ewxndfd.ewx.ndfd_backfill import (
+    BACKFILL_COLUMNS,
+    backfill,
+    chunk_part_name,
+    cycle_file_rows,
+    enumerate_cycle_files,
+    read_checkpoint,
+    sink_for_path,
+)
+
+
+def test_enumerate_cycle_files(sample_dir):
+    paths = enumerate_cycle_files(str(sample_dir), date(2025, 11, 19), date(2025, 11, 20), ['mint', 'maxt'])
+    names = [os.path.basename(p) for p in paths]
+    assert len(names) == 16
+    assert names[:3] == ['mint_20251119t00.csv', 'maxt_20251119t00.csv', 'mint_20251119t06.csv']
+
+    with pytest.raises(ValueError):
+        enumerate_cycle_files(str(sample_dir), date(2025, 11, 19), date(2025, 11, 19), ['nope'])
+
+
+def test_cycle_file_rows(sample_dir):
+    rows = cycle_file_rows(os.path.join(str(sample_dir), 'mint_20251119t06.csv'))
+    assert len(rows[0]) == len(BACKFILL_COLUMNS)
+    variable, cycle, station, valid_start, valid_end, value = rows[0]
+    assert variable == 'mint'
+    assert cycle == '2025-11-19T06:00:00+00:00'
+    assert valid_end > valid_start
+    assert all(r[5] != -9999.0 for r in rows)
+
+    # hourly files have blank cells
+    relh_path = os.path.join(str(sample_dir), 'relh_20251119t06.csv')
+    all_rows = cycle_file_rows(relh_path, skip_missing=False)
+    assert len(all_rows) > len(cycle_file_rows(relh_path))
+    assert any(r[5] is None for r in all_rows)
+    assert any(r[5] == -9999.0 for r in all_rows)
+    assert len(all_rows) == 96 * 168
+
+
+def test_chunk_part_name():
+    path = '/data/relh_20251119t06.csv'
+    assert chunk_part_name(path, ['mint', 'relh']) == '20251119t06_01_relh'
+    # later cycles sort after earlier ones whatever the variable
+    assert chunk_part_name('/data/maxt_20251120t00.csv') > chunk_part_name('/data/wspd_20251119t18.csv')
+
+
+@pytest.mark.parametrize("sink_name", ["out.csv", "out.sqlite", "out.parquet"])
+def test_backfill_sinks_in_order(sample_dir, tmp_path, sink_name):
+    if sink_name.endswith('.parquet'):
+        pytest.importorskip("pyarrow")
+    sink_path = str(tmp_path / sink_name)
+    sink = sink_for_path(sink_path)
+    n_files = backfill(str(sample_dir), date(2025, 11, 19), date(2025, 11, 19), sink,
+                       variables=['mint', 'relh'], max_workers=2, chunk_size=3)
+    sink.close()
+    assert n_files == 8
+
+    if sink_name.endswith('.csv'):
+        df = pd.read_csv(sink_path)
+    elif sink_name.endswith('.sqlite'):
+        with sqlite3.connect(sink_path) as connection:
+            df = pd.read_sql("SELECT * FROM ndfd_forecast", connection)
+    else:
+        # parts are named so the directory reads back in cycle order
+        df = pd.read_parquet(sink_path)
+        assert sorted(os.listdir(sink_path)) == ['20251119t00_00_mint.parquet', '20251119t06_01_relh.parquet',
+                                                 '20251119t18_00_mint.parquet']
+
+    assert list(df.columns) == BACKFILL_COLUMNS
+    assert df['cycle'].is_monotonic_increasing
+    assert set(df['variable']) == {'mint', 'relh'}
+    expected = cycle_file_rows(os.path.join(str(sample_dir), 'mint_20251119t00.csv'))
+    assert len(df) > len(expected)
+
+
+def test_backfill_resumes_from_checkpoint(sample_dir, tmp_path):
+    sink_path = str(tmp_path / 'out.csv')
+    checkpoint_path = str(tmp_path / 'checkpoint.txt')
+
+    # a first run that only got through the first day
+    sink = sink_for_path(sink_path)
+    backfill(str(sample_dir), date(2025, 11, 19), date(2025, 11, 19), sink, variables=['mint'],
+             checkpoint_path=checkpoint_path, max_workers=1, chunk_size=2)
+    sink.close()
+    assert len(read_checkpoint(checkpoint_path)) == 4
+
+    sink = sink_for_path(sink_path)
+    n_files = backfill(str(sample_dir), date(2025, 11, 19), date(2025, 11, 20), sink, variables=['mint'],
+                       checkpoint_path=checkpoint_path, max_workers=2, chunk_size=2)
+    sink.close()
+    assert n_files == 4
+    assert len(read_checkpoint(checkpoint_path)) == 8
+
+    df = pd.read_csv(sink_path)
+    assert df['cycle'].nunique() == 8
+    assert not df.duplicated().any()
+
+
+def test_backfill_csv_truncates_unfinished_chunk(sample_dir, tmp_path):
+    sink_path = str(tmp_path / 'out.csv')
+    checkpoint_path = str(tmp_path / 'checkpoint.txt')
+
+    sink = sink_for_path(sink_path)
+    backfill(str(sample_dir), date(2025, 11, 19), date(2025, 11, 19), sink, variables=['mint'],
+             checkpoint_path=checkpoint_path, max_workers=1, chunk_size=2)
+    sink.close()
+    n_rows = len(pd.read_csv(sink_path))
+
+    # a crash after rows of the next chunk were written but before the checkpoint was,
+    # with the checkpoint record of that chunk cut off
+    with open(sink_path, 'a') as f:
+        f.write("mint,2025-11-20T00:00:00+00:00,rom,2025-11-20T12:00:00+00:00,2025-11-21T00:00:00+00:00,1.0\n")
+    with open(checkpoint_path, 'a') as f:
+        f.write("mint_20251120t00.csv\nmint_20251120t06.csv\n@99")
+    assert len(read_checkpoint(checkpoint_path)) == 4
+
+    sink = sink_for_path(sink_path)
+    n_files = backfill(str(sample_dir), date(2025, 11, 19), date(2025, 11, 20), sink, variables=['mint'],
+                       checkpoint_path=checkpoint_path, max_workers=1, chunk_size=2)
+    sink.close()
+    assert n_files == 4
+
+    df = pd.read_csv(sink_path)
+    assert df['cycle'].nunique() == 8
+    assert len(df) == 2 * n_rows
+    assert not df.duplicated().any()
+
+
+def test_backfill_sqlite_checkpoint_in_transaction(sample_dir, tmp_path):
+    sink_path = str(tmp_path / 'out.sqlite')
+    checkpoint_path = str(tmp_path / 'checkpoint.txt')
+
+    sink = sink_for_path(sink_path)
+    backfill(str(sample_dir), date(2025, 11, 19), date(2025, 11, 19), sink, variables=['mint'],
+             checkpoint_path=checkpoint_path, max_workers=1, chunk_size=2)
+    sink.close()
+
+    # a crash after the rows were committed but before the checkpoint file was written
+    open(checkpoint_path, 'w').close()
+
+    sink = sink_for_path(sink_path)
+    n_files = backfill(str(sample_dir), date(2025, 11, 19), date(2025, 11, 20), sink, variables=['mint'],
+                       checkpoint_path=checkpoint_path, max_workers=1, chunk_size=2)
+    sink.close()
+    assert n_files == 4
+
+    with sqlite3.connect(sink_path) as connection:
+        df = pd.read_sql("SELECT * FROM ndfd_forecast", connection)
+    assert df['cycle'].nunique() == 8
+    assert not df.duplicated().any()
@@ -0,0 +1,121 @@
+import os
+
+import numpy as np
+import pytest
+
+from ewxndfd.ewx import ndfd_binary
+from ewxndfd.ewx.ndfd_array import read_cycle_array
+from ewxndfd.ewx.ndfd_binary import (
+    BINARY_BLANK,
+    BINARY_MISSING,
+    convert_cycle_file,
+    load_binary_cycle,
+)
+from ewxndfd.ewx.ndfd_qc import QC_OUT_OF_RANGE
+
+
+def test_read_cycle_array(sample_dir):
+    cycle_array = read_cycle_array(os.path.join(str(sample_dir), 'relh_20251119t06.csv'))
+    assert cycle_array.variable_type == 'relh'
+    assert cycle_array.values.shape == (len(cycle_array.stations), 168)
+    assert cycle_array.valid_start[0] == np.datetime64('2025-11-19T01:00:00')
+    assert (cycle_array.valid_start == cycle_array.valid_end).all()
+    # blank hourly cells
+    assert np.isnan(cycle_array.values).any()
+
+
+@pytest.mark.parametrize("file_name", ['mint_20251119t06.csv', 'qpf6_20251119t18.csv',
+                                       'pops_20251120t00.csv', 'temp_20251119t06.csv'])
+def test_binary_round_trip(sample_dir, tmp_path, file_name):
+    csv_array = read_cycle_array(os.path.join(str(sample_dir), file_name))
+    binary_path = convert_cycle_file(os.path.join(str(sample_dir), file_name), str(tmp_path))
+    assert binary_path.endswith('.ndfdb')
+
+    with load_binary_cycle(binary_path) as binary_cycle:
+        assert binary_cycle.variable_type == csv_array.variable_type
+        assert binary_cycle.cycle == csv_array.cycle
+        assert binary_cycle.station_codes() == list(csv_array.stations)
+        np.testing.assert_array_equal(binary_cycle.valid_start, csv_array.valid_start)
+        np.testing.assert_array_equal(binary_cycle.valid_end, csv_array.valid_end)
+        np.testing.assert_allclose(binary_cycle.float_values(), csv_array.values, atol=1e-9)
+
+    binary_array = read_cycle_array(binary_path)
+    np.testing.assert_allclose(binary_array.values, csv_array.values, atol=1e-9)
+    np.testing.assert_array_equal(binary_array.flags, csv_array.flags)
+
+
+def test_binary_keeps_values_outside_qc_ranges(sample_dir, tmp_path):
+    with open(os.path.join(str(sample_dir), 'relh_20251119t06.csv'), newline='') as f:
+        lines = f.readlines()
+    # a humidity of 150 on the first station at 2025111907
+    fields = lines[1].split(',')
+    fields[7] = ' 150.0'
+    lines[1] = ','.join(fields)
+    csv_path = tmp_path / 'relh_20251119t06.csv'
+    csv_path.write_text(''.join(lines), newline='')
+    binary_path = convert_cycle_file(str(csv_path))
+
+    masked = read_cycle_array(binary_path)
+    assert np.isnan(masked.values[0, 6])
+    assert masked.flags[0, 6] & QC_OUT_OF_RANGE
+    # another mask gets the stored value back
+    unmasked = read_cycle_array(binary_path, qc_mask=0)
+    assert unmasked.values[0, 6] == 150.0
+    np.testing.assert_array_equal(unmasked.flags, read_cycle_array(str(csv_path), qc_mask=0).flags)
+
+
+def test_load_binary_closes_map_on_error(sample_dir, tmp_path, monkeypatch):
+    binary_path = convert_cycle_file(os.path.join(str(sample_dir), 'mint_20251119t06.csv'), str(tmp_path))
+    with open(binary_path, 'rb') as f:
+        data = f.read()
+    truncated = tmp_path / 'truncated.ndfdb'
+    truncated.write_bytes(data[:len(data) // 2])
+
+    opened = []
+    real_mmap = ndfd_binary.mmap.mmap
+    def recording_mmap(*args, **kwargs):
+        opened.append(real_mmap(*args, **kwargs))
+        return opened[-1]
+    monkeypatch.setattr(ndfd_binary.mmap, 'mmap', recording_mmap)
+    with pytest.raises(ValueError, match='truncated'):
+        load_binary_cycle(str(truncated))
+    assert len(opened) == 1 and opened[0].closed
+
+
+def test_binary_views_are_zero_copy(sample_dir, tmp_path):
+    binary_path = convert_cycle_file(os.path.join(str(sample_dir), 'mint_20251119t06.csv'), str(tmp_path))
+    binary_cycle = load_binary_cycle(binary_path)
+    assert binary_cycle.values.dtype == np.int16
+    assert not binary_cycle.values.flags.owndata
+    assert not binary_cycle.values.flags.writeable
+    no_value = (binary_cycle.values == BINARY_MISSING) | (binary_cycle.values == BINARY_BLANK)
+    assert no_value.sum() == np.isnan(binary_cycle.float_values()).sum()
+
+    row = binary_cycle.station_index('rom')
+    assert row >= 0
+    assert binary_cycle.station_index('nope') == -1
+    np.testing.assert_array_equal(binary_cycle.float_values(rows=[row]), binary_cycle.float_values()[[row]])
+    binary_cycle.close()
+
+
+def test_load_binary_rejects_other_files(sample_dir):
+    with pytest.raises(ValueError):
+        load_binary_cycle(os.path.join(str(sample_dir), 'mint_20251119t06.csv'))
+
+
+def test_views_outlive_close(sample_dir, tmp_path):
+    binary_path = convert_cycle_file(os.path.join(str(sample_dir), 'mint_20251119t06.csv'), str(tmp_path))
+    expected = read_cycle_array(binary_path, qc_mask=0).values
+
+    with load_binary_cycle(binary_path) as binary_cycle:
+        row = binary_cycle.station_index('rom')
+        rom = binary_cycle.values[row]
+    # the view is still usable after the with block closed the cycle
+    np.testing.assert_allclose(rom / binary_cycle.scale, expected[row])
+    assert binary_cycle.values is None
+
+    binary_cycle = load_binary_cycle(binary_path)
+    stations = binary_cycle.stations
+    binary_cycle.close()
+    binary_cycle.close()
+    assert stations[row] == b'rom'
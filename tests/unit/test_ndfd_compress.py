@@ -0,0 +1,45 @@
+from datetime import date
+import glob
+import os
+import shutil
+
+import pytest
+
+from ewxndfd.ewx.ewx_ndfd_file import NDFD, find_ndfd_file
+from ewxndfd.ewx.ndfd_backfill import enumerate_cycle_files
+from ewxndfd.ewx.ndfd_compress import compress_cycle_directory
+
+
+@pytest.fixture
+def cycle_dir(sample_dir, tmp_path):
+    for path in glob.glob(os.path.join(str(sample_dir), 'mint_20251119t*.csv')):
+        shutil.copy(path, tmp_path)
+    return tmp_path
+
+
+@pytest.mark.parametrize("compression", ["gz", "zst"])
+def test_read_compressed_cycle_files(sample_dir, sample_datetime, cycle_dir, compression):
+    if compression == "zst":
+        pytest.importorskip("zstandard")
+
+    paths = compress_cycle_directory(str(cycle_dir), compression=compression)
+    assert len(paths) == 4
+    assert not glob.glob(os.path.join(str(cycle_dir), '*.csv'))
+    assert all(p.endswith(f'.csv.{compression}') for p in paths)
+
+    plain = NDFD(str(sample_dir), variable_type='mint', unit_str='Celsius', unit_abbr='°C')
+    compressed = NDFD(str(cycle_dir), variable_type='mint', unit_str='Celsius', unit_abbr='°C')
+    assert compressed.get_forecast(sample_datetime) == plain.get_forecast(sample_datetime)
+    assert compressed.get_forecast(sample_datetime, lead_hours=48) == plain.get_forecast(sample_datetime, lead_hours=48)
+
+    cycle_files = enumerate_cycle_files(str(cycle_dir), date(2025, 11, 19), date(2025, 11, 19), ['mint'])
+    assert len(cycle_files) == 4
+
+
+def test_find_ndfd_file_prefers_plain_csv(cycle_dir):
+    csv_path = os.path.join(str(cycle_dir), 'mint_20251119t06.csv')
+    compress_cycle_directory(str(cycle_dir), keep=True)
+    assert find_ndfd_file(csv_path) == csv_path
+    os.remove(csv_path)
+    assert find_ndfd_file(csv_path) == csv_path + '.gz'
+    assert find_ndfd_file(os.path.join(str(cycle_dir), 'mint_20251119t09.csv')) is None
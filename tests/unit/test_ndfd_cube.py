@@ -0,0 +1,66 @@
+from datetime import date
+import os
+
+import numpy as np
+import pytest
+
+from ewxndfd.ewx.ndfd_array import read_cycle_array
+from ewxndfd.ewx.ndfd_cube import ForecastCube, build_forecast_cube
+
+
+@pytest.fixture
+def mint_cube(sample_dir):
+    return build_forecast_cube(str(sample_dir), 'mint', date(2025, 11, 19), date(2025, 11, 20))
+
+
+def test_cube_aligns_cycles_by_valid_time(sample_dir, mint_cube):
+    assert mint_cube.values.shape == (8, 96, 8)
+    assert (np.diff(mint_cube.cycles) == np.timedelta64(6, 'h')).all()
+    assert mint_cube.valid_start[0] == np.datetime64('2025-11-19T00:00:00')
+
+    # the values of the last cycle are in the cube at its valid times
+    last = read_cycle_array(os.path.join(str(sample_dir), 'mint_20251120t18.csv'))
+    columns = np.searchsorted(mint_cube.valid_start, last.valid_start)
+    np.testing.assert_array_equal(mint_cube.values[-1][:, columns], last.values)
+    # the first cycle has no forecast for the window after its last one
+    assert np.isnan(mint_cube.values[0, :, -1]).all()
+
+
+def test_cube_rejects_mixed_variables(sample_dir):
+    arrays = [read_cycle_array(os.path.join(str(sample_dir), name))
+              for name in ['mint_20251119t00.csv', 'maxt_20251119t00.csv']]
+    with pytest.raises(ValueError):
+        ForecastCube(arrays)
+
+
+def test_lead_time_statistics(sample_dir, mint_cube):
+    stats = mint_cube.lead_time_statistics()
+    assert list(stats.columns) == ['count', 'bias', 'mae', 'spread']
+    assert stats['count'].sum() == np.count_nonzero(~np.isnan(mint_cube.values))
+
+    # the reference defaults to the latest forecast, a single cycle has no error
+    single = ForecastCube([read_cycle_array(os.path.join(str(sample_dir), 'mint_20251120t18.csv'))])
+    assert (single.lead_time_statistics()['mae'] == 0).all()
+
+    # a constant offset from the reference is all bias
+    shifted = mint_cube.lead_time_statistics(reference=mint_cube.latest_forecast() - 1.0)
+    np.testing.assert_allclose(shifted['bias'], stats['bias'] + 1.0)
+    np.testing.assert_allclose(shifted['spread'], stats['spread'], atol=1e-9)
+
+
+def test_lagged_ensemble_mean(mint_cube):
+    np.testing.assert_array_equal(mint_cube.lagged_ensemble_mean(k=1), mint_cube.latest_forecast())
+
+    mean = mint_cube.lagged_ensemble_mean(k=2)
+    # last valid time is only forecast by the last 4 cycles (20251120)
+    np.testing.assert_allclose(mean[:, -1], mint_cube.values[-2:, :, -1].mean(axis=0))
+    # as of the third cycle, the last window was not forecast yet
+    assert np.isnan(mint_cube.lagged_ensemble_mean(k=2, as_of=2)[:, -1]).all()
+
+
+def test_largest_jumps(mint_cube):
+    jumps = mint_cube.largest_jumps(n=5)
+    assert len(jumps) == 5
+    assert (jumps['jump'].abs().diff().dropna() <= 0).all()
+    assert np.nanmax(np.abs(mint_cube.jumps())) == pytest.approx(abs(jumps['jump'].iloc[0]))
+    np.testing.assert_allclose(jumps['to_value'] - jumps['from_value'], jumps['jump'])
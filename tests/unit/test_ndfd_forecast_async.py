@@ -0,0 +1,62 @@
+import asyncio
+import time
+
+import pandas as pd
+import pytest
+
+pytest.importorskip("aiohttp")
+
+from ewxndfd import ndfd_forecast_api as ndfd
+from ewxndfd.ndfd_forecast_async import (
+    async_daily_forecast_summary,
+    async_daily_forecast_summary_batch,
+    ndfd_client_session,
+)
+from ewxndfd.mock_ndfd_server import MockNDFDServer
+
+
+@pytest.fixture
+def mock_server():
+    with MockNDFDServer() as server:
+        yield server
+
+
+def test_async_daily_forecast_summary_matches_sync(mock_server):
+    lat, lon = ndfd.LANSING_LAT_LON
+    df = asyncio.run(async_daily_forecast_summary(lat, lon, location_name='LAN', base_url=mock_server.url))
+    expected = ndfd.daily_forecast_summary(lat, lon, location_name='LAN', base_url=mock_server.url)
+    pd.testing.assert_frame_equal(df, expected)
+
+
+def test_async_batch_matches_sync_batch(mock_server):
+    # the first two points share a grid cell
+    points = [(42.73, -84.55, 'a'), (42.7301, -84.5501, 'b'), (44.0, -85.0, 'c')]
+
+    async def run():
+        async with ndfd_client_session() as session:
+            return await async_daily_forecast_summary_batch(points, base_url=mock_server.url, session=session)
+
+    df = asyncio.run(run())
+    assert mock_server.request_count == 2
+    expected = ndfd.daily_forecast_summary_batch(points, base_url=mock_server.url)
+    pd.testing.assert_frame_equal(df, expected)
+
+
+def test_async_batch_requests_concurrently():
+    points = [(40.0 + n * 0.1, -85.0) for n in range(20)]
+    with MockNDFDServer(latency=0.2) as server:
+        start = time.perf_counter()
+        df = asyncio.run(async_daily_forecast_summary_batch(points, base_url=server.url, concurrency=20,
+                                                            add_coordinates=True))
+        elapsed = time.perf_counter() - start
+        assert server.request_count == 20
+    # 4 seconds one at a time
+    assert elapsed < 2.5
+    assert df['latitude'].nunique() == 20
+
+
+def test_async_error_response():
+    lat, lon = ndfd.LANSING_LAT_LON
+    with MockNDFDServer(error_rate=1.0) as server:
+        with pytest.raises(ValueError):
+            asyncio.run(async_daily_forecast_summary(lat, lon, base_url=server.url))
@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+from ewxndfd import ndfd_forecast_api as ndfd
+from ewxndfd.ndfd_grid import GridCellMap, latlon_to_grid_cell, grid_cell_to_latlon
+from ewxndfd.mock_ndfd_server import MockNDFDServer
+
+
+def test_grid_corners():
+    assert latlon_to_grid_cell(20.191999, -121.554001) == (0, 0)
+    lat, lon = grid_cell_to_latlon(2144, 1376)
+    # published upper right corner of the NDFD CONUS grid
+    assert lat == pytest.approx(50.1058, abs=0.001)
+    assert lon == pytest.approx(-60.8854, abs=0.001)
+    assert latlon_to_grid_cell(60.0, -150.0) == (-1, -1)
+
+
+def test_grid_cell_round_trip_vectorized():
+    lats = np.array([42.73, 42.7300001, 44.5, 46.1])
+    lons = np.array([-84.55, -84.5500001, -85.2, -87.3])
+    i, j = latlon_to_grid_cell(lats, lons)
+    assert i[0] == i[1] and j[0] == j[1]
+    lat_c, lon_c = grid_cell_to_latlon(i, j)
+    assert np.array_equal(latlon_to_grid_cell(lat_c, lon_c)[0], i)
+
+
+def test_grid_cell_map_persists(tmp_path):
+    path = str(tmp_path / 'cells.json')
+    grid_map = GridCellMap(path)
+    cell = grid_map.cell(42.73, -84.55)
+    grid_map.learn(43.0, -85.0, (1, 2))
+    grid_map.save()
+
+    reloaded = GridCellMap(path)
+    assert reloaded.cell(42.7300000001, -84.55) == cell
+    assert reloaded.cell(43.0, -85.0) == (1, 2)
+
+
+def test_batch_fetches_once_per_cell():
+    cell_center = grid_cell_to_latlon(*latlon_to_grid_cell(42.73, -84.55))
+    points = [(42.73, -84.55, 'a'), (cell_center[0], cell_center[1], 'b'), (44.5, -85.2, 'c')]
+    cache = ndfd.NDFDForecastCache()
+    with MockNDFDServer() as server:
+        df = ndfd.daily_forecast_summary_batch(points, base_url=server.url, cache=cache)
+        assert server.request_count == 2
+
+        # second call is served from the cache
+        ndfd.daily_forecast_summary(42.73, -84.55, location_name='a', base_url=server.url, cache=cache)
+        assert server.request_count == 2
+
+    assert list(df['Location'].unique()) == ['a', 'b', 'c']
+    assert list(df.columns[:2]) == ['forecast_date', 'Location']
+    assert list(df.columns[-2:]) == ['latitude', 'longitude']
+    a = df[df['Location'] == 'a'].drop(columns=['Location', 'latitude', 'longitude']).reset_index(drop=True)
+    b = df[df['Location'] == 'b'].drop(columns=['Location', 'latitude', 'longitude']).reset_index(drop=True)
+    assert a.equals(b)
+
+
+def test_summary_same_with_or_without_cache():
+    with MockNDFDServer() as server:
+        uncached = ndfd.daily_forecast_summary(42.73, -84.55, base_url=server.url)
+        cached = ndfd.daily_forecast_summary(42.73, -84.55, base_url=server.url, cache=ndfd.NDFDForecastCache())
+        hourly = ndfd.hourly_forecast(42.73, -84.55, base_url=server.url)
+        daily, _ = ndfd.daily_and_hourly_forecast(42.73, -84.55, base_url=server.url)
+    assert uncached.equals(cached)
+    assert uncached.equals(daily)
+    assert len(hourly) > 0
@@ -0,0 +1,124 @@
+from datetime import datetime, timezone
+
+import numpy as np
+import pytest
+
+from ewxndfd.ewx.ndfd_array import read_cycle_bundle
+from ewxndfd.ewx.ndfd_metrics import (
+    accumulated_degree_days,
+    align_daily,
+    degree_days,
+    forecast_degree_days,
+    high_rh_hours,
+)
+
+CYCLE = datetime(2025, 11, 19, 6, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def bundle(sample_dir):
+    return read_cycle_bundle(str(sample_dir), CYCLE, variables=['maxt', 'mint', 'relh'])
+
+
+def sine_degree_days(tmax, tmin, base, cap):
+    """degree days by integrating the sine curve numerically"""
+    t = np.linspace(0, 2 * np.pi, 100000, endpoint=False)
+    temps = (tmax + tmin) / 2 + (tmax - tmin) / 2 * np.sin(t)
+    return np.mean(np.clip(temps, base, cap) - base)
+
+
+def test_degree_days_methods():
+    tmax = np.array([8.0, 30.0, 15.0, 25.0, 12.0, np.nan, 14.0])
+    tmin = np.array([2.0, 22.0, 12.0, 12.0, 5.0, 3.0, 14.0])
+
+    simple = degree_days(tmax, tmin, base=10.0, cap=20.0)
+    np.testing.assert_allclose(simple[[0, 1, 2, 3, 6]], [0.0, 10.0, 3.5, 6.0, 4.0])
+    assert np.isnan(simple[5])
+
+    sine = degree_days(tmax, tmin, base=10.0, cap=20.0, method='baskerville-emin')
+    expected = [sine_degree_days(x, n, 10.0, 20.0) for x, n in zip(tmax[:5], tmin[:5])]
+    np.testing.assert_allclose(sine[:5], expected, atol=1e-3)
+    assert np.isnan(sine[5])
+    assert sine[6] == 4.0
+
+    uncapped = degree_days(tmax, tmin, base=10.0, method='baskerville-emin')
+    assert uncapped[1] == pytest.approx(16.0)
+
+    with pytest.raises(ValueError):
+        degree_days(tmax, tmin, method='triangle')
+    with pytest.raises(ValueError):
+        degree_days(tmax, tmin, base=10.0, cap=5.0)
+
+
+def test_accumulated_degree_days():
+    daily = np.array([[1.0, 2.0, 3.0], [0.0, 1.0, 0.0]])
+    np.testing.assert_allclose(accumulated_degree_days(daily, observed_total=[100.0, 50.0]),
+                               [[101.0, 103.0, 106.0], [50.0, 51.0, 51.0]])
+    np.testing.assert_allclose(accumulated_degree_days(daily)[0], [1.0, 3.0, 6.0])
+
+
+def test_forecast_degree_days(bundle):
+    grid = align_daily({'maxt': bundle['maxt'], 'mint': bundle['mint']})
+    # maxt and mint windows of the same local day are aligned
+    assert grid.values['maxt'].shape == grid.values['mint'].shape == (len(grid.stations), len(grid.dates))
+    assert grid.dates[0] == np.datetime64('2025-11-19')
+
+    totals = np.arange(len(bundle['maxt'].stations), dtype=float)
+    gdd = forecast_degree_days(bundle, base=0.0, cap=30.0, method='baskerville-emin', observed_total=totals)
+    assert gdd.values['gdd'].shape == (len(gdd.stations), len(gdd.dates))
+    assert not np.isnan(gdd.values['accumulated_gdd'][:, -1]).all()
+    np.testing.assert_allclose(gdd.values['accumulated_gdd'][:, 0] - gdd.values['gdd'][:, 0], totals)
+
+    with pytest.raises(ValueError):
+        forecast_degree_days({'maxt': bundle['maxt']})
+    with pytest.raises(ValueError):
+        align_daily({'relh': bundle['relh']})
+
+
+def test_high_rh_hours(bundle):
+    grid = high_rh_hours(bundle['relh'], threshold=90.0)
+    high = grid.values['high_rh_hours']
+    valid = grid.values['valid_hours']
+    assert high.shape == valid.shape == (len(grid.stations), len(grid.dates))
+    assert (high <= valid).all() and (valid <= 24).all()
+    # hours before the cycle are missing, and 3 hourly values cover the following blank hours
+    assert valid.sum() > (~np.isnan(bundle['relh'].values)).sum()
+
+    never = high_rh_hours(bundle['relh'], threshold=101.0)
+    assert never.values['high_rh_hours'].sum() == 0
+    # without filling, the count is the values at or above the threshold
+    no_fill = high_rh_hours(bundle['relh'], threshold=90.0, max_fill_hours=0)
+    values = bundle['relh'].values[0]
+    assert no_fill.values['high_rh_hours'][0].sum() == (values[~np.isnan(values)] >= 90.0).sum()
+
+
+def test_high_rh_hours_six_hourly(bundle):
+    # from hour 72 of the cycle date the hourly file has a value every 6 hours
+    grid = high_rh_hours(bundle['relh'], threshold=90.0)
+    late_days = (grid.dates >= np.datetime64('2025-11-23')) & (grid.dates <= np.datetime64('2025-11-24'))
+    assert (grid.values['valid_hours'][:, late_days] == 24).all()
+    # a fixed fill of 2 hours only covers half of each 6 hour gap
+    short_fill = high_rh_hours(bundle['relh'], threshold=90.0, max_fill_hours=2)
+    assert (short_fill.values['valid_hours'][:, late_days] == 12).all()
+
+
+def test_high_rh_hours_fills_up_to_next_value():
+    from ewxndfd.ewx.ndfd_array import NDFDCycleArray
+    from ewxndfd.ewx.ndfd_qc import QC_BLANK, QC_MISSING
+
+    # 3 hourly then 6 hourly values at 12, 15, 18, 24 and 30 UTC, then a missing value
+    hours = np.arange(12, 40)
+    values = np.full((1, len(hours)), np.nan)
+    flags = np.full(values.shape, QC_BLANK, dtype=np.uint8)
+    for hour, value in [(12, 95.0), (15, 80.0), (18, 92.0), (24, 91.0), (30, 50.0)]:
+        values[0, hour - 12] = value
+        flags[0, hour - 12] = 0
+    flags[0, 36 - 12] = QC_MISSING
+    valid_start = np.datetime64('2025-11-19T00:00:00') + hours.astype('timedelta64[h]')
+    relh = NDFDCycleArray('relh', CYCLE, np.array(['a']), valid_start, valid_start, values, flags)
+
+    grid = high_rh_hours(relh, threshold=90.0, tz='UTC')
+    # 12-14, 18-23 and 24-29 UTC are at or above 90
+    assert grid.values['high_rh_hours'].sum() == 3 + 6 + 6
+    # 12-30 UTC, the blank hours next to the missing value are not filled
+    assert grid.values['valid_hours'].sum() == 30 - 12 + 1
@@ -0,0 +1,115 @@
+from datetime import datetime, timezone
+import os
+
+import numpy as np
+
+from ewxndfd.ewx.ewx_ndfd_file import NDFD
+from ewxndfd.ewx.ndfd_array import read_cycle_array, read_cycle_bundle
+from ewxndfd.ewx.ndfd_qc import (
+    QC_BLANK,
+    QC_DEFAULT_MASK,
+    QC_INCONSISTENT,
+    QC_MISSING,
+    QC_OUT_OF_RANGE,
+    qc_cycle_bundle,
+    qc_summary,
+    qc_values,
+)
+
+
+def test_qc_values_flags_and_masks():
+    values = np.array([[np.nan, -9999.0, 50.0, 120.0, -1.0]])
+    masked, flags = qc_values('relh', values)
+    assert list(flags[0]) == [QC_BLANK, QC_MISSING, 0, QC_OUT_OF_RANGE, QC_OUT_OF_RANGE]
+    assert np.isnan(masked[0, [0, 1, 3, 4]]).all()
+    assert masked[0, 2] == 50.0
+    # the input is not changed
+    assert values[0, 3] == 120.0
+
+    # out of range values are kept when not in the mask, the missing value never is
+    masked, flags = qc_values('relh', values, mask=QC_BLANK)
+    assert masked[0, 3] == 120.0
+    assert np.isnan(masked[0, 1])
+
+
+def test_read_cycle_array_flags(sample_dir):
+    cycle_array = read_cycle_array(os.path.join(str(sample_dir), 'relh_20251119t06.csv'))
+    assert cycle_array.flags.shape == cycle_array.values.shape
+    summary = qc_summary(cycle_array.flags)
+    assert summary['blank'] > 0
+    # hours before the cycle are -9999
+    assert summary['missing'] > 0
+    assert np.isnan(cycle_array.values[cycle_array.flags != 0]).all()
+    assert not np.isnan(cycle_array.values[cycle_array.flags == 0]).any()
+
+
+def test_min_max_consistency(sample_dir):
+    cycle = datetime(2025, 11, 19, 6, tzinfo=timezone.utc)
+    bundle = read_cycle_bundle(str(sample_dir), cycle, variables=['mint', 'maxt'])
+    assert set(bundle) == {'mint', 'maxt'}
+    assert not (bundle['mint'].flags & QC_INCONSISTENT).any()
+
+    # make one minimum warmer than its maximum
+    mint = bundle['mint']
+    values = mint.values.copy()
+    values[0, 1] = 40.0
+    checked = qc_cycle_bundle({'mint': mint._replace(values=values), 'maxt': bundle['maxt']})
+    assert checked['mint'].flags[0, 1] & QC_INCONSISTENT
+    assert (checked['mint'].flags & QC_INCONSISTENT).sum() == QC_INCONSISTENT
+    # the maxt window for the same day is flagged
+    day = mint.valid_start[1].astype('datetime64[D]')
+    column = np.flatnonzero(bundle['maxt'].valid_start.astype('datetime64[D]') == day)[0]
+    assert checked['maxt'].flags[0, column] & QC_INCONSISTENT
+
+
+def test_get_forecast_array(sample_dir, sample_datetime):
+    n = NDFD(str(sample_dir), variable_type='mint', unit_str='Celsius', unit_abbr='°C')
+    cycle_array = n.get_forecast_array(sample_datetime)
+    assert cycle_array.cycle == datetime(2025, 11, 19, 6, tzinfo=timezone.utc)
+    assert cycle_array.flags is not None
+
+    long_data = n._wide_to_long(n.get_forecast(sample_datetime), skip_missing=True)
+    assert all(row['mint'] != -9999.0 for row in long_data)
+
+
+def test_wide_to_long_missing_values(sample_dir):
+    n = NDFD(str(sample_dir), variable_type='relh', unit_str='percent', unit_abbr='%')
+    ndfd_data = n._read(os.path.join(str(sample_dir), 'relh_20251119t06.csv'))
+
+    # by default every cell is a row, blank cells are None
+    long_data = n._wide_to_long(ndfd_data)
+    assert len(long_data) == len(ndfd_data) * (len(ndfd_data[0]) - 1)
+    values = [row['relh'] for row in long_data]
+    assert None in values
+    assert -9999.0 in values
+
+    skipped = n._wide_to_long(ndfd_data, skip_missing=True)
+    assert len(skipped) == sum(1 for v in values if v is not None and v != -9999.0)
+    assert all(row['relh'] is not None and row['relh'] != -9999.0 for row in skipped)
+
+
+def test_read_cycle_bundle_masks_inconsistent_values(sample_dir, tmp_path):
+    cycle = datetime(2025, 11, 19, 6, tzinfo=timezone.utc)
+    for variable_type in ['mint', 'maxt']:
+        name = f'{variable_type}_20251119t06.csv'
+        with open(os.path.join(str(sample_dir), name), newline='') as f:
+            lines = f.readlines()
+        if variable_type == 'mint':
+            # the first station's minimum for the second window is warmer than any maximum
+            fields = lines[1].split(',')
+            fields[2] = ' 40.0'
+            lines[1] = ','.join(fields)
+        (tmp_path / name).write_text(''.join(lines), newline='')
+
+    flagged = read_cycle_bundle(str(tmp_path), cycle, variables=['mint', 'maxt'])
+    assert flagged['mint'].flags[0, 1] & QC_INCONSISTENT
+    assert flagged['mint'].values[0, 1] == 40.0
+
+    masked = read_cycle_bundle(str(tmp_path), cycle, variables=['mint', 'maxt'],
+                               qc_mask=QC_DEFAULT_MASK | QC_INCONSISTENT)
+    assert np.isnan(masked['mint'].values[0, 1])
+    inconsistent = (masked['maxt'].flags & QC_INCONSISTENT) != 0
+    assert inconsistent.sum() == 1 and np.isnan(masked['maxt'].values[inconsistent]).all()
+    # other values are as without the mask
+    keep = (masked['mint'].flags & QC_INCONSISTENT) == 0
+    np.testing.assert_array_equal(masked['mint'].values[keep], flagged['mint'].values[keep])
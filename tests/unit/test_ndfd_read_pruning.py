@@ -0,0 +1,98 @@
+from datetime import datetime, timezone
+import os
+
+import pytest
+
+from ewxndfd.ewx.ewx_ndfd_file import NDFD, parse_column_header, cycle_datetime_from_file_name
+
+
+def test_parse_column_header():
+    start, end = parse_column_header(' 2025111900-2025111913')
+    assert start == datetime(2025, 11, 19, 0, tzinfo=timezone.utc)
+    assert end == datetime(2025, 11, 19, 13, tzinfo=timezone.utc)
+
+    start, end = parse_column_header(' 2025111901')
+    assert start == end == datetime(2025, 11, 19, 1, tzinfo=timezone.utc)
+
+
+def test_cycle_datetime_from_file_name():
+    assert cycle_datetime_from_file_name('/tmp/relh_20251119t06.csv') == datetime(2025, 11, 19, 6, tzinfo=timezone.utc)
+
+
+def test_read_without_options_is_unchanged(sample_dir, v_type, sample_ndfd_mint):
+    n = NDFD(str(sample_dir), variable_type=v_type, unit_str='Celsius', unit_abbr='°C')
+    path = os.path.join(str(sample_dir), sample_ndfd_mint)
+    all_columns = n._read(path)
+    selected = n._read(path, columns=[k for k in all_columns[0].keys()][1:])
+    assert selected == all_columns
+
+
+def test_read_columns(sample_dir, v_type, sample_ndfd_mint):
+    n = NDFD(str(sample_dir), variable_type=v_type, unit_str='Celsius', unit_abbr='°C')
+    path = os.path.join(str(sample_dir), sample_ndfd_mint)
+    all_columns = n._read(path)
+    label = list(all_columns[0].keys())[2]
+
+    ndfd_data = n._read(path, columns=[label.strip()])
+    assert len(ndfd_data) == len(all_columns)
+    assert list(ndfd_data[0].keys()) == ['station', label]
+    assert [r[label] for r in ndfd_data] == [r[label] for r in all_columns]
+
+
+def test_read_valid_time_range(sample_dir):
+    n = NDFD(str(sample_dir), variable_type='relh', unit_str='percent', unit_abbr='%')
+    path = os.path.join(str(sample_dir), 'relh_20251119t06.csv')
+
+    start = datetime(2025, 11, 20, 0, tzinfo=timezone.utc)
+    end = datetime(2025, 11, 21, 0, tzinfo=timezone.utc)
+    ndfd_data = n._read(path, valid_start=start, valid_end=end)
+    columns = [k.strip() for k in ndfd_data[0].keys()][1:]
+    assert len(columns) == 24
+    assert columns[0] == '2025112000'
+    assert columns[-1] == '2025112023'
+
+    # naive datetimes are local time of the NDFD object, 19:00 EST is 00Z
+    local = n._read(path, valid_start=datetime(2025, 11, 19, 19), valid_end=datetime(2025, 11, 20, 19))
+    assert local == ndfd_data
+
+
+def test_read_lead_hours(sample_dir):
+    n = NDFD(str(sample_dir), variable_type='relh', unit_str='percent', unit_abbr='%')
+    path = os.path.join(str(sample_dir), 'relh_20251119t06.csv')
+
+    ndfd_data = n._read(path, lead_hours=6)
+    columns = [k.strip() for k in ndfd_data[0].keys()][1:]
+    assert columns == ['2025111906', '2025111907', '2025111908', '2025111909', '2025111910', '2025111911']
+
+    ndfd_data = n._read(path, lead_hours=(24, 27))
+    columns = [k.strip() for k in ndfd_data[0].keys()][1:]
+    assert columns == ['2025112006', '2025112007', '2025112008']
+
+
+def test_get_forecast_with_lead_hours(sample_dir, sample_datetime):
+    n = NDFD(str(sample_dir), variable_type='mint', unit_str='Celsius', unit_abbr='°C')
+    ndfd_data = n.get_forecast(sample_datetime, station_list=['rom'], lead_hours=48)
+    assert len(ndfd_data) == 1
+    assert len(ndfd_data[0]) == 3
+
+
+def test_read_columns_truncated_row(sample_dir, tmp_path):
+    n = NDFD(str(tmp_path), variable_type='relh', unit_str='percent', unit_abbr='%')
+    with open(os.path.join(str(sample_dir), 'relh_20251119t06.csv'), newline='') as f:
+        lines = f.readlines()
+    # the third station row is cut off after a few columns
+    lines[3] = ','.join(lines[3].split(',')[:5]) + '\r\n'
+    path = tmp_path / 'relh_20251119t06.csv'
+    path.write_text(''.join(lines), newline='')
+
+    with pytest.raises(ValueError, match=r'relh_20251119t06.csv line 4'):
+        n._read(str(path), lead_hours=24)
+    # columns within the truncated row can still be read
+    assert len(n._read(str(path), columns=['2025111901'])) == len(lines) - 1
+
+    # get_forecast keeps the file and line of the error
+    local_datetime = datetime(2025, 11, 19, 7, 0, tzinfo=timezone.utc)
+    with pytest.raises(ValueError, match=r'relh_20251119t06.csv line 4'):
+        n.get_forecast(local_datetime, lead_hours=24)
+    with pytest.raises(ValueError, match=r'relh_20251119t06.csv line 4'):
+        n.get_forecast(local_datetime, format='array')
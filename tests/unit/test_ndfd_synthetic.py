@@ -0,0 +1,70 @@
+from datetime import datetime, timezone, date
+import csv
+import os
+
+from ewxndfd.ewx.ewx_ndfd_file import NDFD
+from ewxndfd.ewx.ndfd_synthetic import (synthetic_station_codes, write_synthetic_cycle,
+                                        write_synthetic_cycles)
+
+
+def test_synthetic_station_codes_are_unique():
+    codes = synthetic_station_codes(1000)
+    assert len(set(codes)) == 1000
+    assert codes[0] == 'aaa'
+    assert all(len(c) == 3 for c in codes)
+
+
+def test_synthetic_daily_file_matches_sample_layout(tmp_path, sample_dir):
+    cycle = datetime(2025, 11, 19, 18, tzinfo=timezone.utc)
+    path = write_synthetic_cycle(str(tmp_path), 'mint', cycle, ['rom', 'ith'], seed=1)
+    assert os.path.basename(path) == 'mint_20251119t18.csv'
+
+    with open(path) as f:
+        rows = list(csv.reader(f))
+    with open(sample_dir / 'mint_20251119t18.csv') as f:
+        sample_header = next(csv.reader(f))
+
+    assert rows[0] == sample_header
+    assert [r[0] for r in rows[1:]] == ['rom', 'ith']
+    # window ended before the 18Z cycle
+    assert rows[1][1].strip() == '-9999.0'
+
+
+def test_synthetic_hourly_file_is_thinned(tmp_path):
+    cycle = datetime(2025, 11, 19, 0, tzinfo=timezone.utc)
+    path = write_synthetic_cycle(str(tmp_path), 'temp', cycle, ['aaa'], seed=1)
+    with open(path) as f:
+        rows = list(csv.reader(f))
+
+    assert len(rows[0]) == 169
+    cells = [c.strip() for c in rows[1][1:]]
+    assert all(c != '' for c in cells[:36])
+    assert cells[36] == ''
+    # 3 hourly after 36 hours, 6 hourly after 72 hours
+    assert cells[38] != '' and cells[39] == ''
+    assert cells[-1] != '' and cells[-2] == ''
+
+
+def test_synthetic_cycles_readable_by_ndfd(tmp_path):
+    paths = write_synthetic_cycles(str(tmp_path), date(2025, 11, 19), n_days=1,
+                                   variables=['maxt', 'mint'], n_stations=50)
+    assert len(paths) == 8
+
+    n = NDFD(str(tmp_path), variable_type='mint', unit_str='Celsius', unit_abbr='°C')
+    data = n.get_forecast(local_datetime=datetime(2025, 11, 19, 2, 0, tzinfo=timezone.utc))
+    assert len(data) == 50
+    assert len(n._wide_to_long(data, skip_missing=True)) == 50 * 7
+
+
+def test_synthetic_hourly_columns_match_samples(tmp_path, sample_dir):
+    """the columns with values (or -9999) are the same as real files for every cycle"""
+    def filled_columns(path):
+        with open(path) as f:
+            rows = [[c.strip() for c in row] for row in csv.reader(f)]
+        return [column for j, column in enumerate(rows[0][1:], start=1) if rows[1][j] != '']
+
+    for hour in (0, 6, 12, 18):
+        cycle = datetime(2025, 11, 19, hour, tzinfo=timezone.utc)
+        path = write_synthetic_cycle(str(tmp_path), 'relh', cycle, ['aaa'], seed=1)
+        sample_path = sample_dir / os.path.basename(path)
+        assert filled_columns(path) == filled_columns(sample_path)
@@ -0,0 +1,137 @@
+from datetime import datetime, timezone
+import os
+import shutil
+import threading
+
+import pytest
+
+from ewxndfd.ewx.ndfd_watcher import NDFDCycleWatcher, inotify_available
+
+VARIABLES = ['mint', 'maxt']
+
+
+def copy_cycle(sample_dir, dest_dir, cycle='20251119t06', variables=VARIABLES):
+    for variable_type in variables:
+        name = f"{variable_type}_{cycle}.csv"
+        # write to a temporary name and rename into place, like NDFD_Auto
+        shutil.copy(os.path.join(str(sample_dir), name), os.path.join(dest_dir, name + '.tmp'))
+        os.replace(os.path.join(dest_dir, name + '.tmp'), os.path.join(dest_dir, name))
+
+
+def test_scan_complete_cycle(sample_dir, tmp_path, request):
+    watcher = NDFDCycleWatcher(str(tmp_path), variables=VARIABLES, stable_seconds=0, use_inotify=False)
+    request.addfinalizer(watcher.close)
+    received = []
+    watcher.add_handler(received.append)
+
+    # one variable is not a complete cycle
+    copy_cycle(sample_dir, str(tmp_path), variables=['mint'])
+    assert watcher.scan() == []
+
+    copy_cycle(sample_dir, str(tmp_path), variables=['maxt'])
+    bundles = watcher.scan()
+    assert len(bundles) == 1 and received == bundles
+    assert bundles[0].cycle == datetime(2025, 11, 19, 6, tzinfo=timezone.utc)
+    assert set(bundles[0].arrays) == set(VARIABLES)
+    assert bundles[0].arrays['mint'].flags is not None
+
+    # each cycle is passed once
+    assert watcher.scan() == []
+
+
+def age_files(dest_dir, seconds=3600):
+    for name in os.listdir(dest_dir):
+        path = os.path.join(dest_dir, name)
+        stat = os.stat(path)
+        os.utime(path, (stat.st_atime - seconds, stat.st_mtime - seconds))
+
+
+def test_existing_cycles_and_unstable_files(sample_dir, tmp_path, request):
+    copy_cycle(sample_dir, str(tmp_path), cycle='20251119t00')
+    age_files(str(tmp_path))
+    watcher = NDFDCycleWatcher(str(tmp_path), variables=VARIABLES, stable_seconds=60, use_inotify=False)
+    request.addfinalizer(watcher.close)
+    assert watcher.scan() == []
+
+    # without a close or rename event, a new file has to stay the same size for stable_seconds
+    copy_cycle(sample_dir, str(tmp_path))
+    assert watcher.scan() == []
+    watcher.stable_seconds = 0.0
+    assert [b.cycle.hour for b in watcher.scan()] == [6]
+
+    with NDFDCycleWatcher(str(tmp_path), variables=VARIABLES, stable_seconds=0,
+                          use_inotify=False, process_existing=True) as watcher:
+        assert [b.cycle.hour for b in watcher.scan()] == [0, 6]
+
+
+def test_cycle_partly_written_at_start_is_passed(sample_dir, tmp_path, request):
+    # files still being written when the watcher starts are not skipped as existing
+    copy_cycle(sample_dir, str(tmp_path))
+    watcher = NDFDCycleWatcher(str(tmp_path), variables=VARIABLES, stable_seconds=60, use_inotify=False)
+    request.addfinalizer(watcher.close)
+    assert watcher.dispatched == set()
+    watcher.stable_seconds = 0.0
+    assert [b.cycle.hour for b in watcher.scan()] == [6]
+
+
+def test_failed_cycle_retried_when_files_change(sample_dir, tmp_path, request, capsys):
+    watcher = NDFDCycleWatcher(str(tmp_path), variables=VARIABLES, stable_seconds=0, use_inotify=False)
+    request.addfinalizer(watcher.close)
+    copy_cycle(sample_dir, str(tmp_path))
+    mint_path = os.path.join(str(tmp_path), 'mint_20251119t06.csv')
+    with open(mint_path) as f:
+        lines = f.readlines()
+    with open(mint_path, 'w') as f:
+        f.writelines(lines[:3] + [lines[3].split(',')[0] + '\n'])
+
+    # a cycle that can't be read is reported once, not on every scan
+    assert watcher.scan() == []
+    assert watcher.scan() == []
+    assert capsys.readouterr().err.count("Error reading NDFD cycle 20251119t06") == 1
+
+    copy_cycle(sample_dir, str(tmp_path), variables=['mint'])
+    assert [b.cycle.hour for b in watcher.scan()] == [6]
+    assert watcher._failed == {}
+
+
+def test_handler_errors_do_not_stop_watcher(sample_dir, tmp_path, request):
+    watcher = NDFDCycleWatcher(str(tmp_path), variables=VARIABLES, stable_seconds=0, use_inotify=False)
+    request.addfinalizer(watcher.close)
+    received = []
+
+    @watcher.on_cycle
+    def broken(cycle_bundle):
+        raise RuntimeError("handler failed")
+
+    watcher.add_handler(received.append)
+    copy_cycle(sample_dir, str(tmp_path))
+    assert len(watcher.scan()) == 1
+    assert len(received) == 1
+
+
+@pytest.mark.skipif(not inotify_available(), reason="inotify is not available")
+def test_inotify_watch(sample_dir, tmp_path):
+    # a long stable time and poll interval, so only the rename events can make the cycle complete quickly
+    watcher = NDFDCycleWatcher(str(tmp_path), variables=VARIABLES, stable_seconds=60, poll_interval=30)
+    assert watcher.use_inotify
+    received = threading.Event()
+    watcher.add_handler(lambda cycle_bundle: received.set())
+
+    with watcher:
+        watcher.start()
+        copy_cycle(sample_dir, str(tmp_path))
+        assert received.wait(10)
+
+
+def test_close_releases_file_descriptors(tmp_path):
+    watcher = NDFDCycleWatcher(str(tmp_path), variables=VARIABLES, poll_interval=30)
+    fds = (watcher._wake_read, watcher._wake_write)
+    watcher.start()
+    watcher.close()
+    for fd in fds:
+        with pytest.raises(OSError):
+            os.fstat(fd)
+    # closing again does nothing, and a closed watcher can't run
+    watcher.close()
+    with pytest.raises(ValueError):
+        watcher.run(timeout=0)
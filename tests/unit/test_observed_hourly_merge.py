@@ -0,0 +1,95 @@
+from datetime import date, datetime, timedelta, timezone
+import pandas as pd
+import pytest
+
+from ewxndfd import ndfd_forecast_api as ndfd
+from ewxndfd.mock_ndfd_server import MockNDFDServer
+
+
+@pytest.fixture
+def metric_frames():
+    """forecast values for two points, first forecast hour 10:00 local on Dec 12"""
+    def frame(times, values):
+        df = pd.DataFrame({
+            'forecast_time': times * 2,
+            'value': values * 2,
+            '_point': [0] * len(times) + [1] * len(times),
+        })
+        df['forecast_date'] = pd.to_datetime(df['forecast_time'].str.slice(0, 10)).dt.date
+        return df
+
+    hourly = ['2025-12-12T10:00:00-05:00', '2025-12-12T11:00:00-05:00', '2025-12-13T10:00:00-05:00']
+    qpf = ['2025-12-12T07:00:00-05:00', '2025-12-12T13:00:00-05:00']
+    mint = ['2025-12-12T19:00:00-05:00']
+    maxt = ['2025-12-13T07:00:00-05:00']
+    return [
+        ('Relative Humidity (percent)', frame(hourly, [80, 70, 60])),
+        ('Liquid Precipitation Amount (centimeters)', frame(qpf, [0.1, 0.2])),
+        ('Daily Minimum Temperature (Celsius)', frame(mint, [-5])),
+        ('Daily Maximum Temperature (Celsius)', frame(maxt, [3])),
+    ]
+
+
+def test_merge_observed_hourly_weather(metric_frames):
+    # observations in utc: 03:00 to 11:00 local on Dec 12, only for point 1
+    times = pd.date_range('2025-12-12T08:00:00Z', periods=9, freq='h')
+    observed = pd.DataFrame({
+        '_point': 1,
+        'temperature': [-8.0] + [1.0] * 7 + [20.0],
+        'relative_humidity': 95.0,
+        'precipitation': 0.05,
+    }, index=times)
+
+    merged = ndfd.merge_observed_hourly_weather(metric_frames, observed)
+    summary = ndfd.summarize_metric_frames(merged, keys=['_point'])
+    dec12 = date(2025, 12, 12)
+
+    # point 0 has no observations
+    assert summary.loc[(0, dec12), 'Maximum Relative Humidity (percent)'] == 80
+    assert pd.isna(summary.loc[(0, dec12), 'Daily Maximum Temperature (Celsius)'])
+    # humidity observations before 10:00 local are added
+    assert summary.loc[(1, dec12), 'Maximum Relative Humidity (percent)'] == 95
+    # precipitation observations before the first 07:00 qpf period: 03:00 to 06:00
+    assert summary.loc[(1, dec12), 'Total Liquid Precipitation Amount (centimeters)'] == pytest.approx(0.3 + 4 * 0.05)
+    # all observed temperatures are before the first forecast min/max periods
+    assert summary.loc[(1, dec12), 'Daily Minimum Temperature (Celsius)'] == -8
+    assert summary.loc[(1, dec12), 'Daily Maximum Temperature (Celsius)'] == 20
+
+
+def test_merge_ignores_observations_of_past_days(metric_frames):
+    # 20:00 local on Dec 11 and 02:00 local on Dec 12, before any forecast time
+    times = pd.DatetimeIndex(['2025-12-12T01:00:00Z', '2025-12-12T07:00:00Z'])
+    observed = pd.DataFrame({'_point': 0, 'relative_humidity': [100.0, 99.0]}, index=times)
+
+    merged = ndfd.merge_observed_hourly_weather(metric_frames, observed)
+    summary = ndfd.summarize_metric_frames(merged, keys=['_point'])
+
+    assert (0, date(2025, 12, 11)) not in summary.index
+    assert summary.loc[(0, date(2025, 12, 12)), 'Maximum Relative Humidity (percent)'] == 99
+
+
+def test_daily_forecast_summary_with_hourly_weather():
+    # a fixed forecast time, so the test doesn't depend on the clock
+    now = datetime(2025, 12, 12, 15, 30, tzinfo=timezone.utc)
+    local = timezone(timedelta(hours=-5))
+    midnight = now.astimezone(local).replace(hour=0, minute=0, second=0, microsecond=0)
+    today = midnight.date()
+    # an observation of yesterday is not used
+    observed = pd.DataFrame({'temperature': [40.0, 45.0], 'relative_humidity': [1.0, 0.5]},
+                            index=pd.DatetimeIndex([midnight, midnight - timedelta(hours=1)]).tz_convert('UTC'))
+
+    with MockNDFDServer(now=now) as server:
+        df = ndfd.daily_forecast_summary(*ndfd.LANSING_LAT_LON, hourly_weather=observed, base_url=server.url)
+        batch = ndfd.daily_forecast_summary_batch(
+            [(42.73, -84.55, 'LAN'), (44.5, -85.2, 'TVC')],
+            hourly_weather=observed.assign(Location='TVC'), base_url=server.url)
+
+    assert df['forecast_date'].min() == today
+    today_row = df[df['forecast_date'] == today].iloc[0]
+    assert today_row['Daily Maximum Temperature (Celsius)'] == 40
+    assert today_row['Minimum Relative Humidity (percent)'] == 1
+
+    lan_today = batch[(batch['Location'] == 'LAN') & (batch['forecast_date'] == today)]
+    tvc_today = batch[(batch['Location'] == 'TVC') & (batch['forecast_date'] == today)]
+    assert (lan_today['Minimum Relative Humidity (percent)'] > 1).all()
+    assert (tvc_today['Minimum Relative Humidity (percent)'] == 1).all()
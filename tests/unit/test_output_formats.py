@@ -0,0 +1,95 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from ewxndfd import ndfd_forecast_api as ndfd
+from ewxndfd.ewx.ewx_ndfd_file import NDFD
+from ewxndfd.ewx.ndfd_array import read_cycle_array
+from ewxndfd.mock_ndfd_server import MockNDFDServer
+from ewxndfd.output_formats import cycle_array_to_arrow, cycle_array_to_xarray, dataframe_to_format
+
+
+@pytest.fixture
+def relh_array(sample_dir):
+    return read_cycle_array(os.path.join(str(sample_dir), 'relh_20251119t06.csv'))
+
+
+def test_cycle_array_to_arrow_shares_values(relh_array):
+    pa = pytest.importorskip("pyarrow")
+    table = cycle_array_to_arrow(relh_array)
+    n_stations, n_columns = relh_array.values.shape
+    assert table.num_rows == n_stations * n_columns
+    assert table.column_names == ['station', 'valid_start', 'valid_end', 'value', 'flags']
+    assert table.schema.field('valid_start').type == pa.timestamp('s', tz='UTC')
+    assert table.schema.metadata[b'variable_type'] == b'relh'
+
+    # row order is station major, like the value matrix
+    assert table['station'][n_columns].as_py() == relh_array.stations[1]
+    values = table['value'].chunk(0).to_numpy(zero_copy_only=False)
+    np.testing.assert_array_equal(values, relh_array.values.reshape(-1))
+    # the value buffer is the numpy array's memory
+    assert table['value'].chunk(0).buffers()[1].address == relh_array.values.ctypes.data
+
+
+def test_cycle_array_to_xarray(relh_array):
+    pytest.importorskip("xarray")
+    ds = cycle_array_to_xarray(relh_array)
+    assert ds['relh'].dims == ('station', 'valid_start')
+    assert np.shares_memory(ds['relh'].values, relh_array.values)
+    assert ds['flags'].shape == relh_array.values.shape
+    assert ds.attrs['variable_type'] == 'relh'
+
+
+def test_get_forecast_formats(sample_dir, sample_datetime):
+    pl = pytest.importorskip("polars")
+    pytest.importorskip("xarray")
+    n = NDFD(str(sample_dir), variable_type='mint', unit_str='Celsius', unit_abbr='°C')
+    rows = n.get_forecast(sample_datetime, station_list=['rom', 'ith'])
+
+    cycle_array = n.get_forecast(sample_datetime, station_list=['rom', 'ith'], format='array')
+    assert list(cycle_array.stations) == [row['station'] for row in rows]
+
+    df = n.get_forecast(sample_datetime, station_list=['rom', 'ith'], format='polars')
+    assert isinstance(df, pl.DataFrame)
+    assert df.height == 2 * (len(rows[0]) - 1)
+
+    ds = n.get_forecast(sample_datetime, station_list=['rom', 'ith'], format='xarray')
+    assert ds.sizes['station'] == 2
+
+    # the columnar formats don't build a dict per row
+    def no_dicts(*args, **kwargs):
+        raise AssertionError("read as dicts")
+    n._read = no_dicts
+    assert n.get_forecast(sample_datetime, station_list=['rom', 'ith'], format='polars').equals(df)
+
+    with pytest.raises(ValueError):
+        n.get_forecast(sample_datetime, format='excel')
+
+
+def test_daily_forecast_summary_formats():
+    pa = pytest.importorskip("pyarrow")
+    pl = pytest.importorskip("polars")
+    pytest.importorskip("xarray")
+    lat, lon = ndfd.LANSING_LAT_LON
+    with MockNDFDServer() as server:
+        summary_df = ndfd.daily_forecast_summary(lat, lon, location_name='LAN', base_url=server.url)
+        table = ndfd.daily_forecast_summary(lat, lon, location_name='LAN', base_url=server.url, format='arrow')
+        polars_df = ndfd.daily_forecast_summary(lat, lon, location_name='LAN', base_url=server.url, format='polars')
+        ds = ndfd.daily_forecast_summary(lat, lon, location_name='LAN', base_url=server.url, format='xarray')
+
+    assert isinstance(table, pa.Table)
+    assert table.column_names == list(summary_df.columns)
+    assert isinstance(polars_df, pl.DataFrame)
+    assert polars_df.height == len(summary_df)
+    assert set(ds.dims) == {'Location', 'forecast_date'}
+
+    # the format is checked before the forecast is requested
+    with MockNDFDServer() as server:
+        with pytest.raises(ValueError):
+            ndfd.daily_forecast_summary(lat, lon, base_url=server.url, format='excel')
+        assert server.request_count == 0
+
+    with pytest.raises(ValueError):
+        dataframe_to_format(pd.DataFrame({'a': [1]}), 'excel')
@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+from ewxndfd.ewx.ewx_ndfd_file import NDFD
+from ewxndfd.ewx.stations import Station, StationRegistry, haversine_km
+
+
+@pytest.fixture
+def registry(sample_dir):
+    return StationRegistry.from_csv(str(sample_dir / 'ewx_stations.csv'))
+
+
+def test_registry_from_csv(registry):
+    assert len(registry) == 6
+    assert 'kbs' in registry
+    assert registry.get('msu').elevation == 260
+
+
+def test_nearest_and_within_radius(registry):
+    station, distance = registry.nearest(42.73, -84.55)[0]
+    assert station.station == 'msu'
+    assert distance < 10
+
+    codes = [s.station for s, _ in registry.within_radius(42.73, -84.55, 80)]
+    assert codes[0] == 'msu'
+    assert 'ith' in codes
+    assert 'rom' not in codes
+    assert registry.within_radius(30.0, -100.0, 50) == []
+
+
+def test_nearest_matches_brute_force():
+    rng = np.random.default_rng(0)
+    lats = rng.uniform(41.5, 47.5, 2000)
+    lons = rng.uniform(-90.5, -82.5, 2000)
+    registry = StationRegistry([Station(f's{n}', '', lat, lon, 0.0) for n, (lat, lon) in enumerate(zip(lats, lons))])
+
+    for lat, lon in [(42.73, -84.55), (46.0, -89.0), (40.0, -80.0)]:
+        expected = np.argsort(haversine_km(lat, lon, lats, lons))[:5]
+        found = [int(s.station[1:]) for s, _ in registry.nearest(lat, lon, k=5)]
+        assert found == list(expected)
+
+
+def test_get_forecast_near_coordinates(sample_dir, sample_datetime, registry):
+    n = NDFD(str(sample_dir), 'mint', 'Celsius', '°C', stations=registry)
+    rows = n.get_forecast(local_datetime=sample_datetime, near=(42.73, -84.55), radius_km=65)
+    assert sorted(r['station'] for r in rows) == ['ith', 'msu']
+
+    rows = n.get_forecast(local_datetime=sample_datetime, near=(42.42, -85.37))
+    assert [r['station'] for r in rows] == ['kbs']
+
+    with pytest.raises(ValueError):
+        NDFD(str(sample_dir), 'mint', 'Celsius', '°C').get_forecast(local_datetime=sample_datetime, near=(42.4, -85.3))
+
+
+def test_get_forecast_near_and_station_list(sample_dir, sample_datetime, registry):
+    n = NDFD(str(sample_dir), 'mint', 'Celsius', '°C', stations=registry)
+    # kbs is not within the radius, so only msu is kept
+    rows = n.get_forecast(local_datetime=sample_datetime, station_list=['msu', 'kbs'],
+                          near=(42.73, -84.55), radius_km=65)
+    assert [r['station'] for r in rows] == ['msu']
+
+    # no station matches: an empty result of the requested format
+    assert n.get_forecast(local_datetime=sample_datetime, station_list=['kbs'],
+                          near=(42.73, -84.55), radius_km=65) == []
+    df = n.get_forecast(local_datetime=sample_datetime, station_list=['kbs'],
+                        near=(42.73, -84.55), radius_km=65, format='pandas')
+    full = n.get_forecast(local_datetime=sample_datetime, format='pandas')
+    assert len(df) == 0
+    assert list(df.columns) == list(full.columns)